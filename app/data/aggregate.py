@@ -0,0 +1,147 @@
+import multiprocessing
+import os
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+import app.data.partitions as Partitions
+import app.data.snapshot as Snapshot
+from app.data.db import build_where, connect_readonly
+
+# Group-by counts over very large tables are split into rowid ranges. Each range is counted
+# by SQLite in a worker process with its own read-only connection, and the partial Counters
+# are merged here. The scan then uses every core instead of one.
+AGGREGATE_WORKERS = int(os.environ.get("AGGREGATE_WORKERS", "0")) or os.cpu_count() or 1
+# Rows per range handed to a worker
+RANGE_ROWS = int(os.environ.get("AGGREGATE_RANGE_ROWS", "500000"))
+# Below this many rows the process start-up costs more than it saves, so it runs inline
+PARALLEL_MIN_ROWS = int(os.environ.get("AGGREGATE_PARALLEL_MIN_ROWS", "1000000"))
+
+# Table -> (columns that can be grouped or filtered on, date column the "month" dimension uses)
+TABLES = {
+    "cyber_incidents": (["id", "date", "incident_type", "severity", "status"], "date"),
+    "IT_Tickets": (["ticket_id", "subject", "priority", "status", "created_date"], "created_date"),
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def dimension_sql(table, dimensions) -> list:
+    """
+    Maps dimension names to SQL expressions. "month" is the yyyy-mm prefix of the table's date column.
+    Raises ValueError for a column the table doesn't have.
+    """
+    columns, date_column = TABLES[table]
+    expressions = []
+    for dimension in dimensions:
+        if dimension == "month":
+            expressions.append("substr({}, 1, 7)".format(date_column))
+        elif dimension in columns:
+            expressions.append(dimension)
+        else:
+            raise ValueError("Cannot group {} by '{}'.".format(table, dimension))
+    return expressions
+
+def plan_ranges(conn, table, range_rows=RANGE_ROWS, date_from=None, date_to=None) -> list:
+    """
+    Splits a table into (source table, first rowid, last rowid) ranges of about range_rows rows.
+    cyber_incidents is split per partition, pruned to the date range.
+    """
+    if table == Partitions.VIEW_NAME:
+        sources = [Partitions.partition_name(year) for year in Partitions.partitions_for_range(conn, date_from, date_to)]
+    else:
+        sources = [table]
+
+    ranges = []
+    for source in sources:
+        low, high = conn.execute("SELECT MIN(rowid), MAX(rowid) FROM {}".format(source)).fetchone()
+        if low is None:
+            continue
+        for start in range(low, high + 1, range_rows):
+            ranges.append((source, start, min(start + range_rows - 1, high)))
+    return ranges
+
+def partial_counts(db_path, source, first, last, expressions, where, params) -> Counter:
+    """
+    Worker task: group-by counts for one rowid range of one table.
+    Opens its own read-only connection, so it is safe to run in another process.
+    """
+    conn = connect_readonly(db_path)
+    try:
+        group = ", ".join(expressions)
+        sql = "SELECT {0}, COUNT(*) FROM {1} WHERE rowid BETWEEN ? AND ?{2} GROUP BY {0}".format(
+            group, source, " AND " + where if where else ""
+        )
+        counts = Counter()
+        for row in conn.execute(sql, [first, last] + list(params)):
+            counts[row[:-1]] += row[-1]
+        return counts
+    finally:
+        conn.close()
+
+def _executor_instance():
+    """
+    Creates the shared process pool on first use. Workers are spawned rather than forked,
+    because the Streamlit server process has threads (and open connections) of its own.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=AGGREGATE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _executor
+
+def aggregate(table, dimensions, filters=None, date_from=None, date_to=None, db_path=None, parallel=None):
+    """
+    Counts rows of cyber_incidents or IT_Tickets grouped by several dimensions, e.g.
+    aggregate("cyber_incidents", ["severity", "status", "month"]).
+    Each rowid range is counted separately, in the process pool once the table has
+    PARALLEL_MIN_ROWS rows (parallel forces it on or off), and the partial counts are merged.
+    Reads the analytics snapshot unless db_path is given.
+    Returns a DataFrame with one column per dimension plus "count", largest counts first.
+    """
+    columns, date_column = TABLES[table]
+    expressions = dimension_sql(table, dimensions)
+
+    # 1. Read from the snapshot unless told otherwise
+    if db_path is None:
+        Snapshot.ensure_fresh()
+        db_path = Snapshot.SNAPSHOT_PATH
+
+    # 2. Filters shared by every range
+    clause, params = build_where(filters, columns)
+    conditions = [clause[len(" WHERE "):]] if clause else []
+    if date_from:
+        conditions.append("{} >= ?".format(date_column))
+        params.append(str(date_from))
+    if date_to:
+        conditions.append("{} <= ?".format(date_column))
+        params.append(str(date_to))
+    where = " AND ".join(conditions)
+
+    # 3. Split the table into rowid ranges
+    conn = connect_readonly(db_path)
+    try:
+        ranges = plan_ranges(conn, table, RANGE_ROWS, date_from, date_to)
+    finally:
+        conn.close()
+
+    # 4. Count each range, in worker processes for big scans
+    if parallel is None:
+        parallel = sum(last - first + 1 for _, first, last in ranges) >= PARALLEL_MIN_ROWS
+    tasks = [(str(db_path), source, first, last, expressions, where, params) for source, first, last in ranges]
+    if parallel and len(tasks) > 1:
+        executor = _executor_instance()
+        partials = [future.result() for future in [executor.submit(partial_counts, *task) for task in tasks]]
+    else:
+        partials = [partial_counts(*task) for task in tasks]
+
+    # 5. Merge the partials
+    totals = Counter()
+    for partial in partials:
+        totals.update(partial)
+
+    rows = [list(key) + [count] for key, count in totals.most_common()]
+    return pd.DataFrame(rows, columns=list(dimensions) + ["count"])
@@ -0,0 +1,117 @@
+import os
+import threading
+from datetime import date
+import pandas as pd
+import app.data.snapshot as Snapshot
+from app.data.db import connect_readonly, data_version
+from app.data.validation import PRIORITIES, OPEN_TICKET_STATUSES as OPEN_STATUSES
+
+# Age buckets as (label, oldest age in days the bucket holds); None = no upper bound
+AGE_BUCKETS = [
+    ("0-1 days", 1),
+    ("2-3 days", 3),
+    ("4-7 days", 7),
+    ("8-14 days", 14),
+    ("15-30 days", 30),
+    ("31+ days", None),
+]
+# Days an open ticket of each priority may age before it breaches its SLA
+SLA_DAYS = {
+    "Critical": int(os.environ.get("SLA_DAYS_CRITICAL", "1")),
+    "High": int(os.environ.get("SLA_DAYS_HIGH", "3")),
+    "Medium": int(os.environ.get("SLA_DAYS_MEDIUM", "7")),
+    "Low": int(os.environ.get("SLA_DAYS_LOW", "14")),
+}
+
+_cache = {}
+_lock = threading.Lock()
+
+def _bucket_sql(age) -> str:
+    """CASE expression mapping an age in days to its AGE_BUCKETS label."""
+    cases = ["WHEN {} <= {} THEN '{}'".format(age, upper, label) for label, upper in AGE_BUCKETS if upper is not None]
+    return "CASE {} ELSE '{}' END".format(" ".join(cases), AGE_BUCKETS[-1][0])
+
+def _sla_sql() -> str:
+    """CASE expression giving the SLA in days of a ticket's priority."""
+    cases = " ".join("WHEN '{}' THEN {}".format(priority, days) for priority, days in SLA_DAYS.items())
+    return "CASE priority {} ELSE {} END".format(cases, max(SLA_DAYS.values()))
+
+def aging_query(as_of):
+    """
+    Builds the (sql, params) that ages every open ticket and groups it by priority, status and
+    bucket. Age is whole days from created_date (or created_at) to as_of.
+    """
+    placeholders = ", ".join("?" for _ in OPEN_STATUSES)
+    sql = """
+        SELECT priority, status, {bucket} AS bucket,
+               COUNT(*) AS tickets,
+               SUM(age > sla) AS breached,
+               MAX(age) AS oldest_days
+        FROM (
+            SELECT priority, status,
+                   MAX(CAST(julianday(?) - julianday(COALESCE(created_date, created_at)) AS INTEGER), 0) AS age,
+                   {sla} AS sla
+            FROM IT_Tickets
+            WHERE status IN ({placeholders})
+        )
+        GROUP BY priority, status, bucket
+    """.format(bucket=_bucket_sql("age"), sla=_sla_sql(), placeholders=placeholders)
+    return sql, [str(as_of)] + list(OPEN_STATUSES)
+
+def compute_aging(conn, as_of) -> pd.DataFrame:
+    """
+    Runs the aging query on an open connection.
+    Returns one row per (priority, status, bucket) with tickets, breached and oldest_days.
+    """
+    sql, params = aging_query(as_of)
+    return pd.read_sql_query(sql, conn, params=params)
+
+def get_aging(as_of=None) -> pd.DataFrame:
+    """
+    Aging metrics of the open tickets as of a day (default today), read from the analytics snapshot.
+    Cached per snapshot data version and day.
+    """
+    as_of = as_of or date.today()
+    version = Snapshot.analytics_version()
+    key = (version, str(as_of))
+
+    with _lock:
+        if key in _cache:
+            return _cache[key]
+
+    # 1. Read the snapshot just versioned, without refreshing it again
+    conn = connect_readonly(Snapshot.SNAPSHOT_PATH)
+    try:
+        frame = compute_aging(conn, as_of)
+    finally:
+        conn.close()
+    if data_version(Snapshot.SNAPSHOT_PATH) != version:
+        return frame
+
+    with _lock:
+        # Only the current version is worth keeping
+        for stale in [cached for cached in _cache if cached[0] != version]:
+            del _cache[stale]
+        _cache[key] = frame
+    return frame
+
+def age_distribution(aging, by="priority") -> pd.DataFrame:
+    """
+    Open tickets per age bucket, split by "priority" or "status".
+    Returns a dense matrix: index = priorities/statuses, columns = buckets in age order.
+    """
+    order = list(PRIORITIES) if by == "priority" else list(OPEN_STATUSES)
+    buckets = [label for label, _ in AGE_BUCKETS]
+    matrix = aging.pivot_table(index=by, columns="bucket", values="tickets", aggfunc="sum", fill_value=0)
+    return matrix.reindex(index=order, columns=buckets, fill_value=0).astype("int64")
+
+def breach_summary(aging) -> pd.DataFrame:
+    """
+    Open tickets, SLA breaches and the oldest ticket's age for each priority.
+    """
+    summary = aging.groupby("priority").agg(
+        open_tickets=("tickets", "sum"), breached=("breached", "sum"), oldest_days=("oldest_days", "max")
+    )
+    summary = summary.reindex(list(PRIORITIES), fill_value=0).astype("int64")
+    summary.insert(0, "sla_days", [SLA_DAYS[priority] for priority in summary.index])
+    return summary.reset_index()
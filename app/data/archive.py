@@ -0,0 +1,229 @@
+import argparse
+import os
+import time
+from datetime import date, timedelta
+import app.data.partitions as Partitions
+from app.data.db import connect_database
+
+# Closed and resolved rows older than ARCHIVE_AFTER_DAYS are moved out of the hot tables into
+# archive tables in the same database file. Reads can include them with include_archived=True.
+ARCHIVE_AFTER_DAYS = int(os.environ.get("ARCHIVE_AFTER_DAYS", "365"))
+# Rows moved per transaction; each batch holds the write lock only briefly
+ARCHIVE_BATCH_ROWS = int(os.environ.get("ARCHIVE_BATCH_ROWS", "1000"))
+# Pause between batches so other writers can get in
+ARCHIVE_PAUSE_SECONDS = 0.05
+# Free pages returned to the file system per incremental_vacuum step
+VACUUM_STEP_PAGES = 1000
+
+ARCHIVED_STATUSES = ("Closed", "Resolved")
+
+# Hot table -> (archive table, key column, date column, columns copied)
+ARCHIVES = {
+    "cyber_incidents": (
+        "cyber_incidents_archive", "id", "date",
+        ["id", "date", "incident_type", "severity", "status", "created_at"],
+    ),
+    "IT_Tickets": (
+        "IT_Tickets_archive", "ticket_id", "created_date",
+        ["id", "ticket_id", "subject", "priority", "status", "created_date", "created_at", "assigned_to"],
+    ),
+}
+
+def create_archive_tables(conn) -> None:
+    """
+    Migration 9: creates the archive tables.
+    The full VACUUM that switches the file to incremental auto-vacuum is left to the
+    archive command (enable_incremental_vacuum), so it never blocks a page load.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS cyber_incidents_archive (
+            id INTEGER PRIMARY KEY,
+            date date,
+            incident_type TEXT,
+            severity TEXT,
+            status TEXT,
+            created_at TIMESTAMP,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_cyber_incidents_archive_date ON cyber_incidents_archive (date)")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS IT_Tickets_archive (
+            id INTEGER,
+            ticket_id TEXT PRIMARY KEY,
+            subject TEXT,
+            priority TEXT,
+            status TEXT,
+            created_date DATE,
+            created_at TIMESTAMP,
+            assigned_to TEXT,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_it_tickets_archive_created_date ON IT_Tickets_archive (created_date)")
+
+def enable_incremental_vacuum(conn) -> bool:
+    """
+    Switches the file to incremental auto-vacuum, so space freed by archiving can be handed
+    back in small steps. On an existing file this needs one full VACUUM, which rewrites the
+    whole database and holds the write lock meanwhile; it is run once, by the archive command.
+    Returns True if the file was converted.
+    """
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+        return False
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    conn.execute("VACUUM")
+    return True
+
+def archive_select(table, date_from=None, date_to=None):
+    """
+    SELECT over a table's archive with the hot table's columns, for UNION ALL with live rows.
+    Returns (sql, params).
+    """
+    archive_table, _, date_column, columns = ARCHIVES[table]
+    conditions = []
+    params = []
+    if date_from:
+        conditions.append("{} >= ?".format(date_column))
+        params.append(str(date_from))
+    if date_to:
+        conditions.append("{} <= ?".format(date_column))
+        params.append(str(date_to))
+    where = " WHERE " + " AND ".join(conditions) if conditions else ""
+    return "SELECT {} FROM {}{}".format(", ".join(columns), archive_table, where), params
+
+def with_archive(source, params, table, date_from=None, date_to=None):
+    """
+    Extends a "(SELECT ...)" FROM source over live rows with the archived rows.
+    Returns (sql, params) in the same form.
+    """
+    archived, archived_params = archive_select(table, date_from, date_to)
+    return "({} UNION ALL {})".format(source.strip()[1:-1], archived), list(params) + archived_params
+
+def _sources(conn, table, cutoff):
+    """Physical tables that can hold rows older than the cutoff."""
+    if table == Partitions.VIEW_NAME:
+        return [Partitions.partition_name(year) for year in Partitions.partitions_for_range(conn, None, cutoff)]
+    return [table]
+
+def archive_batch(conn, table, cutoff, batch_rows=ARCHIVE_BATCH_ROWS) -> int:
+    """
+    Moves up to batch_rows closed/resolved rows dated before cutoff from one table into its
+    archive, in one transaction. Returns the number of rows moved.
+    """
+    archive_table, key, date_column, columns = ARCHIVES[table]
+    column_list = ", ".join(columns)
+    statuses = ", ".join("?" for _ in ARCHIVED_STATUSES)
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        moved = 0
+        for source in _sources(conn, table, cutoff):
+            # 1. Pick the batch
+            keys = [row[0] for row in conn.execute(
+                "SELECT {} FROM {} WHERE status IN ({}) AND {} < ? LIMIT ?".format(key, source, statuses, date_column),
+                list(ARCHIVED_STATUSES) + [cutoff, batch_rows - moved]
+            )]
+            if not keys:
+                continue
+            marks = ", ".join("?" for _ in keys)
+
+            # 2. Copy it to the archive, then remove it from the hot table. A plain INSERT:
+            #    an id already in the archive is a conflict to fail on, not a row to overwrite
+            conn.execute(
+                "INSERT INTO {0} ({1}) SELECT {1} FROM {2} WHERE {3} IN ({4})".format(
+                    archive_table, column_list, source, key, marks
+                ),
+                keys
+            )
+            # Archived incident ids stay in incident_partition_map, so they are never reissued
+            conn.execute("DELETE FROM {} WHERE {} IN ({})".format(source, key, marks), keys)
+
+            moved += len(keys)
+            if moved >= batch_rows:
+                break
+        conn.commit()
+        return moved
+    except Exception:
+        conn.rollback()
+        raise
+
+def incremental_vacuum(conn, step_pages=VACUUM_STEP_PAGES) -> int:
+    """
+    Returns free pages to the file system a step at a time, so no single step holds the
+    write lock for long. Returns the number of pages freed.
+    """
+    freed = 0
+    free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    while free:
+        conn.execute("PRAGMA incremental_vacuum({})".format(min(free, step_pages))).fetchall()
+        remaining = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if remaining >= free:
+            # Nothing was freed (the file isn't in incremental mode); stop instead of spinning
+            break
+        freed += free - remaining
+        free = remaining
+    return freed
+
+def run_archival(days=None, batch_rows=None, tables=None) -> dict:
+    """
+    Archives closed/resolved incidents and tickets older than `days` batch by batch, then frees
+    the pages. Returns the rows moved per table and the pages freed.
+    """
+    days = ARCHIVE_AFTER_DAYS if days is None else days
+    batch_rows = batch_rows or ARCHIVE_BATCH_ROWS
+    cutoff = str(date.today() - timedelta(days=days))
+
+    # 1. Autocommit mode, so every batch is exactly one explicit transaction
+    conn = connect_database()
+    conn.isolation_level = None
+    try:
+        results = {}
+        for table in tables or ARCHIVES:
+            moved = 0
+            while True:
+                count = archive_batch(conn, table, cutoff, batch_rows)
+                moved += count
+                if count < batch_rows:
+                    break
+                time.sleep(ARCHIVE_PAUSE_SECONDS)
+            results[table] = moved
+
+        # 2. Hand the space back
+        results["pages_freed"] = incremental_vacuum(conn)
+        return results
+    finally:
+        conn.close()
+
+def main(argv=None):
+    """
+    Command-line entry point, e.g.
+        python -m app.data.archive              (archive rows older than ARCHIVE_AFTER_DAYS)
+        python -m app.data.archive --days 90
+    """
+    from app.data.schema import ensure_schema
+
+    parser = argparse.ArgumentParser(description="Move old closed incidents and resolved tickets to the archive tables.")
+    parser.add_argument("--days", type=int, help="archive rows older than DAYS (default: {})".format(ARCHIVE_AFTER_DAYS))
+    parser.add_argument("--batch", type=int, help="rows per transaction (default: {})".format(ARCHIVE_BATCH_ROWS))
+    parser.add_argument("--table", action="append", choices=sorted(ARCHIVES), help="table to archive (default: all)")
+    args = parser.parse_args(argv)
+
+    ensure_schema()
+    started = time.monotonic()
+
+    # 1. One-off conversion to incremental auto-vacuum
+    conn = connect_database()
+    conn.isolation_level = None
+    try:
+        if enable_incremental_vacuum(conn):
+            print("Converted the database to incremental auto-vacuum in {:.3f}s".format(time.monotonic() - started))
+    finally:
+        conn.close()
+
+    # 2. Archive
+    results = run_archival(args.days, args.batch, args.table)
+    print("Archived {} in {:.3f}s".format(results, time.monotonic() - started))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import app.data.partitions as Partitions
+from app.data.aggregate import TABLES
+from app.data.db import build_where, connect_database
+from app.data.validation import INCIDENT_STATUSES, TICKET_STATUSES
+
+# Statuses a bulk transition may set, per table
+STATUSES = {
+    "cyber_incidents": INCIDENT_STATUSES,
+    "IT_Tickets": TICKET_STATUSES,
+}
+
+def _targets(conn, table, filters, date_from=None, date_to=None):
+    """
+    (table, WHERE clause, params) for each physical table a bulk operation touches.
+    Incident partitions outside the date range are skipped.
+    """
+    columns, date_column = TABLES[table]
+    clause, params = build_where(filters, columns)
+    conditions = [clause[len(" WHERE "):]] if clause else []
+    if date_from:
+        conditions.append("{} >= ?".format(date_column))
+        params.append(str(date_from))
+    if date_to:
+        conditions.append("{} <= ?".format(date_column))
+        params.append(str(date_to))
+    if not conditions:
+        # A transition without any filter would rewrite the whole table
+        raise ValueError("A bulk transition needs at least one filter.")
+    where = " WHERE " + " AND ".join(conditions)
+
+    if table == Partitions.VIEW_NAME:
+        sources = [Partitions.partition_name(year) for year in Partitions.partitions_for_range(conn, date_from, date_to)]
+    else:
+        sources = [table]
+    return [(source, where, params) for source in sources]
+
+def preview_transition(table, filters, new_status=None, date_from=None, date_to=None) -> int:
+    """
+    Returns how many rows bulk_transition would change with the same arguments.
+    Rows already in new_status are not counted, as they wouldn't change.
+    """
+    db = connect_database()
+    try:
+        total = 0
+        for source, where, params in _targets(db, table, filters, date_from, date_to):
+            sql = "SELECT COUNT(*) FROM {}{}".format(source, where)
+            if new_status is not None:
+                sql += " AND status IS NOT ?"
+                params = params + [new_status]
+            total += db.execute(sql, params).fetchone()[0]
+        return total
+    finally:
+        db.close()
+
+def bulk_transition(table, filters, new_status, date_from=None, date_to=None) -> int:
+    """
+    Sets status = new_status on every row matching the filters, e.g.
+    bulk_transition("cyber_incidents", {"incident_type": "Phishing", "status": "Open"}, "Closed").
+    One UPDATE per physical table, all in one transaction. Returns the number of rows changed.
+    """
+    if new_status not in STATUSES[table]:
+        raise ValueError("Unknown status '{}' for {}.".format(new_status, table))
+
+    # 1. Connect to the DB and take the write lock up front
+    db = connect_database()
+    try:
+        db.execute("BEGIN IMMEDIATE")
+        changed = 0
+
+        # 2. One UPDATE per table, skipping rows already in the target status
+        for source, where, params in _targets(db, table, filters, date_from, date_to):
+            cursor = db.execute(
+                "UPDATE {} SET status = ?{} AND status IS NOT ?".format(source, where),
+                [new_status] + params + [new_status]
+            )
+            changed += cursor.rowcount
+
+        # 3. Commit everything together
+        db.commit()
+        return changed
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
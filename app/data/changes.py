@@ -0,0 +1,136 @@
+import json
+from app.data.db import connect_database
+
+# Every insert, update and delete on the tracked tables is appended to change_log by triggers.
+# Consumers remember the last seq they processed and poll changes_since(seq).
+CHANGE_TABLE = "change_log"
+
+# Logical table name -> (key column, columns captured in old/new values)
+TRACKED_TABLES = {
+    "cyber_incidents": ("id", ["id", "date", "incident_type", "severity", "status", "created_at"]),
+    "IT_Tickets": ("ticket_id", ["id", "ticket_id", "subject", "priority", "status", "created_date", "created_at", "assigned_to"]),
+}
+
+def create_change_log_table(conn) -> None:
+    """Create the change_log table."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            op TEXT NOT NULL,
+            row_key TEXT,
+            old_values TEXT,
+            new_values TEXT,
+            changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+def change_log_exists(conn) -> bool:
+    """True once the change_log table has been created by the schema migration."""
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (CHANGE_TABLE,)
+    ).fetchone()
+    return row is not None
+
+def _json_object(prefix, columns) -> str:
+    """SQL json_object(...) expression over NEW.* or OLD.* columns."""
+    return "json_object({})".format(", ".join("'{0}', {1}.{0}".format(column, prefix) for column in columns))
+
+def create_change_triggers(conn, table, logical_name) -> None:
+    """
+    Creates the triggers that log every insert, update and delete on `table` to change_log,
+    under `logical_name` (so all incident partitions log as "cyber_incidents").
+    """
+    key, columns = TRACKED_TABLES[logical_name]
+    new_values = _json_object("NEW", columns)
+    old_values = _json_object("OLD", columns)
+
+    statements = {
+        "insert": ("INSERT", "'INSERT', NEW.{0}, NULL, {1}".format(key, new_values)),
+        "update": ("UPDATE", "'UPDATE', NEW.{0}, {1}, {2}".format(key, old_values, new_values)),
+        "delete": ("DELETE", "'DELETE', OLD.{0}, {1}, NULL".format(key, old_values)),
+    }
+    for suffix, (event, values) in statements.items():
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_{0}_log_{1} AFTER {2} ON {0}
+            BEGIN
+                INSERT INTO change_log (table_name, op, row_key, old_values, new_values)
+                VALUES ('{3}', {4});
+            END
+        """.format(table, suffix, event, logical_name, values))
+
+def drop_change_triggers(conn, table) -> None:
+    """Drops the change_log triggers from a table (used before recreating them)."""
+    for suffix in ("insert", "update", "delete"):
+        conn.execute("DROP TRIGGER IF EXISTS trg_{}_log_{}".format(table, suffix))
+
+def changes_since(seq=0, limit=1000, tables=None):
+    """
+    Returns up to `limit` changes after sequence number `seq`, oldest first, optionally only
+    for some tables. Each change is a dict with seq, table, op, key, old, new and changed_at.
+    """
+    conn = connect_database()
+    try:
+        sql = "SELECT seq, table_name, op, row_key, old_values, new_values, changed_at FROM change_log WHERE seq > ?"
+        params = [seq]
+        if tables:
+            sql += " AND table_name IN ({})".format(", ".join("?" for _ in tables))
+            params.extend(tables)
+        sql += " ORDER BY seq LIMIT ?"
+        params.append(limit)
+        rows = conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+
+    return [
+        {
+            "seq": row[0],
+            "table": row[1],
+            "op": row[2],
+            "key": row[3],
+            "old": json.loads(row[4]) if row[4] else None,
+            "new": json.loads(row[5]) if row[5] else None,
+            "changed_at": row[6],
+        }
+        for row in rows
+    ]
+
+def latest_seq(conn=None) -> int:
+    """
+    Returns the highest sequence number ever assigned (0 if nothing has changed yet).
+    Read from sqlite_sequence, so it is O(1) and survives pruning of old entries.
+    """
+    own = conn is None
+    if own:
+        conn = connect_database()
+    try:
+        row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (CHANGE_TABLE,)).fetchone()
+        return row[0] if row else 0
+    finally:
+        if own:
+            conn.close()
+
+def prune_changes(before_seq) -> int:
+    """
+    Deletes change_log entries older than before_seq, once every consumer has read past them.
+    Returns the number of entries removed.
+    """
+    conn = connect_database()
+    try:
+        cursor = conn.execute("DELETE FROM change_log WHERE seq < ?", (before_seq,))
+        conn.commit()
+        return cursor.rowcount
+    finally:
+        conn.close()
+
+def install_change_capture(conn) -> None:
+    """
+    Schema migration: creates change_log and attaches triggers to IT_Tickets and to every
+    existing incidents partition. Partitions created later get their triggers on creation.
+    """
+    from app.data.partitions import list_partitions, partition_name
+
+    create_change_log_table(conn)
+    create_change_triggers(conn, "IT_Tickets", "IT_Tickets")
+    for year in list_partitions(conn):
+        create_change_triggers(conn, partition_name(year), "cyber_incidents")
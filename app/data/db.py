@@ -1,8 +1,75 @@
 import sqlite3
 from pathlib import Path
+import app.data.query_plan as QueryPlan
 
 DB_PATH = Path("DATA") / "intelligence_platform.db"
 
 def connect_database(db_path=DB_PATH):
     """Connect to SQLite database."""
-    return sqlite3.connect(str(db_path))
\ No newline at end of file
+    conn = sqlite3.connect(str(db_path))
+    if QueryPlan.QUERY_PLAN_DEBUG:
+        QueryPlan.attach(conn, db_path)
+    return conn
+
+def data_version(db_path=DB_PATH):
+    """
+    Returns a token that changes whenever incidents or tickets change.
+    This is the last change_log sequence number; databases without change capture fall back
+    to the modification stamp of the file and its WAL.
+    Used as a cache key so derived results are rebuilt only after the data changes.
+    """
+    path = Path(db_path)
+    if path.exists():
+        conn = connect_readonly(path)
+        try:
+            row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'change_log'").fetchone()
+        except sqlite3.OperationalError:
+            row = None
+        finally:
+            conn.close()
+        if row:
+            return row[0]
+
+    stamps = []
+    for path in (Path(db_path), Path(str(db_path) + "-wal")):
+        if path.exists():
+            stat = path.stat()
+            stamps.append((stat.st_mtime_ns, stat.st_size))
+    return tuple(stamps)
+
+def connect_readonly(db_path=DB_PATH):
+    """
+    Connect to an SQLite database file in read-only mode.
+    Any attempt to write through this connection raises sqlite3.OperationalError.
+    """
+    uri = "file:{}?mode=ro".format(Path(db_path).resolve().as_posix())
+    conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+    if QueryPlan.QUERY_PLAN_DEBUG:
+        QueryPlan.attach(conn, db_path)
+    return conn
+
+def build_where(filters, allowed_columns):
+    """
+    Turns a {column: value} dict into a (clause, params) WHERE clause; list values match any item
+    and None values are ignored. Raises ValueError for a column not in allowed_columns.
+    """
+    conditions = []
+    params = []
+    for column, value in (filters or {}).items():
+        if column not in allowed_columns:
+            raise ValueError("Cannot filter on column '{}'.".format(column))
+        if value is None:
+            continue
+        if isinstance(value, (list, tuple, set)):
+            values = list(value)
+            if not values:
+                continue
+            conditions.append("{} IN ({})".format(column, ", ".join("?" for _ in values)))
+            params.extend(values)
+        else:
+            conditions.append("{} = ?".format(column))
+            params.append(value)
+
+    if not conditions:
+        return "", []
+    return " WHERE " + " AND ".join(conditions), params
@@ -0,0 +1,217 @@
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import tempfile
+import zlib
+from app.data.db import connect_database, build_where
+import app.data.partitions as Partitions
+
+# Rows fetched from the cursor per batch; memory use is bounded by this, not the table size
+EXPORT_CHUNK_ROWS = 5000
+# Largest extract the dashboards offer for download. Streamlit holds a download's whole
+# content in memory to serve it, so bigger extracts have to go through the CLI (main()),
+# which streams to a file or stdout in constant memory.
+EXPORT_MAX_DOWNLOAD_ROWS = int(os.environ.get("EXPORT_MAX_DOWNLOAD_ROWS", "200000"))
+
+EXPORT_TABLES = {
+    "incidents": {
+        "columns": ["id", "date", "incident_type", "severity", "status", "created_at"],
+        "date_column": "date",
+    },
+    "tickets": {
+        "columns": ["id", "ticket_id", "subject", "priority", "status", "created_date", "created_at"],
+        "date_column": "created_date",
+    },
+}
+
+def export_query(conn, table, filters=None, date_from=None, date_to=None):
+    """
+    Builds the SELECT for an export.
+    Incidents are read through the partition router so a date range only touches its years.
+    Returns: Tuple (sql, params, columns)
+    """
+    if table not in EXPORT_TABLES:
+        raise ValueError("Unknown export table '{}'.".format(table))
+    spec = EXPORT_TABLES[table]
+    columns = spec["columns"]
+
+    # 1. Column filters
+    where, params = build_where(filters, columns)
+
+    # 2. Source table, with the date range applied
+    if table == "incidents":
+        source, source_params = Partitions.partition_source(conn, date_from, date_to)
+        params = source_params + params
+    else:
+        source = "IT_Tickets"
+        date_conditions = []
+        if date_from:
+            date_conditions.append("{} >= ?".format(spec["date_column"]))
+            params.append(str(date_from))
+        if date_to:
+            date_conditions.append("{} <= ?".format(spec["date_column"]))
+            params.append(str(date_to))
+        if date_conditions:
+            where = (where + " AND " if where else " WHERE ") + " AND ".join(date_conditions)
+
+    # No ORDER BY: rows stream in storage order instead of waiting on a full sort
+    sql = "SELECT {} FROM {}{}".format(", ".join(columns), source, where)
+    return sql, params, columns
+
+def iter_rows(conn, sql, params=(), chunk_size=EXPORT_CHUNK_ROWS):
+    """
+    Yields lists of at most chunk_size rows, read from the cursor with fetchmany.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        cursor.close()
+
+def encode_csv(columns, chunks):
+    """
+    Encodes row chunks as CSV text, one string per chunk, starting with the header.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for rows in chunks:
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.getvalue():
+        yield buffer.getvalue()
+
+def encode_json(columns, chunks):
+    """
+    Encodes row chunks as a JSON array of objects, streamed one chunk at a time.
+    """
+    yield "["
+    first = True
+    for rows in chunks:
+        parts = []
+        for row in rows:
+            parts.append(json.dumps(dict(zip(columns, row)), default=str))
+        text = ",\n".join(parts)
+        if not first:
+            text = ",\n" + text
+        first = False
+        yield text
+    yield "]\n"
+
+def gzip_chunks(chunks):
+    """
+    Compresses a stream of byte chunks into gzip format incrementally.
+    """
+    compressor = zlib.compressobj(wbits=31)  # 31 = gzip header and trailer
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+def stream_export(table, fmt="csv", filters=None, date_from=None, date_to=None, compress=False, chunk_size=EXPORT_CHUNK_ROWS):
+    """
+    Yields the bytes of a filtered incidents or tickets extract as csv or json, optionally gzipped.
+    Rows are encoded chunk_size at a time, so memory stays flat however many are exported.
+    """
+    if fmt not in ("csv", "json"):
+        raise ValueError("Unknown export format '{}'.".format(fmt))
+
+    conn = connect_database()
+    try:
+        sql, params, columns = export_query(conn, table, filters, date_from, date_to)
+        chunks = iter_rows(conn, sql, params, chunk_size)
+        text = encode_csv(columns, chunks) if fmt == "csv" else encode_json(columns, chunks)
+        data = (part.encode("utf-8") for part in text)
+        if compress:
+            data = gzip_chunks(data)
+        yield from data
+    finally:
+        conn.close()
+
+def write_export(target, table, fmt="csv", filters=None, date_from=None, date_to=None, compress=False):
+    """
+    Writes an export to an open binary file object and returns the number of bytes written.
+    """
+    written = 0
+    for data in stream_export(table, fmt, filters, date_from, date_to, compress):
+        target.write(data)
+        written += len(data)
+    return written
+
+def count_export(table, filters=None, date_from=None, date_to=None) -> int:
+    """Number of rows an export with these filters would contain."""
+    conn = connect_database()
+    try:
+        sql, params, _ = export_query(conn, table, filters, date_from, date_to)
+        return conn.execute("SELECT COUNT(*) FROM ({})".format(sql), params).fetchone()[0]
+    finally:
+        conn.close()
+
+def export_file(table, fmt="csv", filters=None, date_from=None, date_to=None, compress=False):
+    """
+    Runs an export into a temporary file and returns it rewound, for st.download_button.
+    Streamlit reads the file fully into memory to serve it, so the dashboards only offer
+    this for extracts up to EXPORT_MAX_DOWNLOAD_ROWS rows (see count_export).
+    Raises ValueError above that limit.
+    """
+    rows = count_export(table, filters, date_from, date_to)
+    if rows > EXPORT_MAX_DOWNLOAD_ROWS:
+        raise ValueError("Export of {} rows exceeds the {}-row download limit.".format(rows, EXPORT_MAX_DOWNLOAD_ROWS))
+    target = tempfile.TemporaryFile()
+    write_export(target, table, fmt, filters, date_from, date_to, compress)
+    target.seek(0)
+    return target
+
+def export_filename(table, fmt="csv", compress=False) -> str:
+    """Suggested download file name for an export."""
+    return "{}.{}{}".format(table, fmt, ".gz" if compress else "")
+
+def parse_filters(pairs):
+    """
+    Parses CLI filters like ["status=Open", "severity=High,Critical"] into a filters dict.
+    """
+    filters = {}
+    for pair in pairs or []:
+        column, _, value = pair.partition("=")
+        if not value:
+            raise ValueError("Filter '{}' must look like column=value.".format(pair))
+        values = value.split(",")
+        filters[column.strip()] = values if len(values) > 1 else values[0]
+    return filters
+
+def main(argv=None):
+    """
+    Command-line export, e.g.
+        python -m app.data.export incidents --format csv --gzip --filter status=Open -o open.csv.gz
+    """
+    parser = argparse.ArgumentParser(description="Stream a filtered incidents/tickets extract.")
+    parser.add_argument("table", choices=sorted(EXPORT_TABLES))
+    parser.add_argument("--format", choices=["csv", "json"], default="csv")
+    parser.add_argument("--gzip", action="store_true", help="gzip the output")
+    parser.add_argument("--filter", action="append", metavar="COLUMN=VALUE[,VALUE]", help="repeatable")
+    parser.add_argument("--from", dest="date_from", help="inclusive start date (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="date_to", help="inclusive end date (YYYY-MM-DD)")
+    parser.add_argument("-o", "--output", help="output file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    filters = parse_filters(args.filter)
+    if args.output:
+        with open(args.output, "wb") as target:
+            written = write_export(target, args.table, args.format, filters, args.date_from, args.date_to, args.gzip)
+        print("Wrote {} bytes to {}".format(written, args.output), file=sys.stderr)
+    else:
+        write_export(sys.stdout.buffer, args.table, args.format, filters, args.date_from, args.date_to, args.gzip)
+
+if __name__ == "__main__":
+    main()
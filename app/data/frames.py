@@ -0,0 +1,112 @@
+import logging
+import os
+import pandas as pd
+from app.data.validation import INCIDENT_TYPES, SEVERITIES, INCIDENT_STATUSES, SUBJECTS, PRIORITIES, TICKET_STATUSES
+
+logger = logging.getLogger(__name__)
+
+# Rows per chunk for the iterator readers
+CHUNK_ROWS = int(os.environ.get("FRAME_CHUNK_ROWS", "50000"))
+
+# Column dtypes for loaded tables. Enum columns become categoricals with the canonical
+# categories (one byte per row instead of a Python string), keys become nullable ints and
+# date columns datetime64. Columns not listed keep what SQLite returned.
+INCIDENT_DTYPES = {
+    "id": "Int64",
+    "incident_type": pd.CategoricalDtype(INCIDENT_TYPES),
+    "severity": pd.CategoricalDtype(SEVERITIES),
+    "status": pd.CategoricalDtype(INCIDENT_STATUSES),
+}
+INCIDENT_DATES = ["date", "created_at"]
+
+TICKET_DTYPES = {
+    "id": "Int64",
+    "subject": pd.CategoricalDtype(SUBJECTS),
+    "priority": pd.CategoricalDtype(PRIORITIES),
+    "status": pd.CategoricalDtype(TICKET_STATUSES),
+}
+TICKET_DATES = ["created_date", "created_at"]
+
+def apply_dtypes(frame, dtypes, dates) -> pd.DataFrame:
+    """
+    Converts a freshly read chunk to the table's dtypes.
+    Values outside an enum's categories are kept as extra categories and logged with a count.
+    """
+    for column, dtype in dtypes.items():
+        if column not in frame.columns:
+            continue
+        if isinstance(dtype, pd.CategoricalDtype):
+            values = frame[column]
+            unknown = values.notna() & ~values.isin(dtype.categories)
+            if unknown.any():
+                extra = sorted(values[unknown].astype(str).unique())
+                logger.warning("%d %s value(s) outside the known categories: %s", int(unknown.sum()), column, extra)
+                dtype = pd.CategoricalDtype(list(dtype.categories) + extra)
+        frame[column] = frame[column].astype(dtype)
+    for column in dates:
+        if column in frame.columns:
+            frame[column] = pd.to_datetime(frame[column], errors="coerce", format="mixed")
+    return frame
+
+def read_chunks(conn, sql, params=None, dtypes=None, dates=(), chunksize=None):
+    """
+    Runs a query on an open connection and yields the result as typed DataFrames of at most
+    chunksize rows. The connection must stay open until the iterator is exhausted.
+    """
+    for chunk in pd.read_sql_query(sql, conn, params=params or [], chunksize=chunksize or CHUNK_ROWS):
+        yield apply_dtypes(chunk, dtypes or {}, dates)
+
+def concat_chunks(chunks, columns=None) -> pd.DataFrame:
+    """
+    Joins typed chunks into one DataFrame. Categoricals stay categorical (over the union
+    of the chunks' categories), so the result is as compact as the chunks. `columns` gives the shape
+    of the empty result when there are no chunks.
+    """
+    frames = list(chunks)
+    if not frames:
+        return pd.DataFrame(columns=columns or [])
+
+    # A chunk with unknown enum values has extra categories; give every chunk the union
+    for column in frames[0].columns:
+        if isinstance(frames[0][column].dtype, pd.CategoricalDtype):
+            categories = list(dict.fromkeys(value for frame in frames for value in frame[column].cat.categories))
+            for frame in frames:
+                if list(frame[column].cat.categories) != categories:
+                    frame[column] = frame[column].cat.set_categories(categories)
+    return pd.concat(frames, ignore_index=True)
+
+def reduce_chunks(chunks, step, initial):
+    """
+    Folds chunks into a running result: result = step(result, chunk) for every chunk.
+    Only the running result and the current chunk are ever held in memory.
+    """
+    result = initial
+    for chunk in chunks:
+        result = step(result, chunk)
+    return result
+
+def count_by(chunks, columns) -> pd.Series:
+    """
+    Row counts grouped by one column or a list of columns, accumulated chunk by chunk.
+    Returns a Series indexed by the group values, largest first.
+    """
+    keys = columns if isinstance(columns, list) else [columns]
+
+    def step(total, chunk):
+        counts = chunk.groupby(keys, observed=True, dropna=False).size()
+        return counts if total is None else total.add(counts, fill_value=0)
+
+    total = reduce_chunks(chunks, step, None)
+    if total is None:
+        return pd.Series(dtype="int64", name="count")
+    return total.astype("int64").sort_values(ascending=False).rename("count")
+
+def date_range(chunks, column):
+    """Earliest and latest value of a datetime column across all chunks, as (min, max)."""
+    def step(bounds, chunk):
+        bounds[0].append(chunk[column].min())
+        bounds[1].append(chunk[column].max())
+        return bounds
+
+    lows, highs = reduce_chunks(chunks, step, ([], []))
+    return pd.Series(lows, dtype="datetime64[ns]").min(), pd.Series(highs, dtype="datetime64[ns]").max()
@@ -1,52 +1,199 @@
+import logging
+import sqlite3
 import pandas as pd
 from app.data.db import connect_database
+from app.data.snapshot import connect_analytics
+import app.data.partitions as Partitions
+import app.data.archive as Archive
+import app.data.frames as Frames
+
+logger = logging.getLogger(__name__)
+
+def _find_partition(cursor, id):
+    """
+    Returns the partition year holding an incident id, or None if the id doesn't exist.
+    """
+    cursor.execute("SELECT year FROM {} WHERE id = ?".format(Partitions.MAP_TABLE), (id,))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+def _insert_row(cursor, id, date, incident_type, severity, status, created_at=None):
+    """
+    Routes one new incident to its year partition and records it in the partition map.
+    Raises sqlite3.IntegrityError if the id is already used in any partition.
+    """
+    if _find_partition(cursor, id) is not None:
+        raise sqlite3.IntegrityError("UNIQUE constraint failed: cyber_incidents.id")
+
+    year = Partitions.partition_year(date)
+    table = Partitions.create_partition(cursor.connection, year)
+
+    if created_at is None:
+        sql = "INSERT INTO {} (id, date, incident_type, severity, status) VALUES (?, ?, ?, ?, ?)".format(table)
+        values = (id, date, incident_type, severity, status)
+    else:
+        sql = "INSERT INTO {} (id, date, incident_type, severity, status, created_at) VALUES (?, ?, ?, ?, ?, ?)".format(table)
+        values = (id, date, incident_type, severity, status, created_at)
+    cursor.execute(sql, values)
+    cursor.execute("INSERT INTO {} (id, year) VALUES (?, ?)".format(Partitions.MAP_TABLE), (id, year))
 
 def insert_incident(id, date, incident_type, severity, status):
     """
-    Adds a new incident record to the database and returns the new ID.
+    Adds a new incident record to the partition for its year.
     """
     # 1. Connect to the DB
     db = connect_database()
     cursor = db.cursor()
 
-    # 2. Run the SQL Command
-    sql = """
-        INSERT INTO cyber_incidents 
-        (id, date, incident_type, severity, status)
-        VALUES (?, ?, ?, ?, ?)
+    # 2. Route the row to its partition
+    try:
+        _insert_row(cursor, id, date, incident_type, severity, status)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _update_row(cursor, id, date, incident_type, severity, status):
     """
-    values = (id, date, incident_type, severity, status)
-    
-    cursor.execute(sql, values)
-    db.commit()
-    db.close()
+    Updates one incident through the router, moving it if its year changes.
+    Returns True if the id existed, False otherwise.
+    """
+    # 1. Find the partition currently holding the incident
+    old_year = _find_partition(cursor, id)
+    if old_year is None:
+        return False
+    old_table = Partitions.partition_name(old_year)
+    new_year = Partitions.partition_year(date)
+
+    if new_year == old_year:
+        # 2a. Same year: update in place
+        sql = """
+            UPDATE {}
+            SET date = ?, incident_type = ?, severity = ?, status = ?
+            WHERE id = ?
+        """.format(old_table)
+        cursor.execute(sql, (date, incident_type, severity, status, id))
+        return cursor.rowcount > 0
 
+    # 2b. Different year: move the row, keeping its original created_at
+    cursor.execute("SELECT created_at FROM {} WHERE id = ?".format(old_table), (id,))
+    row = cursor.fetchone()
+    if row is None:
+        # Archived: the id is still mapped but the row has left the hot tables
+        return False
+    created_at = row[0]
+    cursor.execute("DELETE FROM {} WHERE id = ?".format(old_table), (id,))
+    cursor.execute("DELETE FROM {} WHERE id = ?".format(Partitions.MAP_TABLE), (id,))
+    _insert_row(cursor, id, date, incident_type, severity, status, created_at)
+    return True
 
 def update_incident(id, date, incident_type, severity, status):
     """
     Updates an existing incident record in the database.
+    If the new date falls in another year the row moves to that year's partition.
     Returns True if successful, False otherwise.
     """
     # 1. Connect to the DB
     db = connect_database()
     cursor = db.cursor()
 
-    # 2. Run the SQL Command
-    sql = """
-        UPDATE cyber_incidents
-        SET date = ?, incident_type = ?, severity = ?, status = ?
-        WHERE id = ?
+    try:
+        # 2. Route the update to the incident's partition
+        success = _update_row(cursor, id, date, incident_type, severity, status)
+        db.commit()
+
+        # 3. Check if any row was updated
+        return success
+    finally:
+        db.close()
+
+# Ids looked up per statement, well under SQLite's bound-parameter limit
+LOOKUP_BATCH = 500
+
+def _lookup(cursor, sql, ids) -> dict:
+    """Runs sql (with an {} for the id placeholders) over ids in batches; returns {id: value}."""
+    found = {}
+    for start in range(0, len(ids), LOOKUP_BATCH):
+        batch = ids[start:start + LOOKUP_BATCH]
+        cursor.execute(sql.format(", ".join("?" for _ in batch)), batch)
+        found.update(cursor.fetchall())
+    return found
+
+def upsert_incidents(cursor, records) -> int:
     """
-    values = (date, incident_type, severity, status, id)
-    
-    cursor.execute(sql, values)
-    db.commit()
+    Inserts or updates a batch of incident dicts through the partition router; the caller commits.
+    Rows are grouped by partition year and written with one executemany per partition.
+    Returns the number applied (archived ids are skipped).
+    """
+    # 1. The last record for each id wins, as with row-by-row upserts
+    latest = {record["id"]: record for record in records}
+    if not latest:
+        return 0
+    years = _lookup(cursor, "SELECT id, year FROM {} WHERE id IN ({{}})".format(Partitions.MAP_TABLE), list(latest))
 
-    # 3. Check if any row was updated
-    success = cursor.rowcount > 0
-    
-    db.close()
-    return success
+    # 2. Sort the records into in-place updates, moves between years and new rows
+    updates, moves, inserts = {}, {}, {}
+    for id, record in latest.items():
+        old_year, new_year = years.get(id), Partitions.partition_year(record["date"])
+        values = (record["date"], record["incident_type"], record["severity"], record["status"], id)
+        if old_year is None:
+            inserts.setdefault(new_year, []).append(values + (record.get("created_at"),))
+        elif old_year == new_year:
+            updates.setdefault(new_year, []).append(values)
+        else:
+            moves.setdefault(old_year, []).append((new_year, values))
+
+    applied = 0
+    # 3. Same year: update in place. Archived ids match no row and are skipped, since
+    #    archived rows are frozen and their ids stay reserved
+    for year, rows in updates.items():
+        cursor.executemany(
+            "UPDATE {} SET date = ?, incident_type = ?, severity = ?, status = ? WHERE id = ?".format(
+                Partitions.partition_name(year)
+            ),
+            rows
+        )
+        applied += max(cursor.rowcount, 0)
+
+    # 4. Year changed: move the row, keeping its original created_at
+    moved = {}
+    for old_year, rows in moves.items():
+        old_table = Partitions.partition_name(old_year)
+        created = _lookup(
+            cursor, "SELECT id, created_at FROM {} WHERE id IN ({{}})".format(old_table), [values[-1] for _, values in rows]
+        )
+        rows = [(new_year, values) for new_year, values in rows if values[-1] in created]
+        cursor.executemany("DELETE FROM {} WHERE id = ?".format(old_table), [(values[-1],) for _, values in rows])
+        for new_year, values in rows:
+            moved.setdefault(new_year, []).append(values + (created[values[-1]],))
+    for year, rows in moved.items():
+        cursor.executemany(
+            "UPDATE {} SET year = ? WHERE id = ?".format(Partitions.MAP_TABLE), [(year, values[4]) for values in rows]
+        )
+        _insert_partition_rows(cursor, year, rows, mapped=True)
+        applied += len(rows)
+
+    # 5. New ids
+    for year, rows in inserts.items():
+        _insert_partition_rows(cursor, year, rows)
+        applied += len(rows)
+    return applied
+
+def _insert_partition_rows(cursor, year, rows, mapped=False) -> None:
+    """
+    Inserts (date, incident_type, severity, status, id, created_at) rows into one year's
+    partition, creating it if needed, and records new ids in the partition map.
+    """
+    table = Partitions.create_partition(cursor.connection, year)
+    cursor.executemany(
+        "INSERT INTO {} (date, incident_type, severity, status, id, created_at) "
+        "VALUES (?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))".format(table),
+        rows
+    )
+    if not mapped:
+        cursor.executemany(
+            "INSERT INTO {} (id, year) VALUES (?, ?)".format(Partitions.MAP_TABLE), [(values[4], year) for values in rows]
+        )
 
 def delete_incident(incident_id):
     """
@@ -57,70 +204,101 @@ def delete_incident(incident_id):
     db = connect_database()
     cursor = db.cursor()
 
-    # 2. Run the SQL Command
-    sql = "DELETE FROM cyber_incidents WHERE id = ?"
-    cursor.execute(sql, (incident_id,))
-    db.commit()
+    try:
+        # 2. Only the partition holding the id is touched
+        year = _find_partition(cursor, incident_id)
+        if year is None:
+            return False
+        cursor.execute("DELETE FROM {} WHERE id = ?".format(Partitions.partition_name(year)), (incident_id,))
+        success = cursor.rowcount > 0
+        if success:
+            # An archived id keeps its map entry, so it is never reissued
+            cursor.execute("DELETE FROM {} WHERE id = ?".format(Partitions.MAP_TABLE), (incident_id,))
+        db.commit()
 
-    # 3. Check if any row was deleted
-    success = cursor.rowcount > 0
-    
-    db.close()
-    return success
+        # 3. Check if any row was deleted
+        return success
+    finally:
+        db.close()
 
-def get_groupby(column):
+def get_groupby(column, date_from=None, date_to=None, include_archived=False):
     """
     Retrieves distinct values for a specified column from the cyber_incidents table.
+    With a date range only the partitions for those years are read.
+    include_archived also counts rows moved to the archive table.
     """
-    # 1. Establish connection
-    db = connect_database()
+    # 1. Establish connection to the read-only analytics snapshot
+    db = connect_analytics()
     
-    # 2. Generate the full SQL command
-    sql_command = f"SELECT {column},COUNT(*) FROM cyber_incidents GROUP BY {column}"
+    # 2. Generate the full SQL command over the pruned partitions
+    source, params = Partitions.partition_source(db, date_from, date_to)
+    if include_archived:
+        source, params = Archive.with_archive(source, params, Partitions.VIEW_NAME, date_from, date_to)
+    sql_command = f"SELECT {column},COUNT(*) FROM {source} GROUP BY {column}"
     
     # 3. Execute query and load directly into a Pandas DataFrame
-    results_df = pd.read_sql_query(sql_command, db)
-    print(results_df)
+    results_df = pd.read_sql_query(sql_command, db, params=params)
+    logger.debug("query returned %d rows", len(results_df))
     
     # 4. Close connection and return data
     db.close()
     return results_df
 
 
-def get_all_incidents(filter_str,column):
+def get_all_incidents(filter_str,column, date_from=None, date_to=None, conn=None, include_archived=False):
     """
     Retrieves distinct values for a specified column from the cyber_incidents table.
+    With a date range only the partitions for those years are read.
+    include_archived also counts rows moved to the archive table.
+    Uses `conn` instead of its own connection when given (the data pool does).
     """
-    # 1. Establish connection
-    db = connect_database()
+    # 1. Establish connection to the read-only analytics snapshot
+    db = conn if conn is not None else connect_analytics()
     
-    # 2. Generate the full SQL command
-    sql_command = f"SELECT {column},COUNT(*) FROM cyber_incidents GROUP BY {column}"
+    # 2. Generate the full SQL command over the pruned partitions
+    source, params = Partitions.partition_source(db, date_from, date_to)
+    if include_archived:
+        source, params = Archive.with_archive(source, params, Partitions.VIEW_NAME, date_from, date_to)
+    sql_command = f"SELECT {column},COUNT(*) FROM {source} GROUP BY {column}"
     
     # 3. Execute query and load directly into a Pandas DataFrame
-    results_df = pd.read_sql_query(sql_command, db)
-    print(results_df)
+    results_df = pd.read_sql_query(sql_command, db, params=params)
+    logger.debug("query returned %d rows", len(results_df))
     
-    # 4. Close connection and return data
-    db.close()
+    # 4. Close our own connection and return data
+    if conn is None:
+        db.close()
     return results_df
 
-def get_dataframequery(filter_str):
+def iter_incidents(chunksize=None, include_archived=False):
     """
-    Returns the DataFrame
+    Yields every incident as typed DataFrame chunks (see app.data.frames),
+    optionally including the archived rows.
     """
     # 1. Establish connection
     db = connect_database()
-    
-    # 2. Generate the full SQL command using the helper function
-    sql_command = 'Select * from cyber_incidents'
-    
-    # 3. Execute query and load directly into a Pandas DataFrame
-    results_df = pd.read_sql_query(sql_command, db)
-    print(results_df)
-    
-    # 4. Close connection and return data
-    db.close()
+    try:
+        # 2. Generate the full SQL command
+        sql_command = 'Select * from cyber_incidents'
+        params = []
+        if include_archived:
+            archived, params = Archive.archive_select(Partitions.VIEW_NAME)
+            sql_command += " UNION ALL " + archived
+
+        # 3. Stream the result chunk by chunk
+        yield from Frames.read_chunks(db, sql_command, params, Frames.INCIDENT_DTYPES, Frames.INCIDENT_DATES, chunksize)
+    finally:
+        # 4. Close connection once the caller is done
+        db.close()
+
+def get_dataframequery(filter_str, include_archived=False):
+    """
+    Returns the DataFrame
+    include_archived appends the rows moved to the archive table.
+    Built from the typed chunks of iter_incidents, so enum columns are categorical.
+    """
+    results_df = Frames.concat_chunks(iter_incidents(include_archived=include_archived))
+    logger.debug("query returned %d rows", len(results_df))
     return results_df
    
 
@@ -136,17 +314,22 @@ def get_incidents_query(filter_str,column):
     # 2. Add the condition if it exists
     if filter_str:
         query += f" WHERE {filter_str}"
-    print('Filter string 1',filter_str)
+    logger.debug("filter string: %s", filter_str)
     
     return query
 
 def droptable():
     """
-    Drops the cyber_incidents table from the database.
+    Drops every cyber_incidents partition and empties the partition map.
+    An empty partition for the current year is recreated so the view stays valid.
     """
     conn = connect_database()
     cursor = conn.cursor()
-    cursor.execute("DROP TABLE cyber_incidents")
+    cursor.execute("DROP VIEW IF EXISTS {}".format(Partitions.VIEW_NAME))
+    for year in Partitions.list_partitions(conn):
+        cursor.execute("DROP TABLE {}".format(Partitions.partition_name(year)))
+    cursor.execute("DELETE FROM {}".format(Partitions.MAP_TABLE))
+    Partitions.create_partition(conn, Partitions.partition_year(None))
     conn.commit()
     conn.close()
 
@@ -169,23 +352,10 @@ def total_incidents(filter_str: str) -> int:
     return len(df_results)
 
 def transfer_csv():
-    import csv
-    from pathlib import Path
-    
-    conn = connect_database()
-    cursor = conn.cursor()
-    
-    with open(Path("DATA/cyber_incidents.csv")) as csv_file:
-        reader = csv.reader(csv_file)
-                   
-        next(reader)
-        
-        for row in reader:
-            cursor.execute("""
-                INSERT INTO cyber_incidents 
-                (id,date, incident_type, severity, status)
-                VALUES ( ?, ?, ?, ?, ?)
-            """, (row[0],row[1], row[2], row[3], row[4]))
-            
-    conn.commit()
-    conn.close()
\ No newline at end of file
+    """
+    Loads the whole incidents CSV feed into the database.
+    Rows go through the validation stage and are upserted, so running it twice is safe.
+    Returns the number of rows applied.
+    """
+    from app.data.sync import sync_feed
+    return sync_feed("incidents", full=True)
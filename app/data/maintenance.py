@@ -0,0 +1,192 @@
+import argparse
+import logging
+import os
+import sqlite3
+import threading
+import time
+from app.data.archive import incremental_vacuum
+from app.data.db import DB_PATH, connect_database
+
+logger = logging.getLogger(__name__)
+
+# Seconds between runs of each maintenance task
+INTERVALS = {
+    "checkpoint": float(os.environ.get("MAINTENANCE_CHECKPOINT_INTERVAL", "300")),
+    "optimize": float(os.environ.get("MAINTENANCE_OPTIMIZE_INTERVAL", "3600")),
+    "vacuum": float(os.environ.get("MAINTENANCE_VACUUM_INTERVAL", "3600")),
+    "analyze": float(os.environ.get("MAINTENANCE_ANALYZE_INTERVAL", "86400")),
+}
+# How often the scheduler wakes up to look for due tasks
+TICK_SECONDS = float(os.environ.get("MAINTENANCE_TICK", "15"))
+# The database counts as idle once nobody else has written to it for this long
+IDLE_SECONDS = float(os.environ.get("MAINTENANCE_IDLE_SECONDS", "10"))
+# Longest wait after repeated busy ticks
+MAX_BACKOFF_SECONDS = 600
+# Maintenance never waits for the write lock; a locked database means "busy, try later"
+BUSY_TIMEOUT_MS = 100
+
+_lock = threading.Lock()
+_scheduler = None
+_last_run = {}
+
+def _checkpoint(conn) -> dict:
+    """Copies the WAL back into the database and truncates it."""
+    # TRUNCATE reports the reset (empty) log, so the pages are counted by a PASSIVE pass first
+    busy, log_pages, checkpointed = conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+    if busy or conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()[0]:
+        raise sqlite3.OperationalError("database is locked")
+    return {"wal_pages_checkpointed": max(checkpointed, 0)}
+
+def _optimize(conn) -> dict:
+    """Lets SQLite refresh the statistics it thinks are stale."""
+    conn.execute("PRAGMA optimize").fetchall()
+    return {}
+
+def _analyze(conn) -> dict:
+    """Recomputes the planner statistics for every table and index."""
+    conn.execute("ANALYZE")
+    return {}
+
+def _vacuum(conn) -> dict:
+    """Returns free pages to the file system (needs auto_vacuum=INCREMENTAL)."""
+    incremental_vacuum(conn)
+    return {}
+
+def _free_pages(conn) -> int:
+    """Pages on the database's freelist."""
+    return conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+# Task name -> function(conn) returning any task-specific figures for the log
+TASKS = {
+    "checkpoint": _checkpoint,
+    "optimize": _optimize,
+    "vacuum": _vacuum,
+    "analyze": _analyze,
+}
+
+def run_task(name, db_path=DB_PATH) -> dict:
+    """
+    Runs one maintenance task and logs its duration, the pages it took off the freelist and
+    its own figures (e.g. wal_pages_checkpointed).
+    Raises sqlite3.OperationalError if the database is too busy.
+    """
+    conn = connect_database(db_path)
+    conn.isolation_level = None
+    try:
+        conn.execute("PRAGMA busy_timeout = {}".format(BUSY_TIMEOUT_MS))
+        started = time.perf_counter()
+        free_before = _free_pages(conn)
+        figures = TASKS[name](conn)
+        result = {
+            "task": name,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+            "pages_freed": max(free_before - _free_pages(conn), 0),
+        }
+        result.update(figures)
+    finally:
+        conn.close()
+
+    _last_run[name] = time.monotonic()
+    logger.info("maintenance task finished", extra={"fields": result})
+    return result
+
+def write_counter(conn) -> int:
+    """
+    SQLite's PRAGMA data_version for a connection the scheduler keeps open: it changes
+    whenever any other connection commits (or checkpoints), and never because of this one.
+    Unlike data_version() in app.data.db it doesn't depend on change_log or file stamps.
+    """
+    return conn.execute("PRAGMA data_version").fetchone()[0]
+
+def due_tasks(now=None) -> list:
+    """Tasks whose interval has elapsed since they last ran (never-run tasks are due)."""
+    now = time.monotonic() if now is None else now
+    return [name for name in TASKS if now - _last_run.get(name, float("-inf")) >= INTERVALS[name]]
+
+def run_due(db_path=DB_PATH) -> list:
+    """
+    Runs every due task, stopping at the first one the database is too busy for.
+    Returns the results of the tasks that ran.
+    """
+    results = []
+    for name in due_tasks():
+        results.append(run_task(name, db_path))
+    return results
+
+class MaintenanceScheduler:
+    """
+    The maintenance thread's decisions, one step() per tick: tasks run only once the write
+    counter has been still for IDLE_SECONDS, and while the database is busy the wait
+    doubles, up to MAX_BACKOFF_SECONDS.
+    """
+
+    def __init__(self, watcher, tick, db_path=DB_PATH, now=None):
+        self.watcher = watcher
+        self.tick = tick
+        self.db_path = db_path
+        self.version = write_counter(watcher)
+        self.changed_at = time.monotonic() if now is None else now
+        self.delay = tick
+
+    def step(self, now=None) -> float:
+        """Checks for activity, runs what is due if idle, and returns the seconds until the next step."""
+        now = time.monotonic() if now is None else now
+
+        # 1. Idle detection: has anyone else written since the last tick?
+        current = write_counter(self.watcher)
+        if current != self.version:
+            self.version, self.changed_at = current, now
+        if now - self.changed_at < IDLE_SECONDS:
+            self.delay = min(self.delay * 2, MAX_BACKOFF_SECONDS)
+            logger.debug("maintenance deferred, database busy", extra={"fields": {"retry_in_s": self.delay}})
+            return self.delay
+
+        # 2. Run what is due, backing off if the writers still hold the lock
+        try:
+            run_due(self.db_path)
+            self.delay = self.tick
+        except sqlite3.OperationalError:
+            self.delay = min(self.delay * 2, MAX_BACKOFF_SECONDS)
+            logger.info("maintenance deferred, database locked", extra={"fields": {"retry_in_s": self.delay}})
+        except sqlite3.Error:
+            logger.exception("maintenance task failed")
+
+        # 3. The tasks' own writes moved the counter (a checkpoint counts as a write);
+        #    don't count them as activity
+        self.version = write_counter(self.watcher)
+        return self.delay
+
+def start_maintenance(tick=None, db_path=DB_PATH) -> None:
+    """
+    Starts the maintenance thread (once per process), stepping a MaintenanceScheduler.
+    """
+    global _scheduler
+    tick = TICK_SECONDS if tick is None else tick
+
+    def loop():
+        scheduler = MaintenanceScheduler(connect_database(db_path), tick, db_path)
+        delay = tick
+        while True:
+            time.sleep(delay)
+            delay = scheduler.step()
+
+    with _lock:
+        if _scheduler is None or not _scheduler.is_alive():
+            _scheduler = threading.Thread(target=loop, name="db-maintenance", daemon=True)
+            _scheduler.start()
+
+def main(argv=None):
+    """
+    Command-line entry point, e.g.
+        python -m app.data.maintenance                      (run every task once)
+        python -m app.data.maintenance --task checkpoint
+    """
+    parser = argparse.ArgumentParser(description="Run SQLite maintenance on the platform database.")
+    parser.add_argument("--task", action="append", choices=sorted(TASKS), help="task to run (default: all)")
+    args = parser.parse_args(argv)
+
+    for name in args.task or TASKS:
+        print(run_task(name))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+from datetime import date as Date
+import app.data.changes as Changes
+
+# Incidents are stored in one table per year (cyber_incidents_2024, cyber_incidents_2025, ...).
+# cyber_incidents itself is a UNION ALL view over every partition so plain reads keep working,
+# and incident_partition_map records which partition holds each id.
+PARTITION_PREFIX = "cyber_incidents_"
+VIEW_NAME = "cyber_incidents"
+MAP_TABLE = "incident_partition_map"
+
+# Indexes created on every partition, as (suffix, column list)
+PARTITION_INDEXES = [
+    ("date", "date"),
+    # Composite indexes cover the common crosstabs, so pivot() never reads the table itself
+    ("severity_status", "severity, status"),
+    ("type_severity", "incident_type, severity"),
+]
+
+def partition_year(date_value) -> int:
+    """
+    Returns the partition year for an incident date.
+    Accepts ISO dates (2025-01-24) and the CSV feed's dd/mm/yyyy format.
+    Missing or unreadable dates go to the current year's partition.
+    """
+    text = str(date_value or "").strip()
+    if len(text) >= 4 and text[:4].isdigit() and (len(text) == 4 or text[4] == "-"):
+        return int(text[:4])
+    if len(text) >= 4 and text[-4:].isdigit() and "/" in text:
+        return int(text[-4:])
+    return Date.today().year
+
+def partition_name(year) -> str:
+    """Table name of the partition holding the given year."""
+    return "{}{:04d}".format(PARTITION_PREFIX, int(year))
+
+def list_partitions(conn) -> list:
+    """
+    Returns the years that currently have a partition table, oldest first.
+    """
+    rows = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name GLOB ?",
+        (PARTITION_PREFIX + "[0-9][0-9][0-9][0-9]",)
+    ).fetchall()
+    return sorted(int(name[len(PARTITION_PREFIX):]) for (name,) in rows)
+
+def rebuild_view(conn) -> None:
+    """
+    Recreates the cyber_incidents view as a UNION ALL over every partition.
+    """
+    selects = ["SELECT * FROM {}".format(partition_name(year)) for year in list_partitions(conn)]
+    conn.execute("DROP VIEW IF EXISTS {}".format(VIEW_NAME))
+    conn.execute("CREATE VIEW {} AS {}".format(VIEW_NAME, " UNION ALL ".join(selects)))
+
+def create_partition_indexes(conn, table) -> None:
+    """Creates every index in PARTITION_INDEXES on a partition table (existing ones are kept)."""
+    for suffix, columns in PARTITION_INDEXES:
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_{0}_{1} ON {0} ({2})".format(table, suffix, columns))
+
+def create_partition(conn, year) -> str:
+    """
+    Creates the partition table (and its indexes) for a year if it doesn't exist yet.
+    The view is rebuilt whenever a new partition appears.
+    Returns the partition's table name.
+    """
+    table = partition_name(year)
+    if int(year) in list_partitions(conn):
+        return table
+
+    # 1. Same columns as the original Cyber_Incidents table
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS {} (
+            id  INTEGER PRIMARY KEY ,
+            date date,
+            incident_type TEXT,
+            severity TEXT,
+            status TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """.format(table))
+
+    # 2. Per-partition indexes
+    create_partition_indexes(conn, table)
+
+    # 3. Change capture, once the change_log table exists
+    if Changes.change_log_exists(conn):
+        Changes.create_change_triggers(conn, table, VIEW_NAME)
+
+    # 4. Make the new partition visible through the view
+    rebuild_view(conn)
+    return table
+
+def create_partition_map(conn) -> None:
+    """Create the id -> partition year directory table."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS {} (
+            id INTEGER PRIMARY KEY,
+            year INTEGER NOT NULL
+        )
+    """.format(MAP_TABLE))
+
+def partitions_for_range(conn, date_from=None, date_to=None) -> list:
+    """
+    Returns the partition years that can contain dates between date_from and date_to
+    (ISO strings, both optional and inclusive). Every other partition is pruned.
+    """
+    years = list_partitions(conn)
+    if date_from:
+        years = [year for year in years if year >= partition_year(date_from)]
+    if date_to:
+        years = [year for year in years if year <= partition_year(date_to)]
+    return years
+
+def partition_source(conn, date_from=None, date_to=None):
+    """
+    FROM source for an incidents read over a date range: a subquery over only the overlapping
+    partitions, each filtered on date. Returns (sql, params).
+    """
+    years = partitions_for_range(conn, date_from, date_to)
+    if not years:
+        # Empty result with the right columns
+        return "(SELECT * FROM {} WHERE 0)".format(VIEW_NAME), []
+
+    conditions = []
+    condition_params = []
+    if date_from:
+        conditions.append("date >= ?")
+        condition_params.append(str(date_from))
+    if date_to:
+        conditions.append("date <= ?")
+        condition_params.append(str(date_to))
+    where = " WHERE " + " AND ".join(conditions) if conditions else ""
+
+    selects = []
+    params = []
+    for year in years:
+        selects.append("SELECT * FROM {}{}".format(partition_name(year), where))
+        params.extend(condition_params)
+    return "(" + " UNION ALL ".join(selects) + ")", params
+
+def partition_existing_incidents(conn) -> None:
+    """
+    Migration: moves the rows of the single cyber_incidents table into per-year partitions,
+    fills incident_partition_map and replaces the table with the view.
+    """
+    create_partition_map(conn)
+    conn.create_function("partition_year", 1, partition_year)
+
+    kind = conn.execute(
+        "SELECT type FROM sqlite_master WHERE name = ? COLLATE NOCASE", (VIEW_NAME,)
+    ).fetchone()
+
+    if kind and kind[0] == "table":
+        # 1. Move the old table out of the way so the view can take its name
+        conn.execute("ALTER TABLE {} RENAME TO cyber_incidents_unpartitioned".format(VIEW_NAME))
+
+        # 2. Copy each year's rows into its partition
+        years = conn.execute(
+            "SELECT DISTINCT partition_year(date) FROM cyber_incidents_unpartitioned"
+        ).fetchall()
+        for (year,) in years:
+            table = create_partition(conn, year)
+            conn.execute(
+                "INSERT INTO {} SELECT * FROM cyber_incidents_unpartitioned WHERE partition_year(date) = ?".format(table),
+                (year,)
+            )
+
+        # 3. Record where every id went, then drop the old table
+        conn.execute(
+            "INSERT OR REPLACE INTO {} (id, year) SELECT id, partition_year(date) FROM cyber_incidents_unpartitioned".format(MAP_TABLE)
+        )
+        conn.execute("DROP TABLE cyber_incidents_unpartitioned")
+
+    # 4. Always have a partition for the current year, which also (re)builds the view
+    create_partition(conn, Date.today().year)
+    rebuild_view(conn)
@@ -0,0 +1,81 @@
+import pandas as pd
+import app.data.partitions as Partitions
+from app.data.aggregate import TABLES, dimension_sql
+from app.data.db import build_where
+from app.data.snapshot import connect_analytics
+from app.data.validation import RULES
+
+# Enum columns get every category as a row/column even when its count is zero,
+# so heatmaps keep the same shape across filters.
+CATEGORIES = {
+    "cyber_incidents": RULES["incidents"]["enums"],
+    "IT_Tickets": RULES["tickets"]["enums"],
+}
+
+def pivot_query(conn, table, row_col, col_col, filters=None, date_from=None, date_to=None):
+    """
+    Builds the crosstab (sql, params). Incident partitions are each grouped on their own and the
+    counts summed, in one statement.
+    """
+    columns, date_column = TABLES[table]
+    row_sql, col_sql = dimension_sql(table, [row_col, col_col])
+
+    # 1. Filters applied inside every source
+    clause, filter_params = build_where(filters, columns)
+    conditions = [clause[len(" WHERE "):]] if clause else []
+    if date_from:
+        conditions.append("{} >= ?".format(date_column))
+        filter_params.append(str(date_from))
+    if date_to:
+        conditions.append("{} <= ?".format(date_column))
+        filter_params.append(str(date_to))
+    where = " WHERE " + " AND ".join(conditions) if conditions else ""
+
+    # 2. One GROUP BY per source table
+    if table == Partitions.VIEW_NAME:
+        sources = [Partitions.partition_name(year) for year in Partitions.partitions_for_range(conn, date_from, date_to)]
+    else:
+        sources = [table]
+    if not sources:
+        return "SELECT NULL, NULL, 0 WHERE 0", []
+
+    selects = []
+    params = []
+    for source in sources:
+        selects.append("SELECT {0} AS row_value, {1} AS col_value, COUNT(*) AS n FROM {2}{3} GROUP BY {0}, {1}".format(
+            row_sql, col_sql, source, where
+        ))
+        params.extend(filter_params)
+    if len(selects) == 1:
+        return selects[0], params
+
+    # 3. Sum the per-partition counts
+    sql = "SELECT row_value, col_value, SUM(n) FROM ({}) GROUP BY row_value, col_value".format(" UNION ALL ".join(selects))
+    return sql, params
+
+def pivot(table, row_col, col_col, filters=None, date_from=None, date_to=None, conn=None):
+    """
+    Counts rows of cyber_incidents or IT_Tickets by two columns, e.g.
+    pivot("cyber_incidents", "severity", "status"), with optional filters and date bounds.
+    Returns a dense DataFrame: index = row_col values, columns = col_col values, zeros filled.
+    """
+    # 1. Establish connection to the read-only analytics snapshot
+    db = conn if conn is not None else connect_analytics()
+    try:
+        sql, params = pivot_query(db, table, row_col, col_col, filters, date_from, date_to)
+        rows = db.execute(sql, params).fetchall()
+    finally:
+        if conn is None:
+            db.close()
+
+    # 2. Spread the long result into a matrix
+    counts = pd.DataFrame(rows, columns=[row_col, col_col, "count"])
+    matrix = counts.pivot_table(index=row_col, columns=col_col, values="count", aggfunc="sum", fill_value=0)
+
+    # 3. Keep every known category, in its canonical order
+    categories = CATEGORIES[table]
+    if row_col in categories:
+        matrix = matrix.reindex(index=list(categories[row_col]), fill_value=0)
+    if col_col in categories:
+        matrix = matrix.reindex(columns=list(categories[col_col]), fill_value=0)
+    return matrix.astype("int64")
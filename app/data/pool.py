@@ -0,0 +1,61 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import app.data.snapshot as Snapshot
+from app.data.db import connect_readonly
+
+# Shared pool for dashboard reads. sqlite3 releases the GIL while a query runs, so the
+# bar, pie and time-series queries of one rerun can execute at the same time.
+POOL_WORKERS = int(os.environ.get("DATA_POOL_WORKERS", "4"))
+
+_executor = None
+_executor_lock = threading.Lock()
+_local = threading.local()
+
+def _snapshot_identity():
+    """Inode and modification stamp of the snapshot file; both change when it is replaced."""
+    stat = os.stat(Snapshot.SNAPSHOT_PATH)
+    return stat.st_ino, stat.st_mtime_ns
+
+def worker_connection():
+    """
+    This worker thread's connection to the analytics snapshot, kept open between tasks and
+    reopened once a refreshed snapshot has been swapped in.
+    """
+    Snapshot.ensure_fresh()
+    identity = _snapshot_identity()
+
+    conn = getattr(_local, "conn", None)
+    if conn is not None and _local.identity != identity:
+        conn.close()
+        conn = None
+    if conn is None:
+        conn = connect_readonly(Snapshot.SNAPSHOT_PATH)
+        _local.conn = conn
+        _local.identity = identity
+    return conn
+
+def _executor_instance():
+    """Creates the shared executor on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=POOL_WORKERS, thread_name_prefix="data-pool")
+        return _executor
+
+def _run(fn, args, kwargs):
+    """Runs fn on the calling worker thread with that worker's connection."""
+    return fn(*args, conn=worker_connection(), **kwargs)
+
+def submit(fn, *args, **kwargs):
+    """
+    Schedules fn(*args, conn=<worker connection>, **kwargs) on the shared pool and returns its Future.
+    """
+    return _executor_instance().submit(_run, fn, args, kwargs)
+
+def gather(futures) -> dict:
+    """
+    Waits for a dict of named futures and returns {name: result}.
+    The wait takes as long as the slowest query; the first failure is re-raised.
+    """
+    return {name: future.result() for name, future in futures.items()}
@@ -0,0 +1,125 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+# Set QUERY_PLAN_DEBUG=1 to EXPLAIN every distinct statement the data layer runs.
+QUERY_PLAN_DEBUG = os.environ.get("QUERY_PLAN_DEBUG", "") == "1"
+REPORT_PATH = Path("DATA") / "query_plans.json"
+
+# Statements worth explaining; DDL, PRAGMAs and transaction control are skipped
+_EXPLAINABLE = re.compile(r"^\s*(WITH|SELECT|INSERT|UPDATE|DELETE|REPLACE)\b", re.IGNORECASE)
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+_CATALOG_TABLE = re.compile(r"\bsqlite_(master|schema|sequence|stat\d)\b")
+
+_report = {}
+_lock = threading.Lock()
+
+def normalize(sql: str) -> str:
+    """
+    Collapses a traced statement to its shape: literals become ? and whitespace is squeezed,
+    so the same query with different parameters is reported once.
+    """
+    shape = _STRING_LITERAL.sub("?", sql)
+    shape = _NUMBER_LITERAL.sub("?", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+def analyse_plan(details) -> list:
+    """
+    Flags full table scans, temporary B-trees and non-covering index searches in
+    EXPLAIN QUERY PLAN rows. Returns a list of flag strings, empty when the plan looks fine.
+    """
+    flags = []
+    for detail in details:
+        # SQLite's own catalog tables are tiny and always scanned
+        if _CATALOG_TABLE.search(detail):
+            continue
+        if detail.startswith("SCAN ") and not detail.startswith(("SCAN (", "SCAN CONSTANT ROW")):
+            if "COVERING INDEX" in detail:
+                flags.append("full covering-index scan: " + detail)
+            else:
+                flags.append("full scan: " + detail)
+        if "USE TEMP B-TREE" in detail:
+            flags.append("temp b-tree: " + detail)
+        if detail.startswith("SEARCH ") and "USING INDEX" in detail:
+            flags.append("index not covering: " + detail)
+    return flags
+
+def explain(db_path, sql):
+    """
+    Runs EXPLAIN QUERY PLAN for a statement on a separate read-only connection.
+    Returns the plan's detail lines, or an error marker if it can't be explained.
+    """
+    uri = "file:{}?mode=ro".format(Path(db_path).resolve().as_posix())
+    conn = sqlite3.connect(uri, uri=True)
+    try:
+        return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql)]
+    except sqlite3.Error as error:
+        return ["<not explained: {}>".format(error)]
+    finally:
+        conn.close()
+
+def record(db_path, sql) -> None:
+    """
+    Trace callback: explains a statement the first time its shape is seen and counts repeats.
+    """
+    if not _EXPLAINABLE.match(sql):
+        return
+    key = normalize(sql)
+
+    with _lock:
+        entry = _report.get(key)
+        if entry:
+            entry["count"] += 1
+            entry["last_seen"] = time.strftime("%Y-%m-%d %H:%M:%S")
+            return
+
+    details = explain(db_path, sql)
+    with _lock:
+        _report[key] = {
+            "statement": key,
+            "example": sql,
+            "plan": details,
+            "flags": analyse_plan(details),
+            "count": 1,
+            "first_seen": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "last_seen": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+    write_report()
+
+def attach(conn, db_path) -> None:
+    """Installs the trace callback on a data-layer connection."""
+    conn.set_trace_callback(lambda sql: record(db_path, sql))
+
+def report(flagged_only=False) -> list:
+    """
+    Returns the collected entries, flagged ones first, most frequent first.
+    """
+    with _lock:
+        entries = [dict(entry) for entry in _report.values()]
+    if flagged_only:
+        entries = [entry for entry in entries if entry["flags"]]
+    return sorted(entries, key=lambda entry: (not entry["flags"], -entry["count"]))
+
+def write_report(path=REPORT_PATH) -> None:
+    """Writes the report to DATA/query_plans.json."""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as handle:
+        json.dump(report(), handle, indent=2)
+
+def load_report(path=REPORT_PATH) -> list:
+    """Reads a report written by this or another process (empty if none exists)."""
+    if not Path(path).is_file():
+        return []
+    with open(path) as handle:
+        return json.load(handle)
+
+def reset() -> None:
+    """Forgets every collected statement."""
+    with _lock:
+        _report.clear()
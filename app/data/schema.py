@@ -1,3 +1,10 @@
+import threading
+from app.data.db import connect_database
+from app.data.partitions import partition_existing_incidents, create_partition_indexes, list_partitions, partition_name
+from app.data.changes import install_change_capture, change_log_exists, create_change_triggers, drop_change_triggers
+from app.data.sessions import create_sessions_table
+from app.data.archive import create_archive_tables
+
 def create_users_table(conn):
     """Create users table."""
     cursor = conn.cursor()
@@ -55,14 +62,132 @@ def create_it_tickets_table(conn):
     """)
     conn.commit()
 
-def create_all_tables()->None:
-    """Create all necessary tables."""
-    import sqlite3
-    from pathlib import Path
-
-    conn = sqlite3.connect(Path("DATA") / "intelligence_platform.db")
-    
+def create_base_tables(conn) -> None:
+    """Migration 1: the original users, incidents, datasets and tickets tables."""
     create_users_table(conn)
     create_cyber_incidents_table(conn)
     create_datasets_metadata_table(conn)
-    create_it_tickets_table(conn)
\ No newline at end of file
+    create_it_tickets_table(conn)
+
+def create_all_tables()->None:
+    """Create all necessary tables."""
+    conn = connect_database()
+    try:
+        create_base_tables(conn)
+    finally:
+        conn.close()
+
+def enable_wal(conn) -> None:
+    """Migration 3: switch to write-ahead logging so readers and the writer don't block each other."""
+    conn.execute("PRAGMA journal_mode=WAL")
+
+def create_feed_checkpoints_table(conn) -> None:
+    """Migration 4: per-feed read position for the incremental CSV sync."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS feed_checkpoints (
+            feed TEXT PRIMARY KEY,
+            path TEXT NOT NULL,
+            offset INTEGER NOT NULL,
+            inode INTEGER,
+            header TEXT,
+            head_hash TEXT,
+            tail_hash TEXT,
+            synced_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+# Composite indexes on IT_Tickets for the pivot crosstabs, as (suffix, column list)
+TICKET_INDEXES = [
+    ("priority_status", "priority, status"),
+    ("subject_priority", "subject, priority"),
+]
+
+def create_pivot_indexes(conn) -> None:
+    """
+    Migration 7: composite indexes behind the two-column pivots.
+    Existing incident partitions get the new PARTITION_INDEXES entries; later partitions
+    get them when they are created.
+    """
+    for year in list_partitions(conn):
+        create_partition_indexes(conn, partition_name(year))
+    for suffix, columns in TICKET_INDEXES:
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_it_tickets_{} ON IT_Tickets ({})".format(suffix, columns))
+
+# Work queue order of a ticket. The same expression is used by idx_it_tickets_queue and by
+# the queue queries in app.data.tickets, so SQLite can walk the index in order.
+PRIORITY_RANK_SQL = "CASE priority WHEN 'Critical' THEN 0 WHEN 'High' THEN 1 WHEN 'Medium' THEN 2 ELSE 3 END"
+
+def create_ticket_queue(conn) -> None:
+    """
+    Migration 8: adds the assigned_to column and the queue indexes to IT_Tickets,
+    and recreates its change triggers so assignments are captured too.
+    """
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(IT_Tickets)")]
+    if "assigned_to" not in columns:
+        conn.execute("ALTER TABLE IT_Tickets ADD COLUMN assigned_to TEXT")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_it_tickets_queue ON IT_Tickets (status, {}, created_date)".format(PRIORITY_RANK_SQL)
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_it_tickets_assigned_to ON IT_Tickets (assigned_to)")
+
+    if change_log_exists(conn):
+        drop_change_triggers(conn, "IT_Tickets")
+        create_change_triggers(conn, "IT_Tickets", "IT_Tickets")
+
+# Covering index for the aging metrics in app.data.aging: open statuses are a range of the
+# index and priority and the dates are read from its entries, so the query never touches
+# table rows.
+AGING_INDEX = "CREATE INDEX IF NOT EXISTS idx_it_tickets_aging ON IT_Tickets (status, priority, created_date, created_at)"
+
+def create_aging_index(conn) -> None:
+    """
+    Migration 10: adds the covering index behind the ticket aging metrics.
+    """
+    conn.execute(AGING_INDEX)
+
+# Ordered schema migrations. PRAGMA user_version records how many have been applied,
+# so new steps are appended here and never reordered.
+MIGRATIONS = [
+    create_base_tables,
+    partition_existing_incidents,
+    enable_wal,
+    create_feed_checkpoints_table,
+    install_change_capture,
+    create_sessions_table,
+    create_pivot_indexes,
+    create_ticket_queue,
+    create_archive_tables,
+    create_aging_index,
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+_bootstrapped = False
+_bootstrap_lock = threading.Lock()
+
+def ensure_schema() -> None:
+    """
+    Runs any migrations the database hasn't had yet.
+    Only the first call in a process does any work.
+    """
+    global _bootstrapped
+    if _bootstrapped:
+        return
+
+    with _bootstrap_lock:
+        if _bootstrapped:
+            return
+
+        conn = connect_database()
+        try:
+            # 1. Find out how far this database file has been migrated
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+
+            # 2. Apply the missing steps in order, recording each one
+            for number in range(version, SCHEMA_VERSION):
+                MIGRATIONS[number](conn)
+                conn.execute("PRAGMA user_version = {}".format(number + 1))
+                conn.commit()
+        finally:
+            conn.close()
+
+        _bootstrapped = True
\ No newline at end of file
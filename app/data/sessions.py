@@ -0,0 +1,52 @@
+from app.data.db import connect_database
+
+def create_sessions_table(conn):
+    """Create sessions table and its expiry index."""
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS sessions (
+            session_id TEXT PRIMARY KEY,
+            username TEXT NOT NULL,
+            expires_at INTEGER NOT NULL,
+            revoked INTEGER NOT NULL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON sessions (expires_at)")
+    conn.commit()
+
+def insert_session(session_id, username, expires_at):
+    """Insert new session."""
+    conn = connect_database()
+    conn.execute(
+        "INSERT INTO sessions (session_id, username, expires_at) VALUES (?, ?, ?)",
+        (session_id, username, expires_at)
+    )
+    conn.commit()
+    conn.close()
+
+def get_session(session_id):
+    """Retrieve (username, expires_at, revoked) for a session, or None."""
+    conn = connect_database()
+    row = conn.execute(
+        "SELECT username, expires_at, revoked FROM sessions WHERE session_id = ?",
+        (session_id,)
+    ).fetchone()
+    conn.close()
+    return row
+
+def revoke_session(session_id):
+    """Mark a session as revoked. Returns True if it existed."""
+    conn = connect_database()
+    cursor = conn.execute("UPDATE sessions SET revoked = 1 WHERE session_id = ?", (session_id,))
+    conn.commit()
+    conn.close()
+    return cursor.rowcount > 0
+
+def purge_expired_sessions(now):
+    """Delete sessions that expired before `now` (epoch seconds). Returns rows removed."""
+    conn = connect_database()
+    cursor = conn.execute("DELETE FROM sessions WHERE expires_at < ?", (now,))
+    conn.commit()
+    conn.close()
+    return cursor.rowcount
@@ -0,0 +1,113 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from app.data.db import DB_PATH, connect_database, connect_readonly, data_version
+
+logger = logging.getLogger(__name__)
+
+# Read-only replica of the primary database used by the analytics tabs.
+# Writes always go to DB_PATH; dashboards may read data up to MAX_STALENESS_SECONDS old.
+SNAPSHOT_PATH = Path("DATA") / "intelligence_platform.snapshot.db"
+MAX_STALENESS_SECONDS = float(os.environ.get("SNAPSHOT_MAX_STALENESS", "30"))
+
+_lock = threading.RLock()
+_last_checked = 0.0
+_copied_version = None
+_refresher = None
+
+def refresh_snapshot(db_path=DB_PATH, snapshot_path=SNAPSHOT_PATH) -> None:
+    """
+    Copies the primary database to the snapshot with the backup API, via a temporary file
+    swapped in with os.replace, so open readers keep their old copy.
+    """
+    global _copied_version, _last_checked
+    snapshot_path = Path(snapshot_path)
+    temp_path = snapshot_path.with_name(snapshot_path.name + ".tmp")
+
+    with _lock:
+        version = data_version(db_path)
+
+        # 1. Copy the whole database in one step. In WAL mode this is a single read
+        #    transaction, so writers on the primary are not blocked while it runs.
+        source = connect_database(db_path)
+        target = sqlite3.connect(str(temp_path))
+        try:
+            source.backup(target)
+            # The replica is never written, so it doesn't need the primary's WAL
+            target.execute("PRAGMA journal_mode=DELETE")
+        finally:
+            target.close()
+            source.close()
+
+        # 2. Publish the new snapshot atomically
+        os.replace(temp_path, snapshot_path)
+        _copied_version = version
+        _last_checked = time.monotonic()
+
+def ensure_fresh(max_staleness=None, db_path=DB_PATH, snapshot_path=SNAPSHOT_PATH) -> None:
+    """
+    Refreshes the snapshot if it is older than max_staleness seconds and the primary
+    has changed since it was taken. Cheap to call on every rerun.
+    """
+    global _last_checked
+    if max_staleness is None:
+        max_staleness = MAX_STALENESS_SECONDS
+
+    def within_bound():
+        return Path(snapshot_path).exists() and time.monotonic() - _last_checked < max_staleness
+
+    # 1. Still within the staleness bound: nothing to do
+    if within_bound():
+        return
+
+    with _lock:
+        # 2. Another session may have refreshed while we waited for the lock
+        if within_bound():
+            return
+
+        # 3. Bound exceeded but the primary hasn't been written to: the snapshot is still exact
+        if Path(snapshot_path).exists() and data_version(db_path) == _copied_version:
+            _last_checked = time.monotonic()
+            return
+
+        refresh_snapshot(db_path, snapshot_path)
+
+def connect_analytics(max_staleness=None):
+    """
+    Returns a read-only connection to the analytics snapshot, refreshing it first if needed.
+    """
+    ensure_fresh(max_staleness)
+    return connect_readonly(SNAPSHOT_PATH)
+
+def analytics_version(max_staleness=None):
+    """
+    Data version of the snapshot the analytics tabs read from.
+    Used as the figure cache key so cached charts always match the snapshot they came from.
+    """
+    ensure_fresh(max_staleness)
+    return data_version(SNAPSHOT_PATH)
+
+def start_refresher(interval=None) -> None:
+    """
+    Starts a daemon thread that keeps the snapshot within the staleness bound even when
+    nobody is viewing the dashboards. Only one refresher runs per process.
+    """
+    global _refresher
+    if interval is None:
+        interval = MAX_STALENESS_SECONDS
+
+    def loop():
+        while True:
+            try:
+                ensure_fresh(interval)
+            except sqlite3.Error:
+                logger.exception("snapshot refresh failed")
+            time.sleep(interval)
+
+    with _lock:
+        if _refresher is None or not _refresher.is_alive():
+            _refresher = threading.Thread(target=loop, name="snapshot-refresher", daemon=True)
+            _refresher.start()
@@ -0,0 +1,213 @@
+import argparse
+import csv
+import hashlib
+import logging
+import os
+import time
+from pathlib import Path
+import pandas as pd
+from app.data.db import connect_database
+from app.data.schema import ensure_schema
+import app.data.incidents as Incidents
+import app.data.tickets as Tickets
+import app.data.validation as Validation
+
+logger = logging.getLogger(__name__)
+
+# Feeds appended to by upstream systems, and the function that applies their rows
+FEEDS = {
+    "incidents": {"path": Path("DATA") / "cyber_incidents.csv", "apply": Incidents.upsert_incidents},
+    "tickets": {"path": Path("DATA") / "it_tickets.csv", "apply": Tickets.upsert_tickets},
+}
+
+# Bytes hashed at the start of the file and just before the checkpoint to detect rewrites
+HASH_WINDOW = 4096
+# Rows validated and applied per batch
+SYNC_BATCH_ROWS = 50000
+
+def _hash_range(handle, start, stop) -> str:
+    """Hash of the bytes in [start, stop) of an open binary file."""
+    handle.seek(start)
+    return hashlib.blake2b(handle.read(max(0, stop - start)), digest_size=16).hexdigest()
+
+def load_checkpoint(cursor, feed):
+    """
+    Returns the stored checkpoint for a feed as a dict, or None if it has never been synced.
+    """
+    cursor.execute(
+        "SELECT offset, inode, header, head_hash, tail_hash FROM feed_checkpoints WHERE feed = ?",
+        (feed,)
+    )
+    row = cursor.fetchone()
+    if not row:
+        return None
+    return {"offset": row[0], "inode": row[1], "header": row[2], "head_hash": row[3], "tail_hash": row[4]}
+
+def resume_offset(handle, stat, checkpoint) -> int:
+    """
+    Returns the offset to resume reading from: the checkpoint's, if the file is the same inode,
+    hasn't shrunk and still hashes the same at its start and before the offset; otherwise 0.
+    """
+    if checkpoint is None:
+        return 0
+
+    offset = checkpoint["offset"]
+    if checkpoint["inode"] != stat.st_ino or stat.st_size < offset:
+        return 0
+    if _hash_range(handle, 0, min(offset, HASH_WINDOW)) != checkpoint["head_hash"]:
+        return 0
+    if _hash_range(handle, max(0, offset - HASH_WINDOW), offset) != checkpoint["tail_hash"]:
+        return 0
+    return offset
+
+def read_lines(handle, offset, progress):
+    """
+    Yields the complete lines of a binary file from offset on; a partly written last line is left
+    for the next run. progress["end"] is kept just past the last line yielded.
+    """
+    handle.seek(offset)
+    progress["end"] = offset
+    for raw in handle:
+        if not raw.endswith(b"\n"):
+            break
+        line = raw.decode("utf-8").rstrip("\r\n")
+        if progress["end"] == 0:
+            line = line.lstrip("\ufeff")
+        progress["end"] += len(raw)
+        yield line
+
+def parse_rows(lines):
+    """
+    Turns complete CSV lines into lists of field values.
+    """
+    for row in csv.reader(lines):
+        if row:
+            yield row
+
+def apply_batch(cursor, feed, header, batch) -> int:
+    """
+    Validates one batch of raw rows, records the rejects and upserts the rest.
+    """
+    # 1. Rows with the wrong number of fields can't be lined up with the header
+    width = len(header)
+    malformed = [row for row in batch if len(row) != width]
+    if malformed:
+        batch = [row for row in batch if len(row) == width]
+        padded = [(row + [""] * width)[:width] for row in malformed]
+        malformed = pd.DataFrame(padded, columns=header, dtype=object)
+        malformed["reason"] = "expected {} fields".format(width)
+
+    # 2. Column-wise validation of the rest
+    frame = pd.DataFrame(batch, columns=header, dtype=object)
+    valid, rejected = Validation.validate_chunk(feed, frame)
+    if len(malformed):
+        rejected = pd.concat([rejected, malformed], ignore_index=True)
+    Validation.write_rejects(feed, rejected)
+    return FEEDS[feed]["apply"](cursor, valid)
+
+def apply_rows(cursor, feed, header, rows) -> int:
+    """
+    Applies parsed rows in batches of SYNC_BATCH_ROWS through the validation stage.
+    """
+    applied = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= SYNC_BATCH_ROWS:
+            applied += apply_batch(cursor, feed, header, batch)
+            batch = []
+    if batch:
+        applied += apply_batch(cursor, feed, header, batch)
+    return applied
+
+def sync_feed(feed, full=False):
+    """
+    Applies the rows appended to a feed file since the last sync, in batches, and saves the new
+    checkpoint in the same transaction. full=True re-reads the whole file.
+    Returns the number of rows applied, or None if the feed file is missing.
+    """
+    spec = FEEDS[feed]
+    path = Path(spec["path"])
+    if not path.is_file():
+        logger.warning("feed file %s not found", path)
+        return None
+
+    conn = connect_database()
+    cursor = conn.cursor()
+    try:
+        with open(path, "rb") as handle:
+            stat = os.fstat(handle.fileno())
+            checkpoint = load_checkpoint(cursor, feed)
+
+            # 1. Work out where to resume, falling back to a full re-read
+            offset = 0 if full else resume_offset(handle, stat, checkpoint)
+            header = checkpoint["header"].split(",") if offset and checkpoint else None
+
+            # 2. Read only the new lines, a batch at a time
+            progress = {}
+            lines = read_lines(handle, offset, progress)
+            if header is None:
+                first = next(lines, None)
+                if first is None:
+                    return 0
+                header = next(csv.reader([first]))
+
+            # 3. Apply the rows
+            applied = apply_rows(cursor, feed, header, parse_rows(lines))
+            new_offset = progress["end"]
+            if new_offset == offset:
+                return 0
+
+            # 4. Save the checkpoint in the same transaction as the rows
+            cursor.execute("""
+                INSERT OR REPLACE INTO feed_checkpoints
+                (feed, path, offset, inode, header, head_hash, tail_hash, synced_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            """, (
+                feed, str(path), new_offset, stat.st_ino, ",".join(header),
+                _hash_range(handle, 0, min(new_offset, HASH_WINDOW)),
+                _hash_range(handle, max(0, new_offset - HASH_WINDOW), new_offset),
+            ))
+            conn.commit()
+            return applied
+    finally:
+        conn.close()
+
+def sync_all(feeds=None) -> dict:
+    """
+    Runs one sync pass over the given feeds (default: all) and returns rows applied per feed
+    (None for a feed whose file is missing).
+    """
+    results = {}
+    for feed in feeds or FEEDS:
+        results[feed] = sync_feed(feed)
+    return results
+
+def run(interval=None, feeds=None) -> None:
+    """
+    Runs a single sync pass, or keeps syncing every `interval` seconds when one is given.
+    """
+    while True:
+        started = time.monotonic()
+        results = sync_all(feeds)
+        print("Synced {} in {:.3f}s".format(results, time.monotonic() - started))
+        if interval is None:
+            return
+        time.sleep(interval)
+
+def main(argv=None):
+    """
+    Command-line entry point, e.g.
+        python -m app.data.sync               (one pass, for cron)
+        python -m app.data.sync --loop 60     (keep syncing every minute)
+    """
+    parser = argparse.ArgumentParser(description="Incrementally sync the DATA/*.csv feeds.")
+    parser.add_argument("--feed", action="append", choices=sorted(FEEDS), help="feed to sync (default: all)")
+    parser.add_argument("--loop", type=float, metavar="SECONDS", help="repeat every SECONDS")
+    args = parser.parse_args(argv)
+
+    ensure_schema()
+    run(args.loop, args.feed)
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,21 @@
 import csv
+import logging
+import sqlite3
 from pathlib import Path
 import pandas as pd 
 from app.data.db import connect_database
+from app.data.snapshot import connect_analytics
+import app.data.archive as Archive
+import app.data.frames as Frames
+from app.data.schema import PRIORITY_RANK_SQL
+
+logger = logging.getLogger(__name__)
+
+# Work queue: open tickets by PRIORITY_RANK_SQL, then oldest first. Claiming a ticket
+# moves it to CLAIMED_STATUS.
+QUEUE_STATUS = "Open"
+CLAIMED_STATUS = "In Progress"
+QUEUE_COLUMNS = "ticket_id, subject, priority, status, created_date, assigned_to"
 
 def insert_ticket(ticket_id, subject, priority, status, created_date, created_at):
     """
@@ -11,17 +25,22 @@ def insert_ticket(ticket_id, subject, priority, status, created_date, created_at
     db = connect_database()
     cursor = db.cursor()
 
-    # 2. Run the SQL Command
+    # 2. Run the SQL Command (archived ticket ids stay reserved)
     sql = """
         INSERT INTO it_tickets 
         (ticket_id, subject, priority, status, created_date, created_at)
-        VALUES (?, ?, ?, ?, ?, ?)
+        SELECT ?, ?, ?, ?, ?, ?
+        WHERE NOT EXISTS (SELECT 1 FROM IT_Tickets_archive WHERE ticket_id = ?)
     """
-    values = (ticket_id, subject, priority, status, created_date, created_at)
+    values = (ticket_id, subject, priority, status, created_date, created_at, ticket_id)
     
-    cursor.execute(sql, values)
-    db.commit()
-    db.close()
+    try:
+        cursor.execute(sql, values)
+        if cursor.rowcount == 0:
+            raise sqlite3.IntegrityError("UNIQUE constraint failed: IT_Tickets.ticket_id (archived)")
+        db.commit()
+    finally:
+        db.close()
 
 def update_ticket(ticket_id, subject, priority, status, created_date, created_at):
     """
@@ -50,6 +69,121 @@ def update_ticket(ticket_id, subject, priority, status, created_date, created_at
     db.close()
     return success
 
+def upsert_tickets(cursor, records) -> int:
+    """
+    Inserts or updates a batch of ticket dicts keyed on ticket_id; the caller commits.
+    created_at is optional. Returns the number applied (archived tickets are skipped).
+    """
+    # Without a created_at, new tickets get the current time and stored ones keep theirs
+    sql = """
+        INSERT INTO it_tickets
+        (ticket_id, subject, priority, status, created_date, created_at)
+        SELECT ?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP)
+        WHERE NOT EXISTS (SELECT 1 FROM IT_Tickets_archive WHERE ticket_id = ?)
+        ON CONFLICT(ticket_id) DO UPDATE SET
+            subject = excluded.subject,
+            priority = excluded.priority,
+            status = excluded.status,
+            created_date = excluded.created_date,
+            created_at = COALESCE(?, created_at)
+    """
+    values = [
+        (r["ticket_id"], r["subject"], r["priority"], r["status"], r["created_date"], r.get("created_at"),
+         r["ticket_id"], r.get("created_at"))
+        for r in records
+    ]
+    cursor.executemany(sql, values)
+    return max(cursor.rowcount, 0)
+
+def _queue_row(cursor, row):
+    """Turns a queue query row into a dict keyed by column name."""
+    return dict(zip([column[0] for column in cursor.description], row)) if row else None
+
+def next_ticket():
+    """
+    Returns the head of the work queue (highest priority open ticket, oldest first) as a dict,
+    without claiming it, or None when the queue is empty.
+    """
+    # 1. Connect to the DB (the queue must be current, so not the snapshot)
+    db = connect_database()
+    try:
+        # 2. First entry of the index range for open tickets
+        cursor = db.execute(
+            "SELECT {} FROM IT_Tickets WHERE status = ? ORDER BY {}, created_date LIMIT 1".format(QUEUE_COLUMNS, PRIORITY_RANK_SQL),
+            (QUEUE_STATUS,)
+        )
+        return _queue_row(cursor, cursor.fetchone())
+    finally:
+        db.close()
+
+def claim(ticket_id, user) -> bool:
+    """
+    Assigns an open ticket to `user` and moves it to In Progress.
+    Returns True if this call claimed it, False if it was no longer open.
+    """
+    db = connect_database()
+    try:
+        # The status check is part of the UPDATE, so of two concurrent claims exactly one wins
+        cursor = db.execute(
+            "UPDATE IT_Tickets SET status = ?, assigned_to = ? WHERE ticket_id = ? AND status = ?",
+            (CLAIMED_STATUS, user, ticket_id, QUEUE_STATUS)
+        )
+        db.commit()
+        return cursor.rowcount == 1
+    finally:
+        db.close()
+
+def claim_next(user):
+    """
+    Claims the head of the queue for `user` in one statement.
+    Returns the claimed ticket as a dict, or None when the queue is empty.
+    """
+    db = connect_database()
+    try:
+        cursor = db.execute(
+            """
+            UPDATE IT_Tickets SET status = ?, assigned_to = ?
+            WHERE id = (
+                SELECT id FROM IT_Tickets WHERE status = ? ORDER BY {}, created_date LIMIT 1
+            ) AND status = ?
+            RETURNING {}
+            """.format(PRIORITY_RANK_SQL, QUEUE_COLUMNS),
+            (CLAIMED_STATUS, user, QUEUE_STATUS, QUEUE_STATUS)
+        )
+        ticket = _queue_row(cursor, cursor.fetchone())
+        db.commit()
+        return ticket
+    finally:
+        db.close()
+
+def release(ticket_id, user) -> bool:
+    """
+    Puts a ticket claimed by `user` back in the queue (Open, unassigned).
+    Returns True if the ticket was released, False if `user` didn't hold it.
+    """
+    db = connect_database()
+    try:
+        cursor = db.execute(
+            "UPDATE IT_Tickets SET status = ?, assigned_to = NULL WHERE ticket_id = ? AND assigned_to = ? AND status = ?",
+            (QUEUE_STATUS, ticket_id, user, CLAIMED_STATUS)
+        )
+        db.commit()
+        return cursor.rowcount == 1
+    finally:
+        db.close()
+
+def claimed_tickets(user):
+    """Returns the tickets currently claimed by `user` as a DataFrame."""
+    db = connect_database()
+    try:
+        return pd.read_sql_query(
+            "SELECT {} FROM IT_Tickets WHERE assigned_to = ? AND status = ? ORDER BY {}, created_date".format(QUEUE_COLUMNS, PRIORITY_RANK_SQL),
+            db,
+            params=(user, CLAIMED_STATUS)
+        )
+    finally:
+        db.close()
+
 def delete_ticket(ticket_id):
     """
     Deletes a ticket record from the database by its ticket_id.
@@ -70,60 +204,83 @@ def delete_ticket(ticket_id):
     db.close()
     return success
 
-def get_groupby(column):
+def get_groupby(column, include_archived=False):
     """
     Retrieves distinct values for a specified column from the IT_Tickets table.
+    include_archived also counts tickets moved to the archive table.
     """
-    # 1. Establish connection
-    db = connect_database()
+    # 1. Establish connection to the read-only analytics snapshot
+    db = connect_analytics()
     
     # 2. Generate the full SQL command
-    sql_command = f"SELECT {column},COUNT(*) FROM IT_Tickets GROUP BY {column}"
+    source, params = _ticket_source(include_archived)
+    sql_command = f"SELECT {column},COUNT(*) FROM {source} GROUP BY {column}"
     
     # 3. Execute query and load directly into a Pandas DataFrame
-    results_df = pd.read_sql_query(sql_command, db)
-    print(results_df)
+    results_df = pd.read_sql_query(sql_command, db, params=params)
+    logger.debug("query returned %d rows", len(results_df))
     
     # 4. Close connection and return data
     db.close()
     return results_df
 
-def get_all_tickets(filter_str,column):
+def _ticket_source(include_archived=False):
+    """FROM source for ticket reads: IT_Tickets, or IT_Tickets plus its archive."""
+    if not include_archived:
+        return "IT_Tickets", []
+    # Explicit columns, since older databases carry extra IT_Tickets columns the archive doesn't keep
+    columns = ", ".join(Archive.ARCHIVES["IT_Tickets"][3])
+    return Archive.with_archive("(SELECT {} FROM IT_Tickets)".format(columns), [], "IT_Tickets")
+
+def get_all_tickets(filter_str,column, conn=None, include_archived=False):
     """
     Retrieves ticket records from the database and returns them as a DataFrame.
     Applies the provided SQL filter string to refine the results.
+    include_archived also counts tickets moved to the archive table.
     """
-    # 1. Establish connection
-    db = connect_database()
+    # 1. Establish connection to the read-only analytics snapshot
+    db = conn if conn is not None else connect_analytics()
     
     # 2. Generate the full SQL command using the helper function
     # Renamed to match the IT tickets context
-    sql_command =f"SELECT {column},COUNT(*) FROM IT_Tickets GROUP BY {column}"
+    source, params = _ticket_source(include_archived)
+    sql_command =f"SELECT {column},COUNT(*) FROM {source} GROUP BY {column}"
     
     # 3. Execute query and load directly into a Pandas DataFrame
-    results_df = pd.read_sql_query(sql_command, db)
-    print(results_df)
+    results_df = pd.read_sql_query(sql_command, db, params=params)
+    logger.debug("query returned %d rows", len(results_df))
     
-    # 4. Close connection and return data
-    db.close()
+    # 4. Close our own connection and return data
+    if conn is None:
+        db.close()
     return results_df
 
-def get_tickets_dataframe(filter_str=None):
+def iter_tickets(chunksize=None, include_archived=False):
     """
-    Returns the DataFrame for IT_tickets table.
+    Yields every ticket as typed DataFrame chunks (see app.data.frames),
+    optionally including the archived tickets.
     """
     # 1. Establish connection
     db = connect_database()
-    
-    # 2. Generate the full SQL command
-    sql_command = "SELECT * FROM IT_tickets"
+    try:
+        # 2. Generate the full SQL command
+        source, params = _ticket_source(include_archived)
+        sql_command = f"SELECT * FROM {source}"
 
-    # 3. Execute query and load directly into a Pandas DataFrame
-    results_df = pd.read_sql_query(sql_command, db)
-    print(results_df)
-    
-    # 4. Close connection and return data
-    db.close()
+        # 3. Stream the result chunk by chunk
+        yield from Frames.read_chunks(db, sql_command, params, Frames.TICKET_DTYPES, Frames.TICKET_DATES, chunksize)
+    finally:
+        # 4. Close connection once the caller is done
+        db.close()
+
+def get_tickets_dataframe(filter_str=None, include_archived=False):
+    """
+    Returns the DataFrame for IT_tickets table.
+    include_archived appends the tickets moved to the archive table.
+    Built from the typed chunks of iter_tickets, so enum columns are categorical.
+    """
+    results_df = Frames.concat_chunks(iter_tickets(include_archived=include_archived))
+    logger.debug("query returned %d rows", len(results_df))
     return results_df
 
 def get_ticketquery(filter_str,column):
@@ -136,7 +293,7 @@ def get_ticketquery(filter_str,column):
     # 2. Add the condition if it exists
     if filter_str:
         query += f" WHERE {filter_str}"
-    print('Filter string 1',filter_str)
+    logger.debug("filter string: %s", filter_str)
     
     return query
 
@@ -160,25 +317,10 @@ def total_tickets(filter_str: str) -> int:
     return len(df_results)
 
 def transfer_csv():
-    import csv
-    from pathlib import Path
-    
-    conn = connect_database()
-    cursor = conn.cursor()
-    
-    # Updated to read from the correct file 'it_tickets.csv'
-    with open(Path("it_tickets.csv")) as csv_file:
-        reader = csv.reader(csv_file)
-                    
-        # Skip the header row
-        next(reader)
-        
-        for row in reader:
-            cursor.execute("""
-                INSERT INTO it_tickets 
-                (ticket_id, subject, priority, status, created_date, created_at)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (row[0], row[1], row[2], row[3], row[4], row[5]))
-            
-    conn.commit()
-    conn.close()
+    """
+    Loads the whole tickets CSV feed into the database.
+    Rows go through the validation stage and are upserted, so running it twice is safe.
+    Returns the number of rows applied.
+    """
+    from app.data.sync import sync_feed
+    return sync_feed("tickets", full=True)
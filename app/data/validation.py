@@ -0,0 +1,165 @@
+from datetime import datetime
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+# Canonical values for the enum columns. Input is matched case-insensitively and
+# rewritten to these spellings so GROUP BY sees one value per category.
+INCIDENT_TYPES = ("Brute Force", "DDoS", "Data Leak", "Insider Threat",
+                  "Malware", "Phishing", "Ransomware", "SQL Injection")
+SEVERITIES = ("Critical", "High", "Low", "Medium")
+INCIDENT_STATUSES = ("Closed", "Open", "Pending Review", "Resolved", "Under Investigation")
+
+SUBJECTS = (
+    "Software Installation Request", "Password Reset Request",
+    "VPN Connection Failed", "Mouse/Keyboard Malfunction",
+    "Laptop Screen Flickering", "Printer Jammed",
+    "Wi-Fi Access Issue", "Blue Screen Error",
+    "System Slow Performance", "Access to Shared Drive Denied",
+    "Monitor Display Issue", "Email Not Syncing"
+)
+PRIORITIES = ("Critical", "High", "Medium", "Low")
+TICKET_STATUSES = ("Closed", "In Progress", "Open", "Pending User Action", "Resolved")
+
+# Statuses that still need work. Every "open" count (assistant digest, aging panel) uses these.
+OPEN_INCIDENT_STATUSES = ("Open", "Pending Review", "Under Investigation")
+OPEN_TICKET_STATUSES = ("Open", "In Progress", "Pending User Action")
+
+RULES = {
+    "incidents": {
+        "key": "id",
+        "integer": ["id"],
+        "required": ["id", "date", "incident_type", "severity", "status"],
+        "enums": {"incident_type": INCIDENT_TYPES, "severity": SEVERITIES, "status": INCIDENT_STATUSES},
+        "dates": ["date"],
+        "timestamps": ["created_at"],
+    },
+    "tickets": {
+        "key": "ticket_id",
+        "integer": [],
+        "required": ["ticket_id", "subject", "priority", "status", "created_date"],
+        "enums": {"subject": SUBJECTS, "priority": PRIORITIES, "status": TICKET_STATUSES},
+        "dates": ["created_date"],
+        "timestamps": ["created_at"],
+    },
+}
+
+# Formats accepted from the feeds, tried in order. ISO first, then the dd/mm/yyyy exports.
+DATE_FORMATS = ["%Y-%m-%d", "%d/%m/%Y"]
+TIMESTAMP_FORMATS = ["%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%d/%m/%Y %H:%M:%S", "%d/%m/%Y %H:%M"]
+
+REJECTS_DIR = Path("DATA") / "rejects"
+
+def parse_dates(values, formats):
+    """
+    Parses a string Series trying each format in turn on the still-unparsed values.
+    Each format is one vectorized to_datetime call; unparseable values come back as NaT.
+    """
+    parsed = pd.Series(pd.NaT, index=values.index, dtype="datetime64[ns]")
+    for fmt in formats:
+        missing = parsed.isna() & values.notna()
+        if not missing.any():
+            break
+        parsed[missing] = pd.to_datetime(values[missing], format=fmt, errors="coerce")
+    return parsed
+
+def _encode(values):
+    """
+    Dictionary-encodes a raw column.
+    Returns (codes, uniques): uniques are the distinct values trimmed, with blanks as None,
+    plus a trailing None that missing values (code -1) point at. Enum, date and blank
+    checks then run once per distinct value instead of once per row.
+    """
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    cleaned = pd.Series(np.asarray(uniques, dtype=object)).str.strip()
+    cleaned = cleaned.where(cleaned != "", None)
+    return codes, pd.Series(np.append(cleaned.to_numpy(dtype=object), None), dtype=object)
+
+def validate_chunk(kind, records):
+    """
+    Validates and normalizes a chunk of raw "incidents" or "tickets" feed rows column-wise:
+    blanks become missing, enums are matched case-insensitively, dates are rewritten as ISO and
+    a key repeated in the chunk keeps its last row.
+    Returns (valid, rejected): a list of dicts to upsert, and the rejected rows with a "reason".
+    """
+    rules = RULES[kind]
+    raw = records if isinstance(records, pd.DataFrame) else pd.DataFrame(records, dtype=object)
+    raw = raw.reset_index(drop=True)
+    for column in rules["required"]:
+        if column not in raw.columns:
+            raw[column] = None
+
+    output = {}   # normalized column -> numpy object array
+    checks = []   # (mask of failing rows, reason)
+
+    for column in raw.columns:
+        # 1. Integer keys are (nearly) unique per row, so they are parsed directly
+        if column in rules["integer"]:
+            numbers = pd.to_numeric(raw[column], errors="coerce").to_numpy()
+            present = raw[column].notna().to_numpy()
+            checks.append((present & (np.isnan(numbers) | (numbers % 1 != 0)), "invalid " + column))
+            if column in rules["required"]:
+                checks.append((~present, "missing " + column))
+            output[column] = numbers
+            continue
+
+        # 2. Everything else is checked on its distinct values
+        codes, uniques = _encode(raw[column])
+        missing = uniques.isna()
+
+        if column in rules["enums"]:
+            lookup = {value.lower(): value for value in rules["enums"][column]}
+            normalized = uniques.str.lower().map(lookup)
+            bad = ~missing & normalized.isna()
+            reason = "unknown " + column
+        elif column in rules["dates"] or column in rules["timestamps"]:
+            is_date = column in rules["dates"]
+            parsed = parse_dates(uniques, DATE_FORMATS if is_date else TIMESTAMP_FORMATS)
+            normalized = parsed.dt.strftime("%Y-%m-%d" if is_date else "%Y-%m-%d %H:%M:%S")
+            bad = ~missing & parsed.isna()
+            reason = "invalid " + column
+        else:
+            normalized = uniques
+            bad = pd.Series(False, index=uniques.index)
+            reason = None
+
+        if reason:
+            checks.append((bad.to_numpy()[codes], reason))
+        if column in rules["required"]:
+            checks.append((missing.to_numpy()[codes], "missing " + column))
+        normalized = normalized.astype(object)
+        output[column] = normalized.where(normalized.notna(), None).to_numpy(dtype=object)[codes]
+
+    # 3. A key repeated within the chunk: the last row wins, earlier ones are rejected
+    failed = np.logical_or.reduce([mask for mask, _ in checks])
+    keys = pd.Series(output[rules["key"]]).where(~failed)
+    superseded = (keys.notna() & keys.duplicated(keep="last")).to_numpy()
+    checks.append((superseded, "superseded by a later row"))
+    failed = failed | superseded
+
+    # 4. Reasons for the (usually few) rejected rows
+    rejected = raw[failed].copy()
+    rejected["reason"] = [
+        "; ".join(reason for mask, reason in checks if mask[position])
+        for position in np.flatnonzero(failed)
+    ]
+
+    # 5. Valid rows as plain Python dicts (ints for integer keys)
+    keep = ~failed
+    columns = list(output)
+    values = []
+    for column in columns:
+        kept = output[column][keep]
+        values.append(kept.astype(np.int64).tolist() if column in rules["integer"] else kept.tolist())
+    return [dict(zip(columns, row)) for row in zip(*values)], rejected
+
+def write_rejects(kind, rejected) -> None:
+    """
+    Appends rejected rows and their reasons to DATA/rejects/<kind>.rejects.csv.
+    """
+    if rejected is None or rejected.empty:
+        return
+    REJECTS_DIR.mkdir(parents=True, exist_ok=True)
+    path = REJECTS_DIR / "{}.rejects.csv".format(kind)
+    rejected = rejected.assign(rejected_at=datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+    rejected.to_csv(path, mode="a", header=not path.exists(), index=False)
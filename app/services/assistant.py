@@ -0,0 +1,234 @@
+import abc
+import itertools
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# Model calls running at once across every session in the process
+MAX_CONCURRENT = int(os.environ.get("ASSISTANT_MAX_CONCURRENT", "4"))
+# Prompts one user may have waiting or running; more are refused straight away
+MAX_PENDING_PER_USER = int(os.environ.get("ASSISTANT_MAX_PENDING_PER_USER", "2"))
+# Seconds a request may take from submission to its last chunk
+REQUEST_TIMEOUT = float(os.environ.get("ASSISTANT_TIMEOUT", "60"))
+# "openai" for the real model, "echo" for the local stand-in used in tests and benchmarks
+BACKEND = os.environ.get("ASSISTANT_BACKEND", "openai")
+
+_DONE = object()
+
+class AssistantBusy(RuntimeError):
+    """Raised when a user already has MAX_PENDING_PER_USER prompts queued or running."""
+
+class Backend(abc.ABC):
+    """
+    Interface for assistant models. stream() yields the reply as text chunks and should
+    stop early once `cancelled` is set.
+    """
+
+    @abc.abstractmethod
+    def stream(self, messages, cancelled, timeout):
+        """Yields the reply to `messages` as text chunks, giving up after `timeout` seconds."""
+
+class OpenAIBackend(Backend):
+    """Streams chat completions from OpenAI."""
+
+    def __init__(self, client, model="gpt-4o-mini"):
+        self.client = client
+        self.model = model
+
+    def stream(self, messages, cancelled, timeout):
+        completion = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            stream=True,
+            timeout=timeout,
+        )
+        try:
+            for chunk in completion:
+                if cancelled.is_set():
+                    return
+                delta = chunk.choices[0].delta
+                if delta.content:
+                    yield delta.content
+        finally:
+            # Closing the stream drops the HTTP connection, so a cancelled reply stops costing tokens
+            completion.close()
+
+class EchoBackend(Backend):
+    """
+    Local stand-in for a model: replies with the last user message, word by word.
+    `delay` seconds per word simulates generation time.
+    """
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+
+    def stream(self, messages, cancelled, timeout):
+        prompt = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
+        for word in ("Echo: " + prompt).split(" "):
+            if cancelled.is_set():
+                return
+            if self.delay:
+                time.sleep(self.delay)
+            yield word + " "
+
+class Job:
+    """One queued prompt. The page reads the reply through stream() and may cancel() it."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, user, messages, backend, timeout):
+        self.id = next(self._ids)
+        self.user = user
+        self.messages = list(messages)
+        self.backend = backend
+        self.timeout = timeout
+        self.deadline = time.monotonic() + timeout
+        self.cancelled = threading.Event()
+        self.chunks = queue.Queue()
+        self.error = None
+
+    def cancel(self) -> None:
+        """Stops the job: dropped from the queue if waiting, stopped at the next chunk if running."""
+        self.cancelled.set()
+
+    def stream(self):
+        """
+        Yields the reply chunks as the backend produces them.
+        Raises TimeoutError once the deadline passes and re-raises backend errors.
+        The job is cancelled if the reader stops early (e.g. the user navigated away).
+        """
+        finished = False
+        try:
+            while True:
+                remaining = self.deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError("The assistant did not answer within {:g}s.".format(self.timeout))
+                try:
+                    chunk = self.chunks.get(timeout=remaining)
+                except queue.Empty:
+                    continue
+                if chunk is _DONE:
+                    finished = True
+                    if self.error is not None:
+                        raise self.error
+                    return
+                yield chunk
+        finally:
+            if not finished:
+                self.cancel()
+
+class AssistantScheduler:
+    """
+    Runs assistant requests on max_concurrent worker threads, serving the users' waiting
+    prompts round-robin.
+    """
+
+    def __init__(self, max_concurrent=MAX_CONCURRENT, max_pending_per_user=MAX_PENDING_PER_USER, timeout=REQUEST_TIMEOUT):
+        self.max_concurrent = max_concurrent
+        self.max_pending_per_user = max_pending_per_user
+        self.timeout = timeout
+        self._queues = {}       # user -> deque of waiting jobs
+        self._turns = deque()   # users with waiting jobs, in serving order
+        self._pending = {}      # user -> jobs waiting or running
+        self._condition = threading.Condition()
+        self._workers = []
+
+    def submit(self, user, messages, backend, timeout=None) -> Job:
+        """
+        Queues a prompt for `user` and returns its Job straight away.
+        Raises AssistantBusy if the user already has too many prompts in flight.
+        """
+        job = Job(user, messages, backend, self.timeout if timeout is None else timeout)
+        with self._condition:
+            if self._pending.get(user, 0) >= self.max_pending_per_user:
+                raise AssistantBusy("You already have {} prompts in progress.".format(self._pending[user]))
+            self._pending[user] = self._pending.get(user, 0) + 1
+            if user not in self._queues:
+                self._queues[user] = deque()
+                self._turns.append(user)
+            self._queues[user].append(job)
+            self._start_workers()
+            self._condition.notify()
+        return job
+
+    def queued(self) -> int:
+        """Number of jobs waiting for a worker."""
+        with self._condition:
+            return sum(len(jobs) for jobs in self._queues.values())
+
+    def _start_workers(self) -> None:
+        """Starts the worker threads on first use (called with the condition held)."""
+        self._workers = [worker for worker in self._workers if worker.is_alive()]
+        for number in range(len(self._workers), self.max_concurrent):
+            worker = threading.Thread(target=self._work, name="assistant-{}".format(number), daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def _next_job(self) -> Job:
+        """Takes the next job round-robin across users, waiting until there is one."""
+        with self._condition:
+            while not self._turns:
+                self._condition.wait()
+            user = self._turns.popleft()
+            jobs = self._queues[user]
+            job = jobs.popleft()
+            if jobs:
+                self._turns.append(user)
+            else:
+                del self._queues[user]
+            return job
+
+    def _finish(self, job) -> None:
+        """Releases the user's slot and wakes the reader."""
+        with self._condition:
+            self._pending[job.user] -= 1
+            if not self._pending[job.user]:
+                del self._pending[job.user]
+        job.chunks.put(_DONE)
+
+    def _work(self) -> None:
+        """Worker loop: runs one job at a time, checking cancellation and the deadline per chunk."""
+        while True:
+            job = self._next_job()
+            try:
+                if job.cancelled.is_set() or time.monotonic() >= job.deadline:
+                    continue
+                started = time.monotonic()
+                for chunk in job.backend.stream(job.messages, job.cancelled, max(job.deadline - time.monotonic(), 0.1)):
+                    if job.cancelled.is_set() or time.monotonic() >= job.deadline:
+                        break
+                    job.chunks.put(chunk)
+                logger.info("assistant request finished", extra={"fields": {
+                    "user": job.user, "job": job.id, "cancelled": job.cancelled.is_set(),
+                    "duration_ms": round((time.monotonic() - started) * 1000, 2),
+                }})
+            except Exception as error:
+                logger.exception("assistant request failed")
+                job.error = error
+            finally:
+                self._finish(job)
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def get_scheduler() -> AssistantScheduler:
+    """The process-wide scheduler shared by every page and session."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = AssistantScheduler()
+        return _scheduler
+
+def make_backend(client_factory) -> Backend:
+    """
+    Returns the backend chosen by ASSISTANT_BACKEND. client_factory is only called for
+    OpenAI, so the echo backend never needs an API key.
+    """
+    if BACKEND == "echo":
+        return EchoBackend()
+    return OpenAIBackend(client_factory())
@@ -0,0 +1,105 @@
+import os
+import threading
+import app.data.aggregate as Aggregate
+import app.data.snapshot as Snapshot
+from app.data.db import data_version
+from app.data.validation import OPEN_INCIDENT_STATUSES, OPEN_TICKET_STATUSES
+
+# Most tokens the digest may add to the system prompt. Tokens are estimated at four
+# characters each, which is close enough for English text and avoids a tokenizer dependency.
+TOKEN_BUDGET = int(os.environ.get("DIGEST_TOKEN_BUDGET", "300"))
+CHARS_PER_TOKEN = 4
+# Entries listed for "top" breakdowns
+TOP_ENTRIES = 5
+
+# Table -> (label, columns summarised in priority order, statuses counted as "open")
+DIGESTS = {
+    "cyber_incidents": ("incidents", ["severity", "status", "incident_type"], OPEN_INCIDENT_STATUSES),
+    "IT_Tickets": ("tickets", ["priority", "status", "subject"], OPEN_TICKET_STATUSES),
+}
+
+_cache = {}
+_lock = threading.Lock()
+
+def estimate_tokens(text) -> int:
+    """Rough token count of a piece of text."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def _breakdown(table, column, limit=TOP_ENTRIES) -> str:
+    """'column: value n, value n, ...' for the largest groups of one column."""
+    counts = Aggregate.aggregate(table, [column], db_path=Snapshot.SNAPSHOT_PATH).head(limit)
+    if counts.empty:
+        return ""
+    return "{}: {}".format(column, ", ".join("{} {}".format(row[column], row["count"]) for _, row in counts.iterrows()))
+
+def _trend(table, label) -> str:
+    """Rows per month for the last three months with data, oldest first."""
+    months = Aggregate.aggregate(table, ["month"], db_path=Snapshot.SNAPSHOT_PATH).dropna().sort_values("month").tail(3)
+    if months.empty:
+        return ""
+    return "{} per month: {}".format(label, ", ".join("{} {}".format(row["month"], row["count"]) for _, row in months.iterrows()))
+
+def digest_lines(table) -> list:
+    """
+    The digest for one table as lines, most important first: totals, open count,
+    the breakdown of each summarised column, then the monthly trend.
+    """
+    label, columns, open_statuses = DIGESTS[table]
+    by_status = Aggregate.aggregate(table, ["status"], db_path=Snapshot.SNAPSHOT_PATH)
+    total = int(by_status["count"].sum())
+    open_count = int(by_status.loc[by_status["status"].isin(open_statuses), "count"].sum())
+
+    lines = ["{}: {} total, {} open".format(label.title(), total, open_count)]
+    lines.extend(_breakdown(table, column) for column in columns)
+    lines.append(_trend(table, label.title()))
+    return [line for line in lines if line]
+
+def fit_budget(lines, budget) -> str:
+    """Joins lines in order, stopping before the first one that would exceed the token budget."""
+    kept = []
+    used = 0
+    for line in lines:
+        cost = estimate_tokens(line + "\n")
+        if used + cost > budget:
+            break
+        kept.append(line)
+        used += cost
+    return "\n".join(kept)
+
+def get_digest(tables=None, budget=None) -> str:
+    """
+    Text summary of the incidents and tickets data for the assistant, within a token budget
+    shared evenly by the tables. Cached per snapshot data version.
+    """
+    tables = list(tables or DIGESTS)
+    budget = TOKEN_BUDGET if budget is None else budget
+
+    # 1. Refresh first, then read the version of the snapshot the digest will be built from
+    Snapshot.ensure_fresh()
+    version = data_version(Snapshot.SNAPSHOT_PATH)
+    key = (tuple(tables), budget, version)
+
+    with _lock:
+        if key in _cache:
+            return _cache[key]
+
+    # 2. Build from that snapshot only; the aggregates don't trigger another refresh
+    share = budget // len(tables)
+    text = "\n".join(fit_budget(digest_lines(table), share) for table in tables)
+
+    # 3. Another session may have swapped the snapshot meanwhile; don't cache a mixed digest
+    if data_version(Snapshot.SNAPSHOT_PATH) != version:
+        return text
+
+    with _lock:
+        for stale in [cached for cached in _cache if cached[2] != version]:
+            del _cache[stale]
+        _cache[key] = text
+    return text
+
+def system_prompt(base, tables=None, budget=None) -> str:
+    """The assistant's system prompt with the current data digest appended."""
+    digest = get_digest(tables, budget)
+    if not digest:
+        return base
+    return "{}\n\nCurrent platform data (use it when the question is about our data):\n{}".format(base, digest)
@@ -0,0 +1,73 @@
+import numpy as np
+
+# Width the dashboard line charts are drawn at and how many points each pixel can show
+DEFAULT_CHART_WIDTH_PX = 700
+POINTS_PER_PIXEL = 2
+
+def target_points(width_px=DEFAULT_CHART_WIDTH_PX, points_per_pixel=POINTS_PER_PIXEL) -> int:
+    """
+    Number of points worth sending to the browser for a chart of the given pixel width.
+    Anything beyond this cannot be drawn distinctly anyway.
+    """
+    return max(3, int(width_px * points_per_pixel))
+
+def _as_float(values):
+    """
+    Converts x values (numbers or datetime64) to float64 so triangle areas can be computed.
+    """
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype("datetime64[ns]").astype(np.int64).astype(np.float64)
+    return values.astype(np.float64)
+
+def lttb_indices(x, y, n_out: int):
+    """
+    Largest-Triangle-Three-Buckets: the indices of n_out points of a series sorted on x, keeping
+    the first and last point and, from each bucket, the point forming the largest triangle with
+    the previously kept point and the next bucket's average.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    xs = _as_float(x)
+    ys = np.asarray(y, dtype=np.float64)
+
+    # 1. Bucket boundaries over the interior points 1 .. n-2
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    counts = np.diff(edges)
+
+    # 2. Every bucket's average in one vectorized pass
+    avg_x = np.add.reduceat(xs[:n - 1], edges[:-1]) / counts
+    avg_y = np.add.reduceat(ys[:n - 1], edges[:-1]) / counts
+    # The "next bucket" of the final bucket is the last point itself
+    next_x = np.append(avg_x[1:], xs[-1])
+    next_y = np.append(avg_y[1:], ys[-1])
+
+    # 3. Walk the buckets; each one only depends on the point chosen from the one before
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0] = 0
+    keep[-1] = n - 1
+    anchor = 0
+    for b in range(n_out - 2):
+        start, stop = edges[b], edges[b + 1]
+        ax, ay = xs[anchor], ys[anchor]
+        areas = np.abs(
+            (ax - next_x[b]) * (ys[start:stop] - ay)
+            - (ax - xs[start:stop]) * (next_y[b] - ay)
+        )
+        anchor = start + int(np.argmax(areas))
+        keep[b + 1] = anchor
+    return keep
+
+def lttb(x, y, n_out: int):
+    """
+    Downsamples a series with LTTB and returns the kept (x, y) values.
+    An empty series gives empty arrays, with y as float64 rather than object.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if len(y) == 0:
+        return x, y.astype(np.float64)
+    keep = lttb_indices(x, y, n_out)
+    return x[keep], y[keep]
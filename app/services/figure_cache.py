@@ -0,0 +1,54 @@
+import threading
+from collections import OrderedDict
+
+# Figures are shared by every Streamlit session in the process, so keep the cache bounded.
+# A cached figure is handed to every session as is and must be treated as read-only:
+# pass it to st.plotly_chart (which only serializes a copy) and never update it.
+MAX_FIGURES = 64
+
+_figures = OrderedDict()
+_lock = threading.Lock()
+
+def get_figure(kind, column, version, build):
+    """
+    Returns the read-only figure cached under (kind, column, version).
+    On a miss, build() is called once to create it and the result is stored for later reruns.
+
+    Args:
+        kind (str): Chart identifier, e.g. "incidents_bar"
+        column: Column the chart is grouped by, or a tuple of the column and its filters
+        version: Data version token from app.data.db.data_version()
+        build (callable): Zero-argument function that queries the data and returns the figure
+    """
+    key = (kind, column, version)
+
+    # 1. Fast path: figure already built for this data version
+    with _lock:
+        if key in _figures:
+            _figures.move_to_end(key)
+            return _figures[key]
+
+    # 2. Build outside the lock so slow queries don't block other sessions
+    fig = build()
+
+    # 3. Store it, evicting the least recently used figures
+    with _lock:
+        _figures[key] = fig
+        _figures.move_to_end(key)
+        while len(_figures) > MAX_FIGURES:
+            _figures.popitem(last=False)
+    return fig
+
+def contains(kind, column, version) -> bool:
+    """
+    True if the figure for (kind, column, version) is cached, so its data needn't be fetched.
+    """
+    with _lock:
+        return (kind, column, version) in _figures
+
+def clear() -> None:
+    """
+    Drops every cached figure.
+    """
+    with _lock:
+        _figures.clear()
@@ -0,0 +1,79 @@
+import json
+import streamlit as st
+import app.services.session_service as Sessions
+import app.services.user_service as Users
+
+# The session token is kept in a cookie, never in the URL, so it stays out of browser
+# history, proxy and server logs, Referer headers and shared links. Streamlit can read the
+# request's cookies but has no API for response headers, so the cookie is written from the
+# page (SameSite=Strict, Secure over https) instead of as an HttpOnly header.
+COOKIE_NAME = "ip_session"
+
+def _write_cookie(value, max_age) -> None:
+    """Sets (or, with max_age 0, deletes) the session cookie in the browser."""
+    st.html(
+        "<script>document.cookie = {} + '; Path=/; Max-Age={}; SameSite=Strict'"
+        " + (location.protocol === 'https:' ? '; Secure' : '');</script>".format(
+            json.dumps("{}={}".format(COOKIE_NAME, value)), int(max_age)
+        ),
+        unsafe_allow_javascript=True,
+    )
+
+def sync_cookie() -> None:
+    """
+    Keeps the browser's cookie in step with the login: written after a login, deleted
+    after a logout. Cookies are only read from the first request, so the value last
+    written is tracked in session state.
+    """
+    if "cookie_token" not in st.session_state:
+        st.session_state.cookie_token = st.context.cookies.get(COOKIE_NAME)
+
+    token = st.session_state.get("session_token") if st.session_state.get("logged_in") else None
+    if token and token != st.session_state.cookie_token:
+        _write_cookie(token, Sessions.SESSION_TTL_SECONDS)
+        st.session_state.cookie_token = token
+    elif not token and st.session_state.cookie_token:
+        _write_cookie("", 0)
+        st.session_state.cookie_token = None
+
+def restore_login() -> None:
+    """
+    Sets the default login state and, after a refresh or a new tab, signs the user back
+    in from the session cookie (no bcrypt check needed).
+    """
+    # 1. Initialize Default State
+    if "username" not in st.session_state:
+        st.session_state.username = None
+    if "logged_in" not in st.session_state:
+        st.session_state.logged_in = False
+
+    # 2. Restore the login from the cookie
+    if not st.session_state.logged_in:
+        token = st.context.cookies.get(COOKIE_NAME)
+        username = Sessions.ValidateSession(token)
+        if username:
+            st.session_state.logged_in = True
+            st.session_state.username = username
+            st.session_state.session_token = token
+
+    # 3. Write or delete the cookie to match
+    sync_cookie()
+
+def require_login(area, role=None) -> None:
+    """
+    Restores the login and stops the page unless a user is signed in, with the given role if
+    one is required. `area` names the page in the messages, e.g. "the admin page".
+    """
+    restore_login()
+
+    # 1. Signed in?
+    if not st.session_state.logged_in:
+        st.warning("Please log in to access {}.".format(area))
+        if st.button("Go to Login Page"):
+            st.switch_page("home.py")
+        st.stop()
+
+    # 2. Allowed in?
+    if role and Users.GetUserRole(st.session_state.username) != role:
+        st.error("Only {} accounts can access {}.".format(role, area))
+        st.stop()
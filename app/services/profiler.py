@@ -0,0 +1,159 @@
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Optional extras, switched on with environment variables because they slow reruns down
+PROFILE_CPROFILE = os.environ.get("PROFILE_CPROFILE", "") == "1"
+PROFILE_MEMORY = os.environ.get("PROFILE_MEMORY", "") == "1"
+PROFILE_PANEL = os.environ.get("PROFILE_PANEL", "") == "1"
+# Per-page rerun budget in milliseconds; a rerun over budget logs a warning
+RERUN_BUDGET_MS = float(os.environ.get("RERUN_BUDGET_MS", "1500"))
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+
+# Number of functions kept from each cProfile sample
+CPROFILE_TOP = 15
+
+# tracemalloc is process-wide: it runs while any rerun is being profiled for memory
+_tracing_reruns = 0
+_tracing_lock = threading.Lock()
+
+class JsonFormatter(logging.Formatter):
+    """Formats log records as one JSON object per line, including any `fields` passed in extra."""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%d %H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+def configure_logging() -> None:
+    """
+    Sends the app's loggers ("app", "pages") to stderr as structured JSON lines.
+    Safe to call on every rerun; handlers are only added once.
+    """
+    for name in ("app", "pages"):
+        logger = logging.getLogger(name)
+        if not any(isinstance(handler.formatter, JsonFormatter) for handler in logger.handlers):
+            handler = logging.StreamHandler()
+            handler.setFormatter(JsonFormatter())
+            logger.addHandler(handler)
+            logger.propagate = False
+        logger.setLevel(LOG_LEVEL)
+
+class PageProfiler:
+    """
+    Times the sections of one page rerun and logs a summary when the rerun finishes.
+    Used as a context manager, so the summary is logged (and tracing stopped) even when the
+    rerun ends early with st.stop(), st.switch_page() or an error.
+
+    Usage:
+        with PageProfiler("Cyber_Analytics") as profiler:
+            with profiler.section("analysis"):
+                ...
+    """
+
+    def __init__(self, page, budget_ms=None):
+        global _tracing_reruns
+        configure_logging()
+        self.page = page
+        self.budget_ms = RERUN_BUDGET_MS if budget_ms is None else budget_ms
+        self.logger = logging.getLogger("pages." + page)
+        self.sections = []
+        self.started = time.perf_counter()
+        self.finished = False
+        self.tracing = PROFILE_MEMORY
+        if self.tracing:
+            with _tracing_lock:
+                _tracing_reruns += 1
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.finish()
+        return False
+
+    @contextmanager
+    def section(self, name):
+        """
+        Times a block of the page. With PROFILE_MEMORY=1 it also records allocations,
+        and with PROFILE_CPROFILE=1 the block's hottest functions.
+        """
+        result = {"section": name}
+        profile = cProfile.Profile() if PROFILE_CPROFILE else None
+        if PROFILE_MEMORY:
+            memory_before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        if profile:
+            profile.enable()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            result["wall_ms"] = round((time.perf_counter() - start) * 1000, 2)
+            if profile:
+                profile.disable()
+                result["top_functions"] = self._top_functions(profile)
+            if PROFILE_MEMORY:
+                current, peak = tracemalloc.get_traced_memory()
+                result["allocated_kb"] = round((current - memory_before) / 1024, 1)
+                result["peak_kb"] = round((peak - memory_before) / 1024, 1)
+            self.sections.append(result)
+            self.logger.debug("section finished", extra={"fields": dict(result, page=self.page)})
+
+    @staticmethod
+    def _top_functions(profile):
+        """The CPROFILE_TOP functions with the highest cumulative time, as text lines."""
+        stream = io.StringIO()
+        stats = pstats.Stats(profile, stream=stream).sort_stats("cumulative")
+        stats.print_stats(CPROFILE_TOP)
+        return [line for line in stream.getvalue().splitlines() if line.strip()][-CPROFILE_TOP:]
+
+    def finish(self):
+        """
+        Logs the rerun summary (once) and warns when the rerun exceeded its budget.
+        Returns the per-section results.
+        """
+        global _tracing_reruns
+        if self.finished:
+            return self.sections
+        self.finished = True
+        if self.tracing:
+            with _tracing_lock:
+                _tracing_reruns -= 1
+                if _tracing_reruns == 0:
+                    tracemalloc.stop()
+
+        total_ms = round((time.perf_counter() - self.started) * 1000, 2)
+        fields = {"page": self.page, "total_ms": total_ms, "budget_ms": self.budget_ms,
+                  "sections": [{k: v for k, v in s.items() if k != "top_functions"} for s in self.sections]}
+        if total_ms > self.budget_ms:
+            slowest = max(self.sections, key=lambda s: s["wall_ms"], default={"section": None})
+            self.logger.warning(
+                "rerun over budget ({} ms > {} ms), slowest section: {}".format(total_ms, self.budget_ms, slowest["section"]),
+                extra={"fields": fields}
+            )
+        else:
+            self.logger.info("rerun finished", extra={"fields": fields})
+        return self.sections
+
+    def panel(self, container) -> None:
+        """Shows the section timings in a Streamlit container when PROFILE_PANEL=1."""
+        if PROFILE_PANEL and self.sections:
+            container.caption("Rerun profile: {}".format(self.page))
+            container.dataframe([{k: v for k, v in s.items() if k != "top_functions"} for s in self.sections])
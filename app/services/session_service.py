@@ -0,0 +1,159 @@
+import base64
+import hashlib
+import hmac
+import logging
+import os
+import secrets
+import tempfile
+import threading
+import time
+from pathlib import Path
+from app.data.sessions import insert_session, get_session, revoke_session, purge_expired_sessions
+
+logger = logging.getLogger(__name__)
+
+# How long a login stays valid without re-entering the password
+SESSION_TTL_SECONDS = int(os.environ.get("SESSION_TTL_SECONDS", 8 * 60 * 60))
+# How often expired sessions are deleted by the background purger
+PURGE_INTERVAL_SECONDS = 15 * 60
+
+# Signing key file used when SESSION_SECRET is not set. It is created once, readable only by
+# the app's user, so logins survive restarts; replicas share it through the DATA volume.
+SECRET_PATH = Path("DATA") / "session_secret"
+
+_secret = None
+_secret_lock = threading.Lock()
+_purger = None
+_purger_lock = threading.Lock()
+
+def _encode(text: str) -> str:
+    """URL-safe base64 without padding."""
+    return base64.urlsafe_b64encode(text.encode("utf-8")).decode("ascii").rstrip("=")
+
+def _decode(text: str) -> str:
+    """Reverse of _encode."""
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4)).decode("utf-8")
+
+def _load_secret(path=SECRET_PATH) -> bytes:
+    """
+    The signing key: SESSION_SECRET if set, otherwise the key file, created on first use.
+    Raises RuntimeError if the key file exists but is empty, rather than signing with a
+    throwaway key that would sign everyone out on the next restart.
+    """
+    configured = os.environ.get("SESSION_SECRET", "")
+    if configured:
+        return configured.encode("utf-8")
+
+    # 1. Existing key file
+    path = Path(path)
+    if path.exists():
+        key = path.read_bytes().strip()
+        if not key:
+            raise RuntimeError("Session key file {} is empty; delete it or set SESSION_SECRET.".format(path))
+        return key
+
+    # 2. First start: write a new key to a private temp file and link it into place, so two
+    #    processes starting together can't both create one (the loser reads the winner's)
+    key = secrets.token_hex(32).encode("ascii")
+    fd, temp = tempfile.mkstemp(dir=path.parent, prefix=".session_secret")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(key)
+        os.link(temp, path)
+        logger.info("created session signing key at %s", path)
+    except FileExistsError:
+        return _load_secret(path)
+    finally:
+        os.unlink(temp)
+    return key
+
+def _secret_key() -> bytes:
+    """The signing key, loaded once per process."""
+    global _secret
+    with _secret_lock:
+        if _secret is None:
+            _secret = _load_secret()
+        return _secret
+
+def _sign(payload: str) -> str:
+    """HMAC-SHA256 signature of a token payload."""
+    return hmac.new(_secret_key(), payload.encode("utf-8"), hashlib.sha256).hexdigest()
+
+def _verify(token):
+    """
+    Checks a token's shape and signature.
+    Returns (encoded username, session id, expiry) if it was issued here, otherwise None.
+    """
+    if not token or token.count(".") != 3:
+        return None
+    payload, _, signature = token.rpartition(".")
+    # Compared as bytes: compare_digest rejects str arguments with non-ASCII characters
+    if not hmac.compare_digest(signature.encode("utf-8"), _sign(payload).encode("ascii")):
+        return None
+    return payload.split(".")
+
+def CreateSession(username):
+    """
+    Issues a signed "<username>.<session id>.<expiry>.<signature>" token after a successful
+    login, backed by a session row so it can be revoked.
+    """
+    session_id = secrets.token_urlsafe(16)
+    expires_at = int(time.time()) + SESSION_TTL_SECONDS
+    insert_session(session_id, username, expires_at)
+
+    payload = "{}.{}.{}".format(_encode(username), session_id, expires_at)
+    return "{}.{}".format(payload, _sign(payload))
+
+def ValidateSession(token):
+    """
+    Returns the username of a valid, unexpired and unrevoked session token, otherwise None.
+    """
+    # 1. Signature and expiry
+    parts = _verify(token)
+    if parts is None:
+        return None
+    encoded_username, session_id, expires_at = parts
+    if not expires_at.isdigit() or int(expires_at) < time.time():
+        return None
+
+    # 2. Revocation
+    session = get_session(session_id)
+    if not session or session[2]:
+        return None
+
+    username = _decode(encoded_username)
+    return username if session[0] == username else None
+
+def RevokeSession(token):
+    """
+    Revokes the session behind a token (used on logout). Returns True if one was revoked.
+    Only tokens signed here are honoured, so a forged token can't revoke someone else's session.
+    """
+    parts = _verify(token)
+    if parts is None:
+        return False
+    return revoke_session(parts[1])
+
+def PurgeExpiredSessions():
+    """Delete every expired session. Returns the number removed."""
+    return purge_expired_sessions(int(time.time()))
+
+def StartSessionPurger(interval=PURGE_INTERVAL_SECONDS):
+    """
+    Starts a daemon thread that deletes expired sessions every `interval` seconds.
+    Only one purger runs per process.
+    """
+    global _purger
+
+    def loop():
+        while True:
+            time.sleep(interval)
+            try:
+                PurgeExpiredSessions()
+            except Exception:
+                logger.exception("session purge failed")
+
+    with _purger_lock:
+        if _purger is None or not _purger.is_alive():
+            _purger = threading.Thread(target=loop, name="session-purger", daemon=True)
+            _purger.start()
@@ -37,6 +37,11 @@ def LoginUser(username, password):
         return True, f"Login successful!"
     return False, "Incorrect password."
 
+def GetUserRole(username):
+    """Role of a user ('user', 'admin', ...), or None if the user doesn't exist."""
+    user = get_user_by_username(username)
+    return user[3] if user else None
+
 def migrate_users_from_file(file_path='app/data/users.txt'):
     """Migrate users from a text file into the database."""
     if not Path(file_path).is_file():
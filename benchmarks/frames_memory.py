@@ -0,0 +1,110 @@
+"""
+Peak memory of the ways analytics code can load incidents.
+
+Builds a throwaway database with --rows synthetic incidents, then runs each strategy in
+its own child process and reports that process's peak RSS (resource.getrusage), so one
+strategy's memory can't hide another's.
+
+    python benchmarks/frames_memory.py --rows 1000000
+"""
+import argparse
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import app.data.frames as Frames
+import app.data.incidents as Incidents
+from app.data.db import connect_database
+
+def object_full_load(conn):
+    """Whole table as object columns, then counted."""
+    return pd.read_sql_query("SELECT * FROM cyber_incidents", conn).groupby("severity").size()
+
+def typed_full_load(conn):
+    """Whole table as typed chunks concatenated, then counted."""
+    return Frames.concat_chunks(Incidents.iter_incidents()).groupby("severity", observed=True).size()
+
+def chunked_reduce(conn):
+    """Counted chunk by chunk, never holding the table."""
+    return Frames.count_by(Incidents.iter_incidents(), "severity")
+
+STRATEGIES = {
+    "object_full_load": object_full_load,
+    "typed_full_load": typed_full_load,
+    "chunked_reduce": chunked_reduce,
+}
+
+def build_database(directory, rows) -> None:
+    """Creates DATA/intelligence_platform.db under directory with `rows` synthetic incidents."""
+    os.chdir(directory)
+    Path("DATA").mkdir()
+    from app.data.schema import ensure_schema
+    from app.data.validation import INCIDENT_TYPES, SEVERITIES, INCIDENT_STATUSES
+
+    ensure_schema()
+    conn = connect_database()
+    cursor = conn.cursor()
+    start = date(2023, 1, 1)
+    batch = []
+    for number in range(1, rows + 1):
+        batch.append({
+            "id": number,
+            "date": str(start + timedelta(days=random.randrange(3 * 365))),
+            "incident_type": random.choice(INCIDENT_TYPES),
+            "severity": random.choice(SEVERITIES),
+            "status": random.choice(INCIDENT_STATUSES),
+            "created_at": "2024-01-01 00:00:00",
+        })
+        if len(batch) == 50000:
+            Incidents.upsert_incidents(cursor, batch)
+            batch = []
+    Incidents.upsert_incidents(cursor, batch)
+    conn.commit()
+    conn.close()
+
+def run_strategy(name) -> None:
+    """Child process: runs one strategy and prints 'seconds baseline_rss_kb peak_rss_kb'."""
+    conn = connect_database()
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    STRATEGIES[name](conn)
+    elapsed = time.perf_counter() - started
+    conn.close()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(elapsed, baseline, peak)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare peak RSS of incident loading strategies.")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--strategy", choices=sorted(STRATEGIES), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.strategy:
+        run_strategy(args.strategy)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        print("Building {} incidents...".format(args.rows))
+        build_database(directory, args.rows)
+        print("{:<18} {:>9} {:>14} {:>12}".format("strategy", "seconds", "peak RSS (MB)", "growth (MB)"))
+        for name in STRATEGIES:
+            output = subprocess.run(
+                [sys.executable, __file__, "--strategy", name],
+                cwd=directory, capture_output=True, text=True, check=True,
+                env=dict(os.environ, PYTHONPATH=str(ROOT)),
+            ).stdout.split()
+            elapsed, baseline, peak = float(output[0]), int(output[1]), int(output[2])
+            print("{:<18} {:>9.2f} {:>14.1f} {:>12.1f}".format(name, elapsed, peak / 1024, (peak - baseline) / 1024))
+
+if __name__ == "__main__":
+    main()
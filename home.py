@@ -1,8 +1,9 @@
 import streamlit as st
 import app.services.user_service as LoginRegister
+import app.services.session_service as Sessions
+import app.services.page_session as PageSession
 import app.data.schema as Schema
 import auth
-import app.data.incidents as CyberFuncs
 def LoginCheck() -> None:
     """
     Checks if user has logged in through Login Page. Sets values to False/None if not
@@ -16,6 +17,8 @@ def LoginCheck() -> None:
     if "username" not in st.session_state:
         st.session_state.username = ""
 
+    # A signed session token in the cookie restores the login after a refresh, without bcrypt
+    PageSession.restore_login()
 
 def ConfigLayout():
     """
@@ -65,9 +68,10 @@ def Login(loginTab) -> None:
             if loginSuccess[0]:
                 st.session_state.logged_in = True
                 st.session_state.username = loginUsername
+                st.session_state.session_token = Sessions.CreateSession(loginUsername)
                 st.success("Welcome back, {}! ".format(loginUsername))
 
-                # Redirect to dashboard page
+                # Redirect to dashboard page; it stores the session token in a cookie
                 st.switch_page("pages/Cyber_Analytics.py")
             else:
                 st.error(loginSuccess[1])
@@ -121,7 +125,8 @@ def Register(registerTab):
 
 if __name__ == "__main__": 
     
-    Schema.create_all_tables()
+    Schema.ensure_schema()
+    Sessions.StartSessionPurger()
     LoginCheck()
     GoCyber()
     
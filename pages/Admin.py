@@ -0,0 +1,43 @@
+import streamlit as st
+import app.data.schema as Schema
+import app.data.query_plan as QueryPlan
+import app.services.page_session as PageSession
+
+def queryplans():
+    """
+    Shows the EXPLAIN QUERY PLAN report collected in QUERY_PLAN_DEBUG mode.
+    """
+    st.subheader("Query Plan Inspector")
+    if not QueryPlan.QUERY_PLAN_DEBUG:
+        st.info("Start the app with QUERY_PLAN_DEBUG=1 to collect plans. Showing the last saved report.")
+
+    flaggedOnly = st.checkbox("Only show flagged statements", value=True)
+
+    # Live report from this process, or the JSON written by the last debug run
+    entries = QueryPlan.report(flaggedOnly) if QueryPlan.QUERY_PLAN_DEBUG else QueryPlan.load_report()
+    if flaggedOnly:
+        entries = [entry for entry in entries if entry["flags"]]
+
+    if not entries:
+        st.success("No statements to report.")
+        return
+
+    st.metric("Statements", len(entries))
+    for entry in entries:
+        title = "{} ({}x){}".format(entry["statement"][:90], entry["count"], "  ⚠️" if entry["flags"] else "")
+        with st.expander(title):
+            st.code(entry["statement"], language="sql")
+            st.text("\n".join(entry["plan"]))
+            for flag in entry["flags"]:
+                st.warning(flag)
+
+    if QueryPlan.QUERY_PLAN_DEBUG and st.button("Reset report"):
+        QueryPlan.reset()
+        QueryPlan.write_report()
+        st.rerun()
+
+if __name__ == "__main__":
+    Schema.ensure_schema()
+    PageSession.require_login("the admin page", role="admin")
+    st.title("Admin")
+    queryplans()
@@ -1,37 +1,30 @@
 import streamlit as st
-from openai import OpenAI
-import plotly.express as exp
+from datetime import date, timedelta
 import app.data.incidents as CyberFuncs
-
-def debug(*args):
-    """
-    Debugging function to print arguments to console.
-    """
-    for arg in args:
-        print("DEBUG: {}".format(arg)) 
+import app.data.schema as Schema
+import app.services.session_service as Sessions
+import app.services.page_session as PageSession
+import app.data.export as Export
+import app.services.figure_cache as FigureCache
+import app.services.downsample as Downsample
+import app.data.snapshot as Snapshot
+import app.data.maintenance as Maintenance
+import app.data.pool as DataPool
+import app.data.pivot as Pivot
+import app.data.bulk as Bulk
+import app.services.profiler as Profiler
+import app.services.assistant as Assistant
+import app.services.digest as Digest
+from app.data.validation import INCIDENT_TYPES, SEVERITIES, INCIDENT_STATUSES as STATUSES
 
 def check_login():
     """
     Check if user is logged in and handle redirection.
     """
-    # 1. Initialize Default State
-    if 'username' not in st.session_state:
-        st.session_state.username = None
-    if 'logged_in' not in st.session_state:
-        st.session_state.logged_in = False
+    PageSession.require_login("the Cyber Analytics dashboard")
     if 'cyberMsgs' not in st.session_state:
         st.session_state.cyberMsgs = [] 
 
-    # 2. The Check
-    if not st.session_state.logged_in:
-        st.warning("Please log in to access the Cyber Analytics dashboard.")
-        
-        # 3. Navigation Button
-        if st.button("Go to Login Page"):
-            st.switch_page("home.py") 
-            
-        st.stop()
-
 def selectcolumn():
     """
     Select a column from the cyber incidents table for analysis.
@@ -42,36 +35,117 @@ def selectcolumn():
     selected_column = st.selectbox("Select Column for Analysis", columns)
     return selected_column
 
-def barchart(data, xAxis: str):
+def selectwindow():
+    """
+    Select the time window for the analysis charts.
+    Returns the ISO start date, or None for all time. Windows inside the current year
+    only read the current year's partition.
+    """
+    windows = {"All time": None, "Year to date": 0, "Last 90 days": 90, "Last 30 days": 30}
+    selected_window = st.selectbox("Time Window", list(windows))
+    today = date.today()
+    if windows[selected_window] is None:
+        return None
+    if windows[selected_window] == 0:
+        return str(date(today.year, 1, 1))
+    return str(today - timedelta(days=windows[selected_window]))
+
+def fetchcharts(column, version, date_from=None) -> dict:
+    """
+    Runs the chart queries concurrently on the data pool, skipping charts already cached.
+    Returns {"breakdown": DataFrame, "timeline": DataFrame} for whatever had to be fetched.
+    """
+    futures = {}
+    key = (column, date_from)
+    # 1. Bar and pie are grouped by the same column, so they share one query
+    if not (FigureCache.contains("incidents_bar", key, version) and FigureCache.contains("incidents_pie", key, version)):
+        futures["breakdown"] = DataPool.submit(CyberFuncs.get_all_incidents, "", column, date_from=date_from)
+    if not FigureCache.contains("incidents_line", ("date", date_from), version):
+        futures["timeline"] = DataPool.submit(CyberFuncs.get_all_incidents, "", "date", date_from=date_from)
+
+    # 2. Join before rendering
+    return DataPool.gather(futures)
+
+def barchart(column: str, version, data, date_from=None):
     """
     Create and display a bar chart using Plotly Express.
+    The figure is reused from the figure cache until the data version changes.
     """
     st.subheader("Breakdown of Incident Types")
 
-    fig = exp.bar(data, x=xAxis,y="COUNT(*)",title="Incident Types Distribution")
-    
+    def build():
+        import plotly.express as exp
+        counts = data.get("breakdown")
+        if counts is None:
+            counts = CyberFuncs.get_all_incidents("", column, date_from=date_from)
+        return exp.bar(counts, x=column, y="COUNT(*)", title="Incident Types Distribution")
+
+    fig = FigureCache.get_figure("incidents_bar", (column, date_from), version, build)
     st.plotly_chart(fig)
 
-def linechart(df):
+def linechart(version, data, date_from=None):
     """
     Creates a line chart and Contains all the dates
     grouped by the no of records in each date.
     """
     st.subheader("Incidents Over Time")
-    date_counts = df['date'].value_counts().sort_index()
-    cntvalues = df['COUNT(*)'].values
-    fig = exp.line(x=date_counts.index, y=cntvalues, labels={'x': 'Date', 'y': 'Number of Incidents'}, title="Incidents Over Time")
+
+    def build():
+        import plotly.express as exp
+        import plotly.graph_objects as go
+        df = data.get("timeline")
+        if df is None:
+            df = CyberFuncs.get_all_incidents("", "date", date_from=date_from)
+        if df.empty:
+            # Nothing in the window (or no incidents yet): an empty chart, not a crash
+            return go.Figure(layout={"title": "Incidents Over Time"})
+        df = df.sort_values("date")
+        # Long histories are reduced to what the chart width can show, keeping spikes
+        dates, counts = Downsample.lttb(df["date"].astype("datetime64[ns]"), df["COUNT(*)"], Downsample.target_points())
+        return exp.line(x=dates, y=counts, labels={'x': 'Date', 'y': 'Number of Incidents'}, title="Incidents Over Time")
+
+    fig = FigureCache.get_figure("incidents_line", ("date", date_from), version, build)
     st.plotly_chart(fig)
 
-def piechart(column)->None:
+def piechart(column, version, data, date_from=None) -> None:
     """
     Creates a pie chart showing the distribution of incident types.
     """
     st.subheader("Incident Types Distribution")
-    data = CyberFuncs.get_all_incidents("",column)
-    incident_counts = data[column].value_counts()
-    cntvalues = data['COUNT(*)'].values
-    fig = exp.pie(values=cntvalues, names=incident_counts.index, title="Incident Types Distribution")
+
+    def build():
+        import plotly.express as exp
+        counts = data.get("breakdown")
+        if counts is None:
+            counts = CyberFuncs.get_all_incidents("", column, date_from=date_from)
+        return exp.pie(values=counts["COUNT(*)"], names=counts[column], title="Incident Types Distribution")
+
+    fig = FigureCache.get_figure("incidents_pie", (column, date_from), version, build)
+    st.plotly_chart(fig)
+
+def heatmap(version, date_from=None) -> None:
+    """
+    Shows a crosstab of two incident columns as a heatmap.
+    The counts come from one grouped SQL query, not from the full table.
+    """
+    st.subheader("Incident Crosstab")
+    columns = ["severity", "status", "incident_type", "month"]
+    left, right = st.columns(2)
+    row_col = left.selectbox("Rows", columns, index=0, key="heatmap_rows")
+    col_col = right.selectbox("Columns", [column for column in columns if column != row_col], key="heatmap_cols")
+
+    def build():
+        import plotly.express as exp
+        matrix = Pivot.pivot("cyber_incidents", row_col, col_col, date_from=date_from)
+        return exp.imshow(
+            matrix,
+            text_auto=True,
+            aspect="auto",
+            labels={"x": col_col, "y": row_col, "color": "Incidents"},
+            title="Incidents by {} and {}".format(row_col, col_col)
+        )
+
+    fig = FigureCache.get_figure("incidents_heatmap", (row_col, col_col, date_from), version, build)
     st.plotly_chart(fig)
 
 def insertincident():
@@ -79,11 +153,10 @@ def insertincident():
     Collect incident details from user input.
     """
     tId = st.text_input("Ticket ID")
-    incidentType = st.selectbox("Incident Type", ("Brute Force", "DDoS", "Data Leak", "Insider Threat", 
-                                 "Malware", "Phishing", "Ransomware", "SQL Injection"))
+    incidentType = st.selectbox("Incident Type", INCIDENT_TYPES)
     date = str(st.date_input("Date"))
-    severity = st.selectbox("Severity", ("Critical", "High", "Low", "Medium"))
-    status = st.selectbox("Status", ("Closed", "Open", "Pending Review", "Resolved", "Under Investigation"))
+    severity = st.selectbox("Severity", SEVERITIES)
+    status = st.selectbox("Status", STATUSES)
     
     return tId, incidentType, severity, status, date
 
@@ -92,11 +165,10 @@ def updateincident():
     Collect incident details for updating from user input.
     """
     tId = st.text_input("Ticket ID to Update")
-    incidentType = st.selectbox("New Incident Type", ("Brute Force", "DDoS", "Data Leak", "Insider Threat", 
-                                 "Malware", "Phishing", "Ransomware", "SQL Injection"))
+    incidentType = st.selectbox("New Incident Type", INCIDENT_TYPES)
     date = str(st.date_input("New Date"))
-    severity = st.selectbox("New Severity", ("Critical", "High", "Low", "Medium"))
-    status = st.selectbox("New Status", ("Closed", "Open", "Pending Review", "Resolved", "Under Investigation"))
+    severity = st.selectbox("New Severity", SEVERITIES)
+    status = st.selectbox("New Status", STATUSES)
     
     return tId, incidentType, severity, status, date
 
@@ -107,12 +179,64 @@ def deleteincident():
     tId = st.text_input("Ticket ID to Delete")
     return tId
 
+def exportincidents():
+    """
+    Offer a filtered CSV/JSON extract of incidents.
+    The file is built from the database only when the button is clicked.
+    """
+    with st.expander("Export incidents"):
+        statuses = st.multiselect("Status", STATUSES, key="export_status")
+        severities = st.multiselect("Severity", SEVERITIES, key="export_severity")
+        fmt = st.selectbox("Format", ("csv", "json"), key="export_format")
+        compress = st.checkbox("Compress (gzip)", key="export_gzip")
+        filters = {"status": statuses or None, "severity": severities or None}
+
+        # Downloads are held in memory by Streamlit, so very large extracts go through the CLI
+        rows = Export.count_export("incidents", filters)
+        tooLarge = rows > Export.EXPORT_MAX_DOWNLOAD_ROWS
+        if tooLarge:
+            st.warning("{} rows is more than a download can hold ({}). Narrow the filters or run "
+                       "`python -m app.data.export incidents`.".format(rows, Export.EXPORT_MAX_DOWNLOAD_ROWS))
+
+        st.download_button(
+            "Download extract",
+            data=lambda: Export.export_file("incidents", fmt, filters, compress=compress),
+            disabled=tooLarge,
+            file_name=Export.export_filename("incidents", fmt, compress),
+            mime="application/gzip" if compress else ("text/csv" if fmt == "csv" else "application/json"),
+        )
+
+def bulkupdate():
+    """
+    Change the status of every incident matching the selected filters in one step.
+    The number of affected incidents is shown before anything is changed.
+    """
+    # 1. Filters
+    incidentTypes = st.multiselect("Incident Types", INCIDENT_TYPES)
+    severities = st.multiselect("Severities", SEVERITIES)
+    statuses = st.multiselect("Current Statuses", STATUSES)
+    newStatus = st.selectbox("New Status", STATUSES, key="bulk_status")
+    filters = {"incident_type": incidentTypes, "severity": severities, "status": statuses}
+
+    if not (incidentTypes or severities or statuses):
+        st.info("Select at least one filter.")
+        return
+
+    # 2. Preview, then confirm
+    affected = Bulk.preview_transition("cyber_incidents", filters, newStatus)
+    st.write("{} incident(s) will be set to '{}'.".format(affected, newStatus))
+    if st.button("Apply to {} incident(s)".format(affected), disabled=affected == 0):
+        changed = Bulk.bulk_transition("cyber_incidents", filters, newStatus)
+        st.success("{} incident(s) set to '{}'.".format(changed, newStatus))
+
 def crud(operation):
     """
     Read, Handle, Create, Update, or Delete operations for Cyber Security Incidents.
     """
     if operation =="Read":
-        st.dataframe(CyberFuncs.get_dataframequery(""))
+        includeArchived = st.checkbox("Include archived incidents")
+        st.dataframe(CyberFuncs.get_dataframequery("", include_archived=includeArchived))
+        exportincidents()
     if operation == "Create":
 
         # Pass the tuple items directly to the insert function for incidents
@@ -138,18 +262,38 @@ def crud(operation):
                 else:
                     st.error("Unable to delete incident '{}'.".format(values))
 
-def Streaming(completion):
+    elif operation == "Bulk Update":
+        bulkupdate()
+
+@st.cache_resource
+def get_client():
+    """
+    Creates the OpenAI client the first time a prompt is sent.
+    openai is only imported here, so pages that never use the assistant don't pay for it.
+    """
+    from openai import OpenAI
+    return OpenAI(api_key = st.secrets['OPENAI_API_KEY'])
+
+def get_backend():
+    """
+    The assistant backend chosen by ASSISTANT_BACKEND (OpenAI by default, or the local echo model).
+    """
+    return Assistant.make_backend(get_client)
+
+def Streaming(job):
     """
-        Explanation: Takes delta time and displays ChatGPT response in small chunks
+        Explanation: Takes the scheduled job's chunks and displays the response in small chunks.
+        If the rerun is interrupted (the user navigated away) the job is cancelled.
     """
     container = st.empty()
     fullReply = ""
     
-    for chunk in completion:
-        delta = chunk.choices[0].delta
-        if delta.content:
-            fullReply += delta.content
+    try:
+        for chunk in job.stream():
+            fullReply += chunk
             container.markdown(fullReply + "▌") # Add cursor effect, character is "Left Hand Block"
+    finally:
+        job.cancel()
     
     # Remove cursor and show final response
     container.markdown(fullReply)
@@ -175,25 +319,32 @@ def AIAssistant():
     DisplayPrevMsgs()
     
     prompt = st.chat_input("Prompt our IT expert (GPT 4.0mini)...")
-    gptMsg = [{"role": "system", "content": "You are an expert in office related cyber incidents. Make sure your responses are not too long"}]
     if prompt:
-        #Save user response
-        st.session_state.cyberMsgs.append({ "role": "user", "content": prompt })
+        # The data digest is only needed once a prompt is sent
+        gptMsg = [{"role": "system", "content": Digest.system_prompt(
+            "You are an expert in office related cyber incidents. Make sure your responses are not too long",
+            ["cyber_incidents", "IT_Tickets"]
+        )}]
+        userMsg = { "role": "user", "content": prompt }
         with st.chat_message("user"): 
             st.markdown(prompt)
         
-        # Call OpenAI API with streaming
-        with st.spinner("Thinking..."):
-            completion = client.chat.completions.create( 
-                model = "gpt-4o-mini",
-                messages = gptMsg + st.session_state.cyberMsgs,
-                stream = True,
+        # Queue the prompt on the shared assistant scheduler and stream the reply
+        try:
+            job = Assistant.get_scheduler().submit(
+                st.session_state.username,
+                gptMsg + st.session_state.cyberMsgs + [userMsg],
+                get_backend(),
             )
-            
-        with st.chat_message("assistant"):
-            fullReply = Streaming(completion)
+            with st.chat_message("assistant"):
+                fullReply = Streaming(job)
+        except (Assistant.AssistantBusy, TimeoutError) as error:
+            # Refused or unanswered prompts stay out of the history
+            st.error(str(error))
+            return
         
-        #Save AI response
+        #Save the prompt and the AI response together
+        st.session_state.cyberMsgs.append(userMsg)
         st.session_state.cyberMsgs.append({ "role": "assistant", "content": fullReply })
 
 def logout():
@@ -202,36 +353,44 @@ def logout():
     """
     st.divider()
     if st.button("Log Out", type="primary"):
-    # 1. Clear session state
+    # 1. Revoke the session token and clear session state
+        Sessions.RevokeSession(st.session_state.get("session_token"))
         st.session_state.logged_in = False
         st.session_state.username = "" 
+        st.session_state.session_token = None
     
     # 2. Redirect immediately
         st.switch_page("home.py")
 
 if __name__ == "__main__":
-    client = OpenAI(api_key = st.secrets['OPENAI_API_KEY'])
-
-
-    check_login()
-    st.title("Data Analysis")
-    analysis,crudop,ai=st.tabs(["Data Analysis","CRUD Operations","AI Assistant"])
-    with analysis:
-        st.subheader("Cyber Security Incidents Analysis Dashboard")
-        column=selectcolumn()
-        data = CyberFuncs.get_all_incidents("",column)
-        print(data)
-        barchart(data, column)
-        piechart(column)
-        linechart(CyberFuncs.get_all_incidents("", "date"))
+    with Profiler.PageProfiler("Cyber_Analytics") as profiler:
+        with profiler.section("startup"):
+            Schema.ensure_schema()
+            Snapshot.start_refresher()
+            Maintenance.start_maintenance()
+        with profiler.section("check_login"):
+            check_login()
+        st.title("Data Analysis")
+        analysis,crudop,ai=st.tabs(["Data Analysis","CRUD Operations","AI Assistant"])
+        with analysis, profiler.section("analysis"):
+            st.subheader("Cyber Security Incidents Analysis Dashboard")
+            column=selectcolumn()
+            date_from = selectwindow()
+            version = Snapshot.analytics_version()
+            data = fetchcharts(column, version, date_from)
+            barchart(column, version, data, date_from)
+            piechart(column, version, data, date_from)
+            linechart(version, data, date_from)
+            heatmap(version, date_from)
         
-    with crudop:
-        st.subheader("Cyber Security Incidents - CRUD Operations")
-        option=st.selectbox("Select Operation", ("Read","Create", "Update", "Delete"), key="cud_select")
-        crud(option)
+        with crudop, profiler.section("crud"):
+            st.subheader("Cyber Security Incidents - CRUD Operations")
+            option=st.selectbox("Select Operation", ("Read","Create", "Update", "Delete", "Bulk Update"), key="cud_select")
+            crud(option)
         
-    with ai:
-        st.subheader("AI Assistant for Cyber Security Incidents")
-        AIAssistant()
+        with ai, profiler.section("ai"):
+            st.subheader("AI Assistant for Cyber Security Incidents")
+            AIAssistant()
+    profiler.panel(st.sidebar)
     st.divider()
-    logout()
\ No newline at end of file
+    logout()
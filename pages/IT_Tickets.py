@@ -1,38 +1,32 @@
 import streamlit as st
 import app.data.tickets as tickets
-import plotly.express as exp
-from openai import OpenAI
+import app.data.schema as Schema
+import app.services.session_service as Sessions
+import app.services.page_session as PageSession
+import app.data.export as Export
+import app.services.figure_cache as FigureCache
+import app.services.downsample as Downsample
+import app.data.snapshot as Snapshot
+import app.data.maintenance as Maintenance
+import app.data.pool as DataPool
+import app.data.pivot as Pivot
+import app.data.bulk as Bulk
+import app.data.aging as Aging
+import app.services.profiler as Profiler
+import app.services.assistant as Assistant
+import app.services.digest as Digest
+from app.data.validation import SUBJECTS, PRIORITIES, TICKET_STATUSES as STATUSES
 from datetime import datetime
 
 
-def debug(*args):
-    """
-    Debugging function to print arguments to console.
-    """
-    for arg in args:
-        print("DEBUG: {}".format(arg)) 
-
 def check_login():
     """
     Check if user is logged in and handle redirection.
     """
-    # 1. Initialize Default State
-    if 'username' not in st.session_state:
-        st.session_state.username = None
-    if 'logged_in' not in st.session_state:
-        st.session_state.logged_in = False
+    PageSession.require_login("the IT Tickets dashboard")
     if 'itMsgs' not in st.session_state:
         st.session_state.itMsgs = [] 
 
-    # 2. The Check
-    if not st.session_state.logged_in:
-        st.warning("Please log in to access the IT Tickets dashboard.")
-        
-        # 3. Navigation Button
-        if st.button("Go to Login Page"):
-            st.switch_page("home.py") 
-        st.stop()
-
 def selectcolumn():
     """
     Select a column from the IT tickets table for analysis.
@@ -43,76 +37,161 @@ def selectcolumn():
     selected_column = st.selectbox("Select Column for Analysis", columns)
     return selected_column
 
-def barchart(data, xAxis: str):
+def fetchcharts(column, version) -> dict:
+    """
+    Fetches the data of the charts not yet in the figure cache, all queries at once.
+    """
+    futures = {}
+    # 1. Bar and pie are grouped by the same column, so they share one query
+    if not (FigureCache.contains("tickets_bar", column, version) and FigureCache.contains("tickets_pie", column, version)):
+        futures["breakdown"] = DataPool.submit(tickets.get_all_tickets, "", column)
+    if not FigureCache.contains("tickets_line", "created_date", version):
+        futures["timeline"] = DataPool.submit(tickets.get_all_tickets, "", "created_date")
+
+    # 2. Join before rendering
+    return DataPool.gather(futures)
+
+def barchart(column: str, version, data):
     """
     Create and display a bar chart using Plotly Express.
+    The figure is reused from the figure cache until the data version changes.
     """
     # Updated text to reflect IT Tickets context
     st.subheader("Breakdown of Ticket Subjects")
 
-    # Updated title to match the dataset (assuming xAxis maps to subject/priority)
-    fig = exp.bar(data, x=xAxis,y="COUNT(*)", title="Ticket Distribution")
-    
+    def build():
+        import plotly.express as exp
+        counts = data.get("breakdown")
+        if counts is None:
+            counts = tickets.get_all_tickets("", column)
+        return exp.bar(counts, x=column, y="COUNT(*)", title="Ticket Distribution")
+
+    fig = FigureCache.get_figure("tickets_bar", column, version, build)
     st.plotly_chart(fig)
 
-def linechart(df):
+def linechart(version, data):
     """
     Creates a line chart and Contains all the dates
     grouped by the no of records in each date.
     """
     st.subheader("Tickets Over Time")
-    
-    # Updated column to 'created_date'
-    date_counts = df['created_date'].value_counts().sort_index()
-    cntvalues= df['COUNT(*)'].values
-    fig = exp.line(
-        x=date_counts.index, 
-        y=cntvalues, 
-        labels={'x': 'Date', 'y': 'Number of Tickets'}, 
-        title="Tickets Over Time"
-    )
+
+    def build():
+        import plotly.express as exp
+        import plotly.graph_objects as go
+        df = data.get("timeline")
+        if df is None:
+            df = tickets.get_all_tickets("", "created_date")
+        if df.empty:
+            # No tickets yet: an empty chart, not a crash
+            return go.Figure(layout={"title": "Tickets Over Time"})
+        df = df.sort_values("created_date")
+        # Long histories are reduced to what the chart width can show, keeping spikes
+        dates, counts = Downsample.lttb(
+            df["created_date"].astype("datetime64[ns]"),
+            df["COUNT(*)"],
+            Downsample.target_points()
+        )
+        return exp.line(
+            x=dates,
+            y=counts,
+            labels={'x': 'Date', 'y': 'Number of Tickets'},
+            title="Tickets Over Time"
+        )
+
+    fig = FigureCache.get_figure("tickets_line", "created_date", version, build)
     st.plotly_chart(fig)
 
-def piechart(column) -> None:
+def piechart(column, version, data) -> None:
     """
     Creates a pie chart showing the distribution of ticket subjects.
     """
     st.subheader("Ticket Subject Distribution")
-    
-    # Use the updated function to get the dataframe
-    data = tickets.get_all_tickets("",column)
-    
-    # 'subject' is the equivalent of 'incident_type' in the new CSV
-    subject_counts = data['subject'].value_counts()
-    cntvalues= data['COUNT(*)'].values   
-    fig = exp.pie(
-        values=cntvalues, 
-        names=subject_counts.index, 
-        title="Ticket Subject Distribution"
-    )
+
+    def build():
+        import plotly.express as exp
+        counts = data.get("breakdown")
+        if counts is None:
+            counts = tickets.get_all_tickets("", column)
+        return exp.pie(
+            values=counts["COUNT(*)"],
+            names=counts[column],
+            title="Ticket Subject Distribution"
+        )
+
+    fig = FigureCache.get_figure("tickets_pie", column, version, build)
     st.plotly_chart(fig)
 
+def heatmap(version) -> None:
+    """
+    Shows a crosstab of two ticket columns as a heatmap.
+    The counts come from one grouped SQL query, not from the full table.
+    """
+    st.subheader("Ticket Crosstab")
+    columns = ["priority", "subject", "status", "month"]
+    left, right = st.columns(2)
+    row_col = left.selectbox("Rows", columns, index=0, key="heatmap_rows")
+    col_col = right.selectbox("Columns", [column for column in columns if column != row_col], key="heatmap_cols")
+
+    def build():
+        import plotly.express as exp
+        matrix = Pivot.pivot("IT_Tickets", row_col, col_col)
+        return exp.imshow(
+            matrix,
+            text_auto=True,
+            aspect="auto",
+            labels={"x": col_col, "y": row_col, "color": "Tickets"},
+            title="Tickets by {} and {}".format(row_col, col_col)
+        )
+
+    fig = FigureCache.get_figure("tickets_heatmap", (row_col, col_col), version, build)
+    st.plotly_chart(fig)
+
+def agingpanel(version) -> None:
+    """
+    Shows how long open tickets have been waiting and how many have breached their SLA.
+    The ages are bucketed by SQLite, so only the grouped counts are loaded.
+    """
+    st.subheader("Ticket Backlog Aging")
+    today = datetime.now().date()
+    aging = Aging.get_aging(today)
+    summary = Aging.breach_summary(aging)
+
+    # 1. Headline numbers
+    total, breached, oldest = st.columns(3)
+    total.metric("Open Tickets", int(summary["open_tickets"].sum()))
+    breached.metric("SLA Breaches", int(summary["breached"].sum()))
+    oldest.metric("Oldest (days)", int(summary["oldest_days"].max()))
+
+    # 2. Age distribution
+    split = st.radio("Split by", ["priority", "status"], horizontal=True, key="aging_split")
+
+    def build():
+        import plotly.express as exp
+        matrix = Aging.age_distribution(aging, split)
+        return exp.bar(
+            matrix.T,
+            labels={"value": "Open Tickets", "index": "Age", "variable": split},
+            title="Open Tickets by Age and {}".format(split)
+        )
+
+    fig = FigureCache.get_figure("tickets_aging", (split, str(today)), version, build)
+    st.plotly_chart(fig)
+
+    # 3. SLA breaches per priority
+    st.dataframe(summary, hide_index=True)
+
 def insertticket():
     """
     Collect ticket details from user input based on CSV values.
     """
     ticket_id = st.text_input("Ticket ID")
     
-    subject_options = (
-        "Software Installation Request", "Password Reset Request", 
-        "VPN Connection Failed", "Mouse/Keyboard Malfunction", 
-        "Laptop Screen Flickering", "Printer Jammed", 
-        "Wi-Fi Access Issue", "Blue Screen Error", 
-        "System Slow Performance", "Access to Shared Drive Denied", 
-        "Monitor Display Issue", "Email Not Syncing"
-    )
-    subject = st.selectbox("Subject", subject_options)
+    subject = st.selectbox("Subject", SUBJECTS)
     
-    priority_options = ("Critical", "High", "Medium", "Low")
-    priority = st.selectbox("Priority", priority_options)
+    priority = st.selectbox("Priority", PRIORITIES)
     
-    status_options = ("Closed", "In Progress", "Open", "Pending User Action", "Resolved")
-    status = st.selectbox("Status", status_options)
+    status = st.selectbox("Status", STATUSES)
     
     created_date = st.date_input("Date")
     
@@ -126,21 +205,11 @@ def updateticket():
     """
     ticket_id = st.text_input("Ticket ID to Update")
     
-    subject_options = (
-        "Software Installation Request", "Password Reset Request", 
-        "VPN Connection Failed", "Mouse/Keyboard Malfunction", 
-        "Laptop Screen Flickering", "Printer Jammed", 
-        "Wi-Fi Access Issue", "Blue Screen Error", 
-        "System Slow Performance", "Access to Shared Drive Denied", 
-        "Monitor Display Issue", "Email Not Syncing"
-    )
-    subject = st.selectbox("New Subject", subject_options)
+    subject = st.selectbox("New Subject", SUBJECTS)
     
-    priority_options = ("Critical", "High", "Medium", "Low")
-    priority = st.selectbox("New Priority", priority_options)
+    priority = st.selectbox("New Priority", PRIORITIES)
     
-    status_options = ("Closed", "In Progress", "Open", "Pending User Action", "Resolved")
-    status = st.selectbox("New Status", status_options)
+    status = st.selectbox("New Status", STATUSES)
     
     created_date = st.date_input("New Date")
     
@@ -155,12 +224,98 @@ def deleteticket():
     ticket_id = st.text_input("Ticket ID to Delete")
     return ticket_id
 
+def exporttickets():
+    """
+    Offer a filtered CSV/JSON extract of tickets.
+    The file is built from the database only when the button is clicked.
+    """
+    with st.expander("Export tickets"):
+        statuses = st.multiselect("Status", STATUSES, key="export_status")
+        priorities = st.multiselect("Priority", PRIORITIES, key="export_priority")
+        fmt = st.selectbox("Format", ("csv", "json"), key="export_format")
+        compress = st.checkbox("Compress (gzip)", key="export_gzip")
+        filters = {"status": statuses or None, "priority": priorities or None}
+
+        # Downloads are held in memory by Streamlit, so very large extracts go through the CLI
+        rows = Export.count_export("tickets", filters)
+        tooLarge = rows > Export.EXPORT_MAX_DOWNLOAD_ROWS
+        if tooLarge:
+            st.warning("{} rows is more than a download can hold ({}). Narrow the filters or run "
+                       "`python -m app.data.export tickets`.".format(rows, Export.EXPORT_MAX_DOWNLOAD_ROWS))
+
+        st.download_button(
+            "Download extract",
+            data=lambda: Export.export_file("tickets", fmt, filters, compress=compress),
+            disabled=tooLarge,
+            file_name=Export.export_filename("tickets", fmt, compress),
+            mime="application/gzip" if compress else ("text/csv" if fmt == "csv" else "application/json"),
+        )
+
+def workqueue():
+    """
+    Shows the next ticket in the queue and the tickets claimed by the current user.
+    Claims go through the database, so two technicians never get the same ticket.
+    """
+    user = st.session_state.username
+
+    # 1. Head of the queue
+    head = tickets.next_ticket()
+    if head is None:
+        st.info("The queue is empty.")
+    else:
+        st.write("Next ticket: **{}** - {} ({}, opened {})".format(
+            head["ticket_id"], head["subject"], head["priority"], head["created_date"]
+        ))
+        if st.button("Claim next ticket"):
+            claimed = tickets.claim_next(user)
+            if claimed:
+                st.success("Ticket '{}' assigned to you.".format(claimed["ticket_id"]))
+            else:
+                st.warning("Another technician claimed the last open ticket.")
+
+    # 2. Tickets this user is working on
+    st.subheader("My Tickets")
+    mine = tickets.claimed_tickets(user)
+    st.dataframe(mine)
+    if not mine.empty:
+        ticket_id = st.selectbox("Ticket to release", mine["ticket_id"])
+        if st.button("Release"):
+            if tickets.release(ticket_id, user):
+                st.success("Ticket '{}' returned to the queue.".format(ticket_id))
+            else:
+                st.error("Unable to release ticket '{}'.".format(ticket_id))
+
+def bulkupdate():
+    """
+    Change the status of every ticket matching the selected filters in one step.
+    The number of affected tickets is shown before anything is changed.
+    """
+    # 1. Filters
+    subjects = st.multiselect("Subjects", SUBJECTS)
+    priorities = st.multiselect("Priorities", PRIORITIES)
+    statuses = st.multiselect("Current Statuses", STATUSES)
+    new_status = st.selectbox("New Status", STATUSES, key="bulk_status")
+    filters = {"subject": subjects, "priority": priorities, "status": statuses}
+
+    if not (subjects or priorities or statuses):
+        st.info("Select at least one filter.")
+        return
+
+    # 2. Preview, then confirm
+    affected = Bulk.preview_transition("IT_Tickets", filters, new_status)
+    st.write("{} ticket(s) will be set to '{}'.".format(affected, new_status))
+    if st.button("Apply to {} ticket(s)".format(affected), disabled=affected == 0):
+        changed = Bulk.bulk_transition("IT_Tickets", filters, new_status)
+        st.success("{} ticket(s) set to '{}'.".format(changed, new_status))
+
 def crud(operation):
     """
     Read, Handle, Create, Update, or Delete operations for IT Tickets.
     """
     if operation =="Read":
-        st.dataframe(tickets.get_tickets_dataframe(""))
+        include_archived = st.checkbox("Include archived tickets")
+        st.dataframe(tickets.get_tickets_dataframe("", include_archived=include_archived))
+        exporttickets()
     if operation == "Create":
 
         # Pass the tuple items directly to the insert function for tickets
@@ -186,18 +341,41 @@ def crud(operation):
             else:
                 st.error("Unable to delete ticket '{}'.".format(values))
 
-def Streaming(completion):
+    elif operation == "Bulk Update":
+        bulkupdate()
+
+    elif operation == "Work Queue":
+        workqueue()
+
+@st.cache_resource
+def get_client():
+    """
+    Creates the OpenAI client the first time a prompt is sent.
+    openai is only imported here, so pages that never use the assistant don't pay for it.
+    """
+    from openai import OpenAI
+    return OpenAI(api_key = st.secrets['OPENAI_API_KEY'])
+
+def get_backend():
+    """
+    The assistant backend chosen by ASSISTANT_BACKEND (OpenAI by default, or the local echo model).
+    """
+    return Assistant.make_backend(get_client)
+
+def Streaming(job):
     """
-        Explanation: Takes delta time and displays ChatGPT response in small chunks
+        Explanation: Takes the scheduled job's chunks and displays the response in small chunks.
+        If the rerun is interrupted (the user navigated away) the job is cancelled.
     """
     container = st.empty()
     fullReply = ""
     
-    for chunk in completion:
-        delta = chunk.choices[0].delta
-        if delta.content:
-            fullReply += delta.content
+    try:
+        for chunk in job.stream():
+            fullReply += chunk
             container.markdown(fullReply + "▌") # Add cursor effect, character is "Left Hand Block"
+    finally:
+        job.cancel()
     
     # Remove cursor and show final response
     container.markdown(fullReply)
@@ -221,25 +399,32 @@ def AIAssistant():
     DisplayPrevMsgs()
     
     prompt = st.chat_input("Prompt our IT expert (GPT 4.0mini)...")
-    gptMsg = [{"role": "system", "content": "You are an IT expert, you hold knowledge specialising in office related IT incidents. Make sure your responses are not too long"}]
     if prompt:
-        #Save user response
-        st.session_state.itMsgs.append({ "role": "user", "content": prompt })
+        # The data digest is only needed once a prompt is sent
+        gptMsg = [{"role": "system", "content": Digest.system_prompt(
+            "You are an IT expert, you hold knowledge specialising in office related IT incidents. Make sure your responses are not too long",
+            ["IT_Tickets", "cyber_incidents"]
+        )}]
+        userMsg = { "role": "user", "content": prompt }
         with st.chat_message("user"): 
             st.markdown(prompt)
         
-        # Call OpenAI API with streaming
-        with st.spinner("Thinking..."):
-            completion = client.chat.completions.create( 
-                model = "gpt-4o-mini",
-                messages = gptMsg + st.session_state.itMsgs,
-                stream = True,
+        # Queue the prompt on the shared assistant scheduler and stream the reply
+        try:
+            job = Assistant.get_scheduler().submit(
+                st.session_state.username,
+                gptMsg + st.session_state.itMsgs + [userMsg],
+                get_backend(),
             )
-            
-        with st.chat_message("assistant"):
-            fullReply = Streaming(completion)
+            with st.chat_message("assistant"):
+                fullReply = Streaming(job)
+        except (Assistant.AssistantBusy, TimeoutError) as error:
+            # Refused or unanswered prompts stay out of the history
+            st.error(str(error))
+            return
         
-        #Save AI response
+        #Save the prompt and the AI response together
+        st.session_state.itMsgs.append(userMsg)
         st.session_state.itMsgs.append({ "role": "assistant", "content": fullReply })
 
 def logout():
@@ -248,31 +433,42 @@ def logout():
     """
     st.divider()
     if st.button("Log Out", type="primary"):
-    # 1. Clear session state
+    # 1. Revoke the session token and clear session state
+        Sessions.RevokeSession(st.session_state.get("session_token"))
         st.session_state.logged_in = False
         st.session_state.username = "" 
+        st.session_state.session_token = None
     
     # 2. Redirect immediately
         st.switch_page("home.py")
 
 if __name__ == "__main__": 
-    client = OpenAI(api_key = st.secrets['OPENAI_API_KEY'])
-    check_login()
-    st.title("IT Tickets Dashboard")
-    analysis,crudop,ai = st.tabs(["Data Analysis","CRUD Operations","AI Assistant"])
-    with analysis:
-        st.subheader("IT Tickets Analysis Dashboard")
-        column=selectcolumn()
-        data=tickets.get_all_tickets("",column)
-        barchart(data,column)
-        linechart(tickets.get_all_tickets("",column))
-        piechart(column)
-    with crudop:
-        st.subheader("Manage IT Tickets")
-        operation = st.selectbox("Select Operation", ["Read", "Create", "Update", "Delete"])
-        crud(operation)
-    with ai:
-        st.subheader("IT Support AI Assistant")
-        AIAssistant()
+    with Profiler.PageProfiler("IT_Tickets") as profiler:
+        with profiler.section("startup"):
+            Schema.ensure_schema()
+            Snapshot.start_refresher()
+            Maintenance.start_maintenance()
+        with profiler.section("check_login"):
+            check_login()
+        st.title("IT Tickets Dashboard")
+        analysis,crudop,ai = st.tabs(["Data Analysis","CRUD Operations","AI Assistant"])
+        with analysis, profiler.section("analysis"):
+            st.subheader("IT Tickets Analysis Dashboard")
+            column=selectcolumn()
+            version = Snapshot.analytics_version()
+            data = fetchcharts(column, version)
+            barchart(column, version, data)
+            linechart(version, data)
+            piechart(column, version, data)
+            heatmap(version)
+            agingpanel(version)
+        with crudop, profiler.section("crud"):
+            st.subheader("Manage IT Tickets")
+            operation = st.selectbox("Select Operation", ["Read", "Create", "Update", "Delete", "Bulk Update", "Work Queue"])
+            crud(operation)
+        with ai, profiler.section("ai"):
+            st.subheader("IT Support AI Assistant")
+            AIAssistant()
+    profiler.panel(st.sidebar)
     st.divider()
-    logout()       
\ No newline at end of file
+    logout()       
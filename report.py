@@ -0,0 +1,193 @@
+import argparse
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+import pandas as pd
+import app.data.partitions as Partitions
+from app.data.changes import latest_seq
+from app.data.db import DB_PATH, connect_readonly
+from app.data.schema import ensure_schema
+
+# Headless version of the analysis tabs, for cron:
+#     python report.py                       (CSV, JSON and HTML into reports/)
+#     python report.py --format html --out /srv/reports
+# Each source table (every incidents partition, and IT_Tickets) is grouped once by all the
+# dashboard columns together. Those counts are cached per table with the change_log sequence
+# they were computed at, and only tables changed since then are read again.
+
+CACHE_DIR = Path("DATA") / "report_cache"
+FORMATS = ("csv", "json", "html")
+
+# Report -> (logical table, columns grouped together, date column)
+REPORTS = {
+    "incidents": ("cyber_incidents", ["incident_type", "severity", "status", "date"], "date"),
+    "tickets": ("IT_Tickets", ["subject", "priority", "status", "created_date"], "created_date"),
+}
+
+def source_tables(conn, table):
+    """Physical tables behind a logical table: one per incidents partition, or the table itself."""
+    if table == Partitions.VIEW_NAME:
+        return [Partitions.partition_name(year) for year in Partitions.list_partitions(conn)]
+    return [table]
+
+def changed_sources(conn, table, since_seq):
+    """
+    Physical tables changed after since_seq according to change_log, or None if the log has
+    been pruned past since_seq.
+    """
+    oldest = conn.execute("SELECT MIN(seq) FROM change_log").fetchone()[0]
+    if oldest is None and latest_seq(conn) > since_seq:
+        return None
+    if oldest is not None and oldest > since_seq + 1:
+        return None
+
+    if table != Partitions.VIEW_NAME:
+        row = conn.execute(
+            "SELECT 1 FROM change_log WHERE seq > ? AND table_name = ? LIMIT 1", (since_seq, table)
+        ).fetchone()
+        return {table} if row else set()
+
+    conn.create_function("partition_year", 1, Partitions.partition_year)
+    rows = conn.execute("""
+        SELECT partition_year(json_extract(new_values, '$.date')) FROM change_log
+        WHERE seq > ? AND table_name = ? AND new_values IS NOT NULL
+        UNION
+        SELECT partition_year(json_extract(old_values, '$.date')) FROM change_log
+        WHERE seq > ? AND table_name = ? AND old_values IS NOT NULL
+    """, (since_seq, table, since_seq, table)).fetchall()
+    return {Partitions.partition_name(year) for (year,) in rows}
+
+def load_cached(source):
+    """Cached (seq, counts DataFrame) for a physical table, or None."""
+    path = CACHE_DIR / "{}.json".format(source)
+    if not path.exists():
+        return None
+    cached = json.loads(path.read_text())
+    return cached["seq"], pd.DataFrame(cached["rows"], columns=cached["columns"])
+
+def store_cached(source, seq, counts) -> None:
+    """Writes a physical table's counts to the cache."""
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    path = CACHE_DIR / "{}.json".format(source)
+    payload = {"seq": seq, "columns": list(counts.columns), "rows": counts.values.tolist()}
+    path.write_text(json.dumps(payload, default=str))
+
+def source_counts(conn, source, columns):
+    """One pass over a physical table: row counts grouped by every report column at once."""
+    group = ", ".join(columns)
+    return pd.read_sql_query("SELECT {0}, COUNT(*) AS count FROM {1} GROUP BY {0}".format(group, source), conn)
+
+def combined_counts(conn, table, columns, seq):
+    """
+    Counts for a logical table, reusing the cached counts of physical tables that haven't changed.
+    Returns (counts, tables recomputed, tables from cache).
+    """
+    frames = []
+    recomputed = reused = 0
+    for source in source_tables(conn, table):
+        cached = load_cached(source)
+        if cached is not None:
+            changed = changed_sources(conn, table, cached[0])
+            if changed is not None and source not in changed:
+                frames.append(cached[1])
+                reused += 1
+                continue
+
+        counts = source_counts(conn, source, columns)
+        store_cached(source, seq, counts)
+        frames.append(counts)
+        recomputed += 1
+
+    if not frames:
+        return pd.DataFrame(columns=columns + ["count"]), recomputed, reused
+    return pd.concat(frames, ignore_index=True), recomputed, reused
+
+def aggregates(counts, columns, date_column) -> dict:
+    """
+    The same breakdowns as the analysis tabs: one count per value of each column, plus the
+    per-date series, all rolled up from the combined counts without touching the database.
+    """
+    results = {}
+    for column in columns:
+        rolled = counts.groupby(column, dropna=False)["count"].sum().reset_index()
+        if column == date_column:
+            rolled = rolled.sort_values(column)
+        else:
+            rolled = rolled.sort_values("count", ascending=False)
+        results["by_" + column] = rolled.reset_index(drop=True)
+    return results
+
+def write_reports(results, out_dir, formats) -> list:
+    """
+    Writes the aggregates as one CSV per breakdown, one JSON document and one HTML page.
+    Returns the paths written.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    written = []
+
+    # 1. CSV: one file per breakdown
+    if "csv" in formats:
+        for report, breakdowns in results.items():
+            for name, frame in breakdowns.items():
+                path = out_dir / "{}_{}.csv".format(report, name)
+                frame.to_csv(path, index=False)
+                written.append(path)
+
+    # 2. JSON: everything in one document
+    if "json" in formats:
+        path = out_dir / "report.json"
+        document = {
+            report: {name: frame.to_dict("records") for name, frame in breakdowns.items()}
+            for report, breakdowns in results.items()
+        }
+        path.write_text(json.dumps(document, indent=2, default=str))
+        written.append(path)
+
+    # 3. HTML: one page of tables
+    if "html" in formats:
+        path = out_dir / "report.html"
+        sections = ["<h1>Platform report - {}</h1>".format(datetime.now().strftime("%Y-%m-%d %H:%M"))]
+        for report, breakdowns in results.items():
+            sections.append("<h2>{}</h2>".format(report.title()))
+            for name, frame in breakdowns.items():
+                sections.append("<h3>{}</h3>".format(name.replace("_", " ")))
+                sections.append(frame.to_html(index=False))
+        path.write_text("<html><body>\n{}\n</body></html>\n".format("\n".join(sections)))
+        written.append(path)
+
+    return written
+
+def build_report(db_path=DB_PATH) -> dict:
+    """
+    Computes every report's breakdowns.
+    Returns {report: {breakdown name: DataFrame}} plus prints how much came from the cache.
+    """
+    conn = connect_readonly(db_path)
+    try:
+        # 1. Sequence number first: changes made while we read are picked up next run
+        seq = latest_seq(conn)
+        results = {}
+        for report, (table, columns, date_column) in REPORTS.items():
+            counts, recomputed, reused = combined_counts(conn, table, columns, seq)
+            print("{}: {} table(s) recomputed, {} from cache".format(report, recomputed, reused))
+            results[report] = aggregates(counts, columns, date_column)
+        return results
+    finally:
+        conn.close()
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Write the analytics reports without opening the dashboards.")
+    parser.add_argument("--out", default="reports", help="output directory (default: reports)")
+    parser.add_argument("--format", action="append", choices=FORMATS, help="output format (default: all)")
+    args = parser.parse_args(argv)
+
+    ensure_schema()
+    started = time.monotonic()
+    written = write_reports(build_report(), args.out, args.format or FORMATS)
+    print("Wrote {} file(s) to {} in {:.3f}s".format(len(written), args.out, time.monotonic() - started))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import sys
+from pathlib import Path
+import pytest
+
+# Modules use paths relative to the working directory (DATA/...), as under streamlit run
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """
+    An empty, fully migrated platform database in a temporary DATA directory.
+    The working directory is moved there for the test; returns the open connection.
+    """
+    import app.data.schema as Schema
+    import app.data.snapshot as Snapshot
+    from app.data.db import connect_database
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "DATA").mkdir()
+    monkeypatch.setattr(Schema, "_bootstrapped", False)
+    monkeypatch.setattr(Snapshot, "_last_checked", 0.0)
+    monkeypatch.setattr(Snapshot, "_copied_version", None)
+    Schema.ensure_schema()
+
+    conn = connect_database()
+    yield conn
+    conn.close()
+
+@pytest.fixture
+def add_incidents(db):
+    """Inserts incidents given as (id, date, incident_type, severity, status) tuples."""
+    import app.data.incidents as Incidents
+
+    def add(rows):
+        keys = ("id", "date", "incident_type", "severity", "status")
+        Incidents.upsert_incidents(db.cursor(), [dict(zip(keys, row)) for row in rows])
+        db.commit()
+    return add
+
+@pytest.fixture
+def add_tickets(db):
+    """Inserts tickets given as (ticket_id, subject, priority, status, created_date) tuples."""
+    import app.data.tickets as Tickets
+
+    def add(rows):
+        keys = ("ticket_id", "subject", "priority", "status", "created_date")
+        Tickets.upsert_tickets(db.cursor(), [dict(zip(keys, row)) for row in rows])
+        db.commit()
+    return add
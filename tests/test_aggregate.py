@@ -0,0 +1,27 @@
+import itertools
+import app.data.aggregate as Aggregate
+from app.data.db import DB_PATH
+from app.data.validation import INCIDENT_TYPES, SEVERITIES, INCIDENT_STATUSES
+
+def test_parallel_and_inline_counts_match(add_incidents, monkeypatch):
+    # 3 yearly partitions, split into many small rowid ranges
+    values = itertools.cycle(itertools.product(INCIDENT_TYPES, SEVERITIES, INCIDENT_STATUSES))
+    add_incidents([
+        (number, "{}-{:02d}-15".format(2023 + number % 3, 1 + number % 12)) + next(values)
+        for number in range(1, 301)
+    ])
+    monkeypatch.setattr(Aggregate, "RANGE_ROWS", 25)
+    monkeypatch.setattr(Aggregate, "AGGREGATE_WORKERS", 2)
+    monkeypatch.setattr(Aggregate, "_executor", None)
+
+    try:
+        for dimensions, filters in [(["severity", "status"], None), (["month"], {"severity": ["High", "Low"]})]:
+            args = ("cyber_incidents", dimensions, filters, "2023-06-01", "2025-06-30", DB_PATH)
+            inline = Aggregate.aggregate(*args, parallel=False)
+            parallel = Aggregate.aggregate(*args, parallel=True)
+            assert inline["count"].sum() > 0
+            assert Aggregate._executor is not None
+            assert inline.sort_values(dimensions).values.tolist() == parallel.sort_values(dimensions).values.tolist()
+    finally:
+        if Aggregate._executor is not None:
+            Aggregate._executor.shutdown()
@@ -0,0 +1,44 @@
+from datetime import date
+import app.data.aging as Aging
+
+AS_OF = date(2024, 3, 31)
+
+def test_buckets_and_breaches(db, add_tickets):
+    add_tickets([
+        ("TKT-1", "Printer Jammed", "Critical", "Open", "2024-03-31"),         # 0 days
+        ("TKT-2", "Printer Jammed", "Critical", "Open", "2024-03-29"),         # 2 days, breached
+        ("TKT-3", "Printer Jammed", "High", "In Progress", "2024-03-28"),      # 3 days
+        ("TKT-4", "Printer Jammed", "Low", "Pending User Action", "2024-03-16"),  # 15 days, breached
+        ("TKT-5", "Printer Jammed", "Low", "Open", "2024-01-01"),              # 90 days, breached
+        ("TKT-6", "Printer Jammed", "Low", "Resolved", "2023-01-01"),          # closed, not aged
+        ("TKT-7", "Printer Jammed", "Medium", "Open", "2024-04-05"),           # future date counts as 0
+    ])
+    aging = Aging.compute_aging(db, AS_OF)
+    rows = {
+        (row.priority, row.status, row.bucket): (row.tickets, row.breached, row.oldest_days)
+        for row in aging.itertuples()
+    }
+    assert rows == {
+        ("Critical", "Open", "0-1 days"): (1, 0, 0),
+        ("Critical", "Open", "2-3 days"): (1, 1, 2),
+        ("High", "In Progress", "2-3 days"): (1, 0, 3),
+        ("Low", "Pending User Action", "15-30 days"): (1, 1, 15),
+        ("Low", "Open", "31+ days"): (1, 1, 90),
+        ("Medium", "Open", "0-1 days"): (1, 0, 0),
+    }
+
+    matrix = Aging.age_distribution(aging)
+    assert matrix.index.tolist() == ["Critical", "High", "Medium", "Low"]
+    assert matrix.columns.tolist() == [label for label, _ in Aging.AGE_BUCKETS]
+    assert matrix.loc["Low"].tolist() == [0, 0, 0, 0, 1, 1]
+    assert Aging.age_distribution(aging, by="status").loc["Open"].sum() == 4
+
+    summary = Aging.breach_summary(aging).set_index("priority")
+    assert summary.loc["Critical"].tolist() == [1, 2, 1, 2]
+    assert summary.loc["Low"].tolist() == [14, 2, 2, 90]
+    assert summary.loc["High", "breached"] == 0
+
+def test_aging_query_reads_only_the_covering_index(db):
+    sql, params = Aging.aging_query(AS_OF)
+    plan = " ".join(row[-1] for row in db.execute("EXPLAIN QUERY PLAN " + sql, params))
+    assert "COVERING INDEX idx_it_tickets_aging" in plan
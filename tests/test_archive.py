@@ -0,0 +1,73 @@
+import sqlite3
+import pytest
+import app.data.archive as Archive
+import app.data.incidents as Incidents
+import app.data.tickets as Tickets
+from app.data.frames import concat_chunks
+
+@pytest.fixture
+def old_rows(add_incidents, add_tickets, monkeypatch):
+    monkeypatch.setattr(Archive, "ARCHIVE_PAUSE_SECONDS", 0)
+    add_incidents([
+        (1, "2020-01-01", "Phishing", "High", "Closed"),
+        (2, "2021-01-01", "Malware", "Low", "Resolved"),
+        (3, "2021-06-01", "Malware", "Low", "Resolved"),
+        (4, "2021-01-01", "Malware", "Low", "Open"),
+        (5, "2099-01-01", "Malware", "Low", "Closed"),
+    ])
+    add_tickets([
+        ("TKT-1", "Printer Jammed", "Low", "Resolved", "2020-01-01"),
+        ("TKT-2", "Printer Jammed", "Low", "Open", "2020-01-01"),
+    ])
+
+def ids(db, table):
+    return sorted(row[0] for row in db.execute("SELECT * FROM {}".format(table)))
+
+def test_run_archival_moves_old_finished_rows(db, old_rows):
+    results = Archive.run_archival(days=30, batch_rows=2)
+    assert results["cyber_incidents"] == 3
+    assert results["IT_Tickets"] == 1
+
+    assert ids(db, "cyber_incidents") == [4, 5]
+    assert ids(db, "cyber_incidents_archive") == [1, 2, 3]
+    assert [row[0] for row in db.execute("SELECT ticket_id FROM IT_Tickets")] == ["TKT-2"]
+    assert [row[0] for row in db.execute("SELECT ticket_id FROM IT_Tickets_archive")] == ["TKT-1"]
+
+    # Archived rows are still readable on request
+    assert sorted(concat_chunks(Incidents.iter_incidents(include_archived=True))["id"]) == [1, 2, 3, 4, 5]
+    assert len(Tickets.get_tickets_dataframe(include_archived=True)) == 2
+
+    assert Archive.run_archival(days=30, batch_rows=2)["cyber_incidents"] == 0
+
+def test_archive_batch_respects_the_batch_size(db, old_rows):
+    db.isolation_level = None
+    assert Archive.archive_batch(db, "cyber_incidents", "2030-01-01", batch_rows=2) == 2
+    assert Archive.archive_batch(db, "cyber_incidents", "2030-01-01", batch_rows=2) == 1
+    assert Archive.archive_batch(db, "cyber_incidents", "2030-01-01", batch_rows=2) == 0
+
+def test_archived_ids_stay_reserved(db, old_rows):
+    Archive.run_archival(days=30)
+
+    # A re-sent archived row is skipped rather than brought back to life
+    assert Incidents.upsert_incidents(db.cursor(), [
+        {"id": 1, "date": "2020-01-01", "incident_type": "Phishing", "severity": "High", "status": "Open"},
+    ]) == 0
+    assert Tickets.upsert_tickets(db.cursor(), [
+        {"ticket_id": "TKT-1", "subject": "Printer Jammed", "priority": "Low", "status": "Open",
+         "created_date": "2020-01-01"},
+    ]) == 0
+    db.commit()
+    assert ids(db, "cyber_incidents") == [4, 5]
+
+    with pytest.raises(sqlite3.IntegrityError):
+        Tickets.insert_ticket("TKT-1", "Printer Jammed", "Low", "Open", "2020-01-01", "2020-01-01 00:00:00")
+
+def test_incremental_vacuum_returns_free_pages(db, old_rows):
+    db.isolation_level = None
+    assert Archive.enable_incremental_vacuum(db)
+    assert not Archive.enable_incremental_vacuum(db)
+    db.execute("CREATE TABLE filler (blob BLOB)")
+    db.execute("INSERT INTO filler SELECT randomblob(4000) FROM (SELECT 1 UNION SELECT 2 UNION SELECT 3)")
+    db.execute("DROP TABLE filler")
+    assert Archive.incremental_vacuum(db, step_pages=1) > 0
+    assert db.execute("PRAGMA freelist_count").fetchone()[0] == 0
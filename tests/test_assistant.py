@@ -0,0 +1,69 @@
+import threading
+import time
+import pytest
+from app.services.assistant import AssistantBusy, AssistantScheduler, Backend, EchoBackend
+
+def prompt(text):
+    return [{"role": "user", "content": text}]
+
+class GatedBackend(Backend):
+    """Echo that holds every reply until the gate opens, recording the order replies start in."""
+
+    def __init__(self):
+        self.gate = threading.Event()
+        self.started = []
+
+    def stream(self, messages, cancelled, timeout):
+        self.started.append(messages[-1]["content"])
+        self.gate.wait(timeout)
+        yield messages[-1]["content"]
+
+def test_backend_is_abstract():
+    with pytest.raises(TypeError):
+        Backend()
+
+def test_echo_reply_is_streamed():
+    scheduler = AssistantScheduler(max_concurrent=2)
+    job = scheduler.submit("ann", prompt("hello there"), EchoBackend())
+    assert "".join(job.stream()) == "Echo: hello there "
+
+def test_pending_limit_per_user():
+    scheduler = AssistantScheduler(max_concurrent=1, max_pending_per_user=2)
+    backend = GatedBackend()
+    first = scheduler.submit("ann", prompt("1"), backend)
+    second = scheduler.submit("ann", prompt("2"), backend)
+    with pytest.raises(AssistantBusy):
+        scheduler.submit("ann", prompt("3"), backend)
+
+    # Other users are not affected, and the slot frees up once a reply is done
+    other = scheduler.submit("bob", prompt("b"), backend)
+    backend.gate.set()
+    assert list(first.stream()) == ["1"]
+    assert list(second.stream()) == ["2"]
+    assert list(other.stream()) == ["b"]
+    assert list(scheduler.submit("ann", prompt("4"), backend).stream()) == ["4"]
+
+def test_users_are_served_round_robin():
+    scheduler = AssistantScheduler(max_concurrent=1, max_pending_per_user=5)
+    backend = GatedBackend()
+    jobs = [scheduler.submit("ann", prompt("a1"), backend)]
+    while not backend.started:
+        time.sleep(0.01)
+
+    # a1 is running; ann's burst must not hold bob up
+    jobs += [scheduler.submit("ann", prompt(text), backend) for text in ("a2", "a3")]
+    jobs.append(scheduler.submit("bob", prompt("b1"), backend))
+    backend.gate.set()
+    for job in jobs:
+        list(job.stream())
+    assert backend.started == ["a1", "a2", "b1", "a3"]
+
+def test_timeout_and_cancel():
+    scheduler = AssistantScheduler(max_concurrent=1, timeout=0.2)
+    slow = scheduler.submit("ann", prompt("one two three four five"), EchoBackend(delay=0.1))
+    with pytest.raises(TimeoutError):
+        list(slow.stream())
+
+    job = scheduler.submit("bob", prompt("x " * 50), EchoBackend(delay=0.01))
+    job.cancel()
+    assert len(list(job.stream())) < 50
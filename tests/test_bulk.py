@@ -0,0 +1,48 @@
+import pytest
+import app.data.bulk as Bulk
+import app.data.changes as Changes
+
+@pytest.fixture
+def incidents(add_incidents):
+    add_incidents([
+        (1, "2023-05-01", "Phishing", "High", "Open"),
+        (2, "2024-05-01", "Phishing", "Low", "Open"),
+        (3, "2025-05-01", "Phishing", "High", "Closed"),
+        (4, "2025-06-01", "Malware", "High", "Open"),
+    ])
+
+def statuses(db):
+    return dict(db.execute("SELECT id, status FROM cyber_incidents"))
+
+def test_preview_matches_transition_across_partitions(db, incidents):
+    filters = {"incident_type": "Phishing"}
+    assert Bulk.preview_transition("cyber_incidents", filters) == 3
+    assert Bulk.preview_transition("cyber_incidents", filters, "Closed") == 2
+
+    seq = Changes.latest_seq()
+    assert Bulk.bulk_transition("cyber_incidents", filters, "Closed") == 2
+    assert statuses(db) == {1: "Closed", 2: "Closed", 3: "Closed", 4: "Open"}
+    # Every changed row is still captured
+    assert sorted(change["key"] for change in Changes.changes_since(seq)) == ["1", "2"]
+
+def test_date_range_limits_the_transition(db, incidents):
+    assert Bulk.bulk_transition("cyber_incidents", {"severity": "High"}, "Resolved", date_from="2025-01-01") == 2
+    assert statuses(db) == {1: "Open", 2: "Open", 3: "Resolved", 4: "Resolved"}
+
+def test_tickets(db, add_tickets):
+    add_tickets([
+        ("TKT-1", "Printer Jammed", "Low", "Open", "2024-01-01"),
+        ("TKT-2", "Printer Jammed", "Low", "Open", "2024-01-02"),
+        ("TKT-3", "Printer Jammed", "High", "Open", "2024-01-03"),
+    ])
+    assert Bulk.bulk_transition("IT_Tickets", {"priority": ["Low"]}, "Resolved") == 2
+    assert db.execute("SELECT COUNT(*) FROM IT_Tickets WHERE status = 'Resolved'").fetchone()[0] == 2
+
+def test_rejected_transitions(db, incidents):
+    with pytest.raises(ValueError):
+        Bulk.bulk_transition("cyber_incidents", {}, "Closed")
+    with pytest.raises(ValueError):
+        Bulk.bulk_transition("cyber_incidents", {"severity": "High"}, "Done")
+    with pytest.raises(ValueError):
+        Bulk.preview_transition("cyber_incidents", {"owner": "ann"})
+    assert statuses(db) == {1: "Open", 2: "Open", 3: "Closed", 4: "Open"}
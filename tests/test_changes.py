@@ -0,0 +1,36 @@
+import app.data.changes as Changes
+import app.data.incidents as Incidents
+
+def test_changes_are_logged_in_order_per_table(db, add_incidents, add_tickets):
+    add_incidents([(1, "2024-01-01", "Phishing", "High", "Open")])
+    add_tickets([("T-1", "Password Reset", "High", "Open", "2024-01-01")])
+    Incidents.update_incident(1, "2024-01-01", "Phishing", "High", "Closed")
+
+    changes = Changes.changes_since(0)
+    assert [(c["table"], c["op"]) for c in changes] == [
+        ("cyber_incidents", "INSERT"), ("IT_Tickets", "INSERT"), ("cyber_incidents", "UPDATE"),
+    ]
+    assert [c["seq"] for c in changes] == sorted(c["seq"] for c in changes)
+    update = changes[-1]
+    assert (update["old"]["status"], update["new"]["status"]) == ("Open", "Closed")
+    assert changes[0]["old"] is None
+
+    assert [c["op"] for c in Changes.changes_since(0, tables=["IT_Tickets"])] == ["INSERT"]
+    assert Changes.changes_since(changes[0]["seq"], limit=1) == [changes[1]]
+    assert Changes.changes_since(Changes.latest_seq()) == []
+
+def test_prune_keeps_later_changes_and_the_sequence(db, add_incidents):
+    add_incidents([
+        (1, "2024-01-01", "Phishing", "High", "Open"),
+        (2, "2024-01-02", "Malware", "Low", "Open"),
+        (3, "2024-01-03", "Phishing", "Low", "Open"),
+    ])
+    latest = Changes.latest_seq()
+    assert Changes.prune_changes(latest) == 2
+
+    assert [c["seq"] for c in Changes.changes_since(0)] == [latest]
+    assert Changes.prune_changes(latest + 1) == 1
+    # Sequence numbers are never reused after pruning, so readers' positions stay valid
+    assert Changes.latest_seq() == latest
+    add_incidents([(4, "2024-01-04", "Malware", "High", "Open")])
+    assert [c["seq"] for c in Changes.changes_since(latest)] == [latest + 1]
@@ -0,0 +1,29 @@
+import app.services.digest as Digest
+
+def test_fit_budget_keeps_whole_lines_in_order():
+    lines = ["a" * 7, "b" * 7, "c" * 3]
+    # Each line plus its newline is two tokens
+    assert Digest.fit_budget(lines, 4) == "aaaaaaa\nbbbbbbb"
+    assert Digest.fit_budget(lines, 3) == "aaaaaaa"
+    assert Digest.fit_budget(lines, 1) == ""
+    # Stops at the first line that doesn't fit, even if a later one would
+    assert Digest.fit_budget(["a" * 20, "b"], 3) == ""
+
+def test_digest_counts_open_rows_and_fits_the_budget(db, add_incidents, add_tickets, monkeypatch):
+    monkeypatch.setattr(Digest, "_cache", {})
+    add_incidents([
+        (1, "2024-01-10", "Phishing", "High", "Open"),
+        (2, "2024-02-10", "Phishing", "Low", "Under Investigation"),
+        (3, "2024-02-11", "Malware", "Low", "Closed"),
+    ])
+    add_tickets([("TKT-1", "Printer Jammed", "Low", "Pending User Action", "2024-01-01")])
+
+    digest = Digest.get_digest()
+    assert "Incidents: 3 total, 2 open" in digest
+    assert "Tickets: 1 total, 1 open" in digest
+    assert "Incidents per month: 2024-01 1, 2024-02 2" in digest
+    assert Digest.get_digest() is digest
+
+    short = Digest.get_digest(["cyber_incidents"], budget=10)
+    assert short == "Incidents: 3 total, 2 open"
+    assert Digest.estimate_tokens(short) <= 10
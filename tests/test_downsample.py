@@ -0,0 +1,34 @@
+import numpy as np
+from app.services.downsample import lttb, lttb_indices, target_points
+
+def test_short_series_is_returned_whole():
+    assert lttb_indices([1, 2, 3], [5, 6, 7], 10).tolist() == [0, 1, 2]
+    assert lttb_indices(range(10), range(10), 2).tolist() == list(range(10))
+
+def test_keeps_endpoints_and_spike():
+    x = np.arange(1000)
+    y = np.zeros(1000)
+    y[437] = 50.0
+    keep = lttb_indices(x, y, 20)
+    assert len(keep) == 20
+    assert keep[0] == 0 and keep[-1] == 999
+    assert (np.diff(keep) > 0).all()
+    assert 437 in keep
+
+def test_datetime_x_values():
+    x = np.arange("2024-01-01", "2024-12-31", dtype="datetime64[D]")
+    y = np.sin(np.arange(len(x)) / 10.0)
+    kept_x, kept_y = lttb(x, y, 50)
+    assert len(kept_x) == len(kept_y) == 50
+    assert kept_x.dtype == x.dtype
+    assert kept_x[0] == x[0] and kept_x[-1] == x[-1]
+
+def test_target_points():
+    assert target_points(700, 2) == 1400
+    assert target_points(1, 1) == 3
+
+def test_empty_series_gives_typed_empty_arrays():
+    x, y = lttb(np.array([], dtype="datetime64[ns]"), np.array([], dtype=object), 100)
+    assert len(x) == len(y) == 0
+    assert x.dtype == np.dtype("datetime64[ns]")
+    assert y.dtype == np.float64
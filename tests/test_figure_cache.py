@@ -0,0 +1,26 @@
+import plotly.graph_objects as go
+import plotly.tools
+import app.services.figure_cache as FigureCache
+
+def test_figure_is_built_once_per_version():
+    FigureCache.clear()
+    builds = []
+
+    def build():
+        builds.append(1)
+        return go.Figure(go.Bar(x=["a", "b"], y=[1, 2]))
+
+    first = FigureCache.get_figure("bar", "column", 1, build)
+    # Drawing it (what st.plotly_chart does) works on a copy and leaves the cached figure alone
+    drawn = plotly.tools.return_figure_from_figure_or_data(first, validate_figure=True)
+    drawn["layout"]["title"] = "changed by one session"
+
+    assert FigureCache.get_figure("bar", "column", 1, build) is first
+    assert len(builds) == 1
+    assert first.layout.title.text is None
+    assert FigureCache.contains("bar", "column", 1)
+    assert not FigureCache.contains("bar", "column", 2)
+
+    FigureCache.get_figure("bar", "column", 2, build)
+    assert len(builds) == 2
+    FigureCache.clear()
@@ -0,0 +1,28 @@
+import logging
+import pandas as pd
+import app.data.frames as Frames
+
+def test_known_enum_values_become_categories():
+    chunk = Frames.apply_dtypes(
+        pd.DataFrame({"id": [1, 2], "severity": ["High", None], "date": ["2024-01-01", "bad"]}),
+        Frames.INCIDENT_DTYPES, Frames.INCIDENT_DATES
+    )
+    assert chunk["severity"].tolist()[0] == "High" and pd.isna(chunk["severity"][1])
+    assert list(chunk["severity"].cat.categories) == list(Frames.INCIDENT_DTYPES["severity"].categories)
+    assert str(chunk["id"].dtype) == "Int64"
+    assert pd.isna(chunk["date"][1])
+
+def test_unknown_enum_values_are_kept_and_logged(caplog):
+    raw = pd.DataFrame({"id": [1, 2, 3], "severity": ["High", "Urgent", "Urgent"]})
+    with caplog.at_level(logging.WARNING, logger="app.data.frames"):
+        chunk = Frames.apply_dtypes(raw, Frames.INCIDENT_DTYPES, [])
+    assert chunk["severity"].tolist() == ["High", "Urgent", "Urgent"]
+    assert "2 severity value(s) outside the known categories: ['Urgent']" in caplog.text
+
+def test_chunks_with_different_categories_stay_categorical():
+    first = Frames.apply_dtypes(pd.DataFrame({"severity": ["High"]}), Frames.INCIDENT_DTYPES, [])
+    second = Frames.apply_dtypes(pd.DataFrame({"severity": ["Urgent"]}), Frames.INCIDENT_DTYPES, [])
+    joined = Frames.concat_chunks([first, second])
+    assert isinstance(joined["severity"].dtype, pd.CategoricalDtype)
+    assert joined["severity"].tolist() == ["High", "Urgent"]
+    assert Frames.count_by([first, second], "severity").to_dict() == {"High": 1, "Urgent": 1}
@@ -0,0 +1,45 @@
+import app.data.incidents as Incidents
+
+def incident(id, date, status="Open", created_at=None):
+    return {"id": id, "date": date, "incident_type": "Phishing", "severity": "High", "status": status,
+            "created_at": created_at}
+
+def stored(db):
+    return db.execute("SELECT id, date, status, created_at FROM cyber_incidents ORDER BY id").fetchall()
+
+def test_upsert_inserts_updates_and_moves(db):
+    cursor = db.cursor()
+    assert Incidents.upsert_incidents(cursor, [
+        incident(1, "2023-01-01", created_at="2023-01-01 09:00:00"),
+        incident(2, "2024-01-01", created_at="2024-01-01 09:00:00"),
+        incident(3, "2024-02-01", created_at="2024-02-01 09:00:00"),
+    ]) == 3
+    assert Incidents.upsert_incidents(cursor, [
+        incident(1, "2023-06-01", "Closed"),           # same year, in place
+        incident(2, "2025-01-01", "Resolved"),         # moves to the 2025 partition
+        incident(4, "2025-03-01"),                     # new
+        incident(4, "2025-03-02", "Closed"),           # the last record for an id wins
+    ]) == 3
+    db.commit()
+
+    rows = stored(db)
+    assert [row[:3] for row in rows] == [
+        (1, "2023-06-01", "Closed"), (2, "2025-01-01", "Resolved"), (3, "2024-02-01", "Open"), (4, "2025-03-02", "Closed"),
+    ]
+    # A moved row keeps its created_at, a new one without it gets the current time
+    assert rows[1][3] == "2024-01-01 09:00:00" and rows[3][3] is not None
+    assert dict(db.execute("SELECT id, year FROM incident_partition_map")) == {1: 2023, 2: 2025, 3: 2024, 4: 2025}
+    assert db.execute("SELECT COUNT(*) FROM cyber_incidents_2024").fetchone()[0] == 1
+
+def test_upsert_statements_do_not_grow_with_rows(db):
+    statements = []
+    db.set_trace_callback(statements.append)
+    Incidents.upsert_incidents(db.cursor(), [incident(id, "2024-01-{:02d}".format(1 + id % 28)) for id in range(1, 301)])
+    db.set_trace_callback(None)
+    db.commit()
+
+    assert db.execute("SELECT COUNT(*) FROM cyber_incidents").fetchone()[0] == 300
+    # One id lookup and one partition check for the batch, not one of each per row
+    assert sum("FROM incident_partition_map WHERE" in statement for statement in statements) == 1
+    # Creating the 2024 partition reads the schema three times (partition, change log, view)
+    assert sum("sqlite_master" in statement for statement in statements) <= 3
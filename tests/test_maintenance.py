@@ -0,0 +1,67 @@
+import sqlite3
+import pytest
+import app.data.maintenance as Maintenance
+from app.data.archive import enable_incremental_vacuum
+from app.data.db import connect_database
+
+@pytest.fixture
+def scheduler(db, monkeypatch):
+    """A scheduler at time 0 with a 1s tick, whose runs are recorded instead of executed."""
+    monkeypatch.setattr(Maintenance, "IDLE_SECONDS", 10)
+    monkeypatch.setattr(Maintenance, "MAX_BACKOFF_SECONDS", 8)
+    runs = []
+    monkeypatch.setattr(Maintenance, "run_due", lambda db_path: runs.append(db_path))
+    watcher = connect_database()
+    scheduler = Maintenance.MaintenanceScheduler(watcher, tick=1, now=0)
+    scheduler.runs = runs
+    yield scheduler
+    watcher.close()
+
+def write(db):
+    db.execute("INSERT INTO feed_checkpoints (feed, path, offset) VALUES ('x', 'x', 0) "
+               "ON CONFLICT(feed) DO UPDATE SET offset = offset + 1")
+    db.commit()
+
+def test_tasks_wait_for_the_database_to_be_idle(db, scheduler):
+    assert scheduler.step(now=5) == 2
+    assert scheduler.runs == []
+    assert scheduler.step(now=10) == 1
+    assert len(scheduler.runs) == 1
+
+    # Another connection writes: the idle clock restarts and the wait doubles up to the cap
+    write(db)
+    assert [scheduler.step(now=now) for now in (11, 13, 17, 19)] == [2, 4, 8, 8]
+    assert len(scheduler.runs) == 1
+    assert scheduler.step(now=21) == 1
+    assert len(scheduler.runs) == 2
+
+def test_own_writes_are_not_activity(db, scheduler, monkeypatch):
+    def run_due(db_path):
+        scheduler.runs.append(db_path)
+        write(db)
+    monkeypatch.setattr(Maintenance, "run_due", run_due)
+
+    assert scheduler.step(now=10) == 1
+    assert scheduler.step(now=11) == 1
+    assert len(scheduler.runs) == 2
+
+def test_locked_database_backs_off(scheduler, monkeypatch):
+    def locked(db_path):
+        raise sqlite3.OperationalError("database is locked")
+    monkeypatch.setattr(Maintenance, "run_due", locked)
+    assert [scheduler.step(now=now) for now in (10, 12, 16, 24)] == [2, 4, 8, 8]
+
+def test_run_task_reports_checkpointed_and_freed_pages(db):
+    db.isolation_level = None
+    enable_incremental_vacuum(db)
+    db.execute("CREATE TABLE filler (blob BLOB)")
+    db.execute("INSERT INTO filler SELECT randomblob(4000) FROM (SELECT 1 UNION SELECT 2 UNION SELECT 3)")
+    db.execute("DROP TABLE filler")
+
+    checkpoint = Maintenance.run_task("checkpoint")
+    assert checkpoint["wal_pages_checkpointed"] > 0
+    assert checkpoint["pages_freed"] == 0
+
+    vacuum = Maintenance.run_task("vacuum")
+    assert vacuum["pages_freed"] > 0
+    assert "wal_pages_checkpointed" not in vacuum
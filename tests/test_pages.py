@@ -0,0 +1,46 @@
+import logging
+from streamlit.testing.v1 import AppTest
+from conftest import ROOT
+
+def run_page(name):
+    """Runs a dashboard page signed in as a test user, on the test database."""
+    app = AppTest.from_file(str(ROOT / "pages" / name), default_timeout=60)
+    app.session_state.logged_in = True
+    app.session_state.username = "tester"
+    app.run()
+    return app
+
+def test_tickets_page_loads_without_tickets(db):
+    app = run_page("IT_Tickets.py")
+    assert not app.exception
+
+def test_incidents_page_survives_an_empty_time_window(db, add_incidents):
+    add_incidents([(1, "2020-01-01", "Phishing", "High", "Open")])
+    app = run_page("Cyber_Analytics.py")
+    assert not app.exception
+
+    window = next(box for box in app.selectbox if box.label == "Time Window")
+    window.select("Last 30 days").run()
+    assert not app.exception
+
+def test_digest_is_only_built_for_a_prompt(db, monkeypatch):
+    import app.services.assistant as Assistant
+    import app.services.digest as Digest
+
+    calls = []
+    monkeypatch.setattr(Digest, "system_prompt", lambda base, tables=None, budget=None: calls.append(tables) or base)
+    monkeypatch.setattr(Assistant, "BACKEND", "echo")
+
+    app = run_page("IT_Tickets.py")
+    assert calls == []
+
+    app.chat_input[0].set_value("hello").run()
+    assert not app.exception
+    assert len(calls) == 1
+
+def test_signed_out_rerun_still_logs_its_profile(db, caplog):
+    app = AppTest.from_file(str(ROOT / "pages" / "IT_Tickets.py"), default_timeout=60)
+    with caplog.at_level(logging.INFO, logger="pages.IT_Tickets"):
+        app.run()
+    assert not app.exception
+    assert any(r.name == "pages.IT_Tickets" and r.getMessage() == "rerun finished" for r in caplog.records)
@@ -0,0 +1,34 @@
+import app.data.pivot as Pivot
+from app.data.validation import SEVERITIES, INCIDENT_STATUSES, PRIORITIES
+
+def test_crosstab_keeps_every_category_in_canonical_order(db, add_incidents):
+    add_incidents([
+        (1, "2023-06-01", "Phishing", "High", "Open"),
+        (2, "2024-01-01", "Phishing", "High", "Open"),
+        (3, "2024-02-01", "Malware", "Low", "Closed"),
+    ])
+    matrix = Pivot.pivot("cyber_incidents", "severity", "status", conn=db)
+
+    assert list(matrix.index) == list(SEVERITIES)
+    assert list(matrix.columns) == list(INCIDENT_STATUSES)
+    # The two partitions' counts are summed
+    assert matrix.loc["High", "Open"] == 2
+    assert matrix.loc["Low", "Closed"] == 1
+    assert int(matrix.values.sum()) == 3
+    assert str(matrix.dtypes.iloc[0]) == "int64"
+
+def test_date_range_and_filters_narrow_the_counts(db, add_incidents):
+    add_incidents([
+        (1, "2023-06-01", "Phishing", "High", "Open"),
+        (2, "2024-01-01", "Phishing", "High", "Open"),
+        (3, "2024-02-01", "Malware", "High", "Closed"),
+    ])
+    matrix = Pivot.pivot("cyber_incidents", "severity", "status", filters={"incident_type": "Phishing"},
+                         date_from="2024-01-01", conn=db)
+    assert matrix.loc["High", "Open"] == 1
+    assert int(matrix.values.sum()) == 1
+
+def test_empty_table_gives_a_zero_matrix_of_full_shape(db):
+    matrix = Pivot.pivot("IT_Tickets", "priority", "status", conn=db)
+    assert list(matrix.index) == list(PRIORITIES)
+    assert int(matrix.values.sum()) == 0
@@ -0,0 +1,39 @@
+import sqlite3
+import threading
+import time
+import pytest
+import app.data.pool as Pool
+
+def test_gather_returns_results_by_name_whatever_finishes_first(db):
+    release = threading.Event()
+
+    def slow(conn):
+        release.wait(5)
+        return "slow"
+
+    def fast(conn):
+        release.set()
+        return conn.execute("SELECT COUNT(*) FROM IT_Tickets").fetchone()[0]
+
+    futures = {"slow": Pool.submit(slow), "fast": Pool.submit(fast)}
+    assert Pool.gather(futures) == {"slow": "slow", "fast": 0}
+    assert list(Pool.gather(futures)) == ["slow", "fast"]
+
+def test_gather_reraises_a_failed_query(db):
+    def broken(conn):
+        return conn.execute("SELECT * FROM no_such_table").fetchall()
+
+    def fine(conn, value):
+        time.sleep(0.01)
+        return value
+
+    futures = {"fine": Pool.submit(fine, value=1), "broken": Pool.submit(broken)}
+    with pytest.raises(sqlite3.OperationalError, match="no_such_table"):
+        Pool.gather(futures)
+
+def test_workers_read_the_snapshot_readonly(db):
+    def write(conn):
+        conn.execute("DELETE FROM IT_Tickets")
+
+    with pytest.raises(sqlite3.OperationalError, match="readonly"):
+        Pool.gather({"write": Pool.submit(write)})
@@ -0,0 +1,45 @@
+import logging
+import tracemalloc
+import pytest
+import app.services.profiler as Profiler
+
+class Stopped(Exception):
+    """Stands in for the exception st.stop() raises to end a rerun."""
+
+def test_profile_is_logged_when_the_rerun_stops_early(monkeypatch, caplog):
+    monkeypatch.setattr(Profiler, "PROFILE_MEMORY", True)
+    monkeypatch.setattr(Profiler, "PROFILE_CPROFILE", True)
+    was_tracing = tracemalloc.is_tracing()
+    if was_tracing:
+        tracemalloc.stop()
+
+    with caplog.at_level(logging.INFO, logger="pages.Test"):
+        with pytest.raises(Stopped):
+            with Profiler.PageProfiler("Test") as profiler:
+                with profiler.section("check_login"):
+                    assert tracemalloc.is_tracing()
+                    raise Stopped()
+
+    assert profiler.finished
+    assert [s["section"] for s in profiler.sections] == ["check_login"]
+    assert "top_functions" in profiler.sections[0]
+    assert len([r for r in caplog.records if r.name == "pages.Test"]) == 1
+    assert not tracemalloc.is_tracing()
+
+    # finish() is idempotent, so an explicit call after the block logs nothing more
+    profiler.finish()
+    assert len([r for r in caplog.records if r.name == "pages.Test"]) == 1
+    if was_tracing:
+        tracemalloc.start()
+
+def test_tracing_stays_on_until_the_last_profiled_rerun_finishes(monkeypatch):
+    monkeypatch.setattr(Profiler, "PROFILE_MEMORY", True)
+    if tracemalloc.is_tracing():
+        pytest.skip("tracemalloc already enabled outside the profiler")
+
+    first = Profiler.PageProfiler("First")
+    second = Profiler.PageProfiler("Second")
+    first.finish()
+    assert tracemalloc.is_tracing()
+    second.finish()
+    assert not tracemalloc.is_tracing()
@@ -0,0 +1,30 @@
+import app.data.query_plan as QueryPlan
+from app.data.db import DB_PATH
+
+def test_full_scan_is_flagged_and_a_key_lookup_is_not(db):
+    scan = QueryPlan.explain(DB_PATH, "SELECT * FROM IT_Tickets WHERE created_date = 'x'")
+    assert [flag.split(":")[0] for flag in QueryPlan.analyse_plan(scan)] == ["full scan"]
+
+    lookup = QueryPlan.explain(DB_PATH, "SELECT * FROM IT_Tickets WHERE id = 1")
+    assert QueryPlan.analyse_plan(lookup) == []
+
+def test_catalog_and_constant_scans_are_not_flagged():
+    assert QueryPlan.analyse_plan(["SCAN sqlite_master", "SCAN CONSTANT ROW", "SCAN (subquery-1)"]) == []
+    assert QueryPlan.analyse_plan(["USE TEMP B-TREE FOR ORDER BY"]) == ["temp b-tree: USE TEMP B-TREE FOR ORDER BY"]
+
+def test_statements_are_reported_once_per_shape(db, monkeypatch):
+    monkeypatch.setattr(QueryPlan, "write_report", lambda path=None: None)
+    QueryPlan.reset()
+    QueryPlan.attach(db, DB_PATH)
+    for day in ("2024-01-01", "2024-01-02"):
+        db.execute("SELECT * FROM IT_Tickets WHERE created_date = '{}'".format(day)).fetchall()
+    db.execute("SELECT * FROM IT_Tickets WHERE id = 1").fetchall()
+    db.set_trace_callback(None)
+
+    entries = QueryPlan.report()
+    assert [(e["statement"], e["count"]) for e in entries] == [
+        ("SELECT * FROM IT_Tickets WHERE created_date = ?", 2),
+        ("SELECT * FROM IT_Tickets WHERE id = ?", 1),
+    ]
+    assert [e["statement"] for e in QueryPlan.report(flagged_only=True)] == [entries[0]["statement"]]
+    QueryPlan.reset()
@@ -0,0 +1,53 @@
+import app.data.changes as Changes
+import report as Report
+
+def severity_counts(results):
+    frame = results["incidents"]["by_severity"]
+    return dict(zip(frame["severity"], frame["count"]))
+
+def partitions(db):
+    return len(Report.source_tables(db, "cyber_incidents"))
+
+def run(capsys):
+    results = Report.build_report()
+    return results, capsys.readouterr().out.splitlines()
+
+def test_only_partitions_changed_since_the_cached_seq_are_recomputed(db, add_incidents, add_tickets, capsys):
+    add_incidents([
+        (1, "2023-06-01", "Phishing", "High", "Open"),
+        (2, "2024-01-01", "Malware", "Low", "Open"),
+    ])
+    add_tickets([("T-1", "Password Reset", "High", "Open", "2024-01-01")])
+    n = partitions(db)
+    results, lines = run(capsys)
+    assert lines == ["incidents: {} table(s) recomputed, 0 from cache".format(n), "tickets: 1 table(s) recomputed, 0 from cache"]
+    assert severity_counts(results) == {"High": 1, "Low": 1}
+
+    # Nothing changed: everything comes from the cache
+    _, lines = run(capsys)
+    assert lines == ["incidents: 0 table(s) recomputed, {} from cache".format(n), "tickets: 0 table(s) recomputed, 1 from cache"]
+
+    # A write to the 2024 partition bumps the seq; only that partition is read again
+    add_incidents([(3, "2024-03-01", "Phishing", "High", "Closed")])
+    results, lines = run(capsys)
+    assert lines == ["incidents: 1 table(s) recomputed, {} from cache".format(n - 1), "tickets: 0 table(s) recomputed, 1 from cache"]
+    assert severity_counts(results) == {"High": 2, "Low": 1}
+
+def test_cache_is_rebuilt_when_the_log_was_pruned_past_it(db, add_incidents, capsys):
+    add_incidents([(1, "2023-06-01", "Phishing", "High", "Open")])
+    run(capsys)
+
+    add_incidents([(2, "2023-07-01", "Malware", "Low", "Open"), (3, "2024-01-01", "Malware", "Low", "Open")])
+    Changes.prune_changes(Changes.latest_seq())
+    results, lines = run(capsys)
+    assert lines[0] == "incidents: {} table(s) recomputed, 0 from cache".format(partitions(db))
+    assert severity_counts(results) == {"High": 1, "Low": 2}
+
+def test_cache_is_rebuilt_when_the_whole_log_was_pruned(db, add_incidents, capsys):
+    add_incidents([(1, "2023-06-01", "Phishing", "High", "Open")])
+    run(capsys)
+
+    add_incidents([(2, "2023-07-01", "Malware", "Low", "Open")])
+    Changes.prune_changes(Changes.latest_seq() + 1)
+    results, _ = run(capsys)
+    assert severity_counts(results) == {"High": 1, "Low": 1}
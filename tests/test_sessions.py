@@ -0,0 +1,99 @@
+from types import SimpleNamespace
+import pytest
+import app.services.page_session as PageSession
+import app.services.session_service as Sessions
+
+@pytest.fixture
+def sessions(db, monkeypatch):
+    monkeypatch.setenv("SESSION_SECRET", "test-secret")
+    monkeypatch.setattr(Sessions, "_secret", None)
+    return Sessions
+
+def test_token_round_trip(sessions):
+    token = sessions.CreateSession("ann")
+    assert sessions.ValidateSession(token) == "ann"
+    assert sessions.ValidateSession("ann") is None
+    assert sessions.ValidateSession(None) is None
+
+def test_tampered_tokens_are_rejected(sessions):
+    token = sessions.CreateSession("ann")
+    payload, _, signature = token.rpartition(".")
+    other = sessions._encode("bob")
+    assert sessions.ValidateSession(other + token[token.index("."):]) is None
+    flipped = "0" if signature[-1] != "0" else "1"
+    assert sessions.ValidateSession(payload + "." + signature[:-1] + flipped) is None
+    # Non-ASCII signatures are rejected, not a TypeError from compare_digest
+    assert sessions.ValidateSession(payload + ".sigé") is None
+    assert not sessions.RevokeSession("YQ.a.9999999999.sigé")
+
+def test_expired_tokens_are_rejected(sessions, monkeypatch):
+    monkeypatch.setattr(sessions, "SESSION_TTL_SECONDS", -1)
+    token = sessions.CreateSession("ann")
+    assert sessions.ValidateSession(token) is None
+    assert sessions.PurgeExpiredSessions() == 1
+
+def test_revoked_tokens_are_rejected(sessions):
+    token = sessions.CreateSession("ann")
+    other = sessions.CreateSession("ann")
+    assert sessions.RevokeSession(token)
+    assert sessions.ValidateSession(token) is None
+    assert sessions.ValidateSession(other) == "ann"
+
+def test_a_key_signed_elsewhere_is_rejected(sessions, monkeypatch):
+    token = sessions.CreateSession("ann")
+    monkeypatch.setattr(sessions, "_secret", b"another key")
+    assert sessions.ValidateSession(token) is None
+
+def test_key_file_is_created_once(db, monkeypatch):
+    monkeypatch.delenv("SESSION_SECRET", raising=False)
+    key = Sessions._load_secret()
+    assert key and Sessions._load_secret() == key
+    assert (Sessions.SECRET_PATH.stat().st_mode & 0o777) == 0o600
+
+    Sessions.SECRET_PATH.write_bytes(b"")
+    with pytest.raises(RuntimeError):
+        Sessions._load_secret()
+
+class State(dict):
+    """Dict with attribute access, like st.session_state."""
+    __getattr__ = dict.get
+
+    def __setattr__(self, name, value):
+        self[name] = value
+
+def fake_streamlit(monkeypatch, cookies):
+    written = []
+    fake = SimpleNamespace(
+        session_state=State(),
+        context=SimpleNamespace(cookies=cookies),
+        html=lambda body, **kwargs: written.append(body),
+    )
+    monkeypatch.setattr(PageSession, "st", fake)
+    return fake, written
+
+def test_cookie_round_trip(sessions, monkeypatch):
+    token = sessions.CreateSession("ann")
+
+    # A new tab sends the cookie and is signed back in without writing it again
+    fake, written = fake_streamlit(monkeypatch, {PageSession.COOKIE_NAME: token})
+    PageSession.restore_login()
+    assert fake.session_state.logged_in and fake.session_state.username == "ann"
+    assert written == []
+
+    # Logging out deletes the cookie
+    fake.session_state.logged_in = False
+    PageSession.sync_cookie()
+    assert len(written) == 1 and "Max-Age=0" in written[0]
+
+def test_login_writes_the_cookie_and_bad_cookies_are_ignored(sessions, monkeypatch):
+    fake, written = fake_streamlit(monkeypatch, {PageSession.COOKIE_NAME: "forged.token.123.abc"})
+    PageSession.restore_login()
+    assert not fake.session_state.logged_in
+    # The invalid cookie is deleted
+    assert len(written) == 1 and "Max-Age=0" in written[0]
+
+    token = sessions.CreateSession("ann")
+    fake.session_state.update(logged_in=True, username="ann", session_token=token)
+    PageSession.sync_cookie()
+    assert len(written) == 2
+    assert token in written[1] and "SameSite=Strict" in written[1]
@@ -0,0 +1,49 @@
+import sqlite3
+import pytest
+import app.data.snapshot as Snapshot
+from app.data.db import connect_readonly, data_version
+
+def count_incidents(path):
+    conn = connect_readonly(path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM incident_partition_map").fetchone()[0]
+    finally:
+        conn.close()
+
+def test_refresh_copies_the_primary_as_a_readonly_replica(db, add_incidents):
+    add_incidents([(1, "2024-01-01", "Phishing", "High", "Open")])
+    Snapshot.refresh_snapshot()
+
+    assert count_incidents(Snapshot.SNAPSHOT_PATH) == 1
+    assert Snapshot.analytics_version() == data_version()
+    assert not Snapshot.SNAPSHOT_PATH.with_name(Snapshot.SNAPSHOT_PATH.name + ".tmp").exists()
+    conn = Snapshot.connect_analytics()
+    try:
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("DELETE FROM incident_partition_map")
+    finally:
+        conn.close()
+
+def test_snapshot_lags_writes_until_the_staleness_bound(db, add_incidents):
+    Snapshot.ensure_fresh(max_staleness=60)
+    version = Snapshot.analytics_version(max_staleness=60)
+
+    # Within the bound the dashboards keep reading the old copy
+    add_incidents([(1, "2024-01-01", "Phishing", "High", "Open")])
+    Snapshot.ensure_fresh(max_staleness=60)
+    assert count_incidents(Snapshot.SNAPSHOT_PATH) == 0
+    assert Snapshot.analytics_version(max_staleness=60) == version
+
+    # Past the bound the changed primary is copied again
+    Snapshot.ensure_fresh(max_staleness=0)
+    assert count_incidents(Snapshot.SNAPSHOT_PATH) == 1
+    assert Snapshot.analytics_version(max_staleness=60) == data_version() != version
+
+def test_unchanged_primary_is_not_copied_again(db, add_incidents, monkeypatch):
+    add_incidents([(1, "2024-01-01", "Phishing", "High", "Open")])
+    Snapshot.ensure_fresh(max_staleness=0)
+    copies = []
+    monkeypatch.setattr(Snapshot, "refresh_snapshot", lambda *args: copies.append(args))
+
+    Snapshot.ensure_fresh(max_staleness=0)
+    assert copies == []
@@ -0,0 +1,45 @@
+import app.data.sync as Sync
+
+HEADER = "ticket_id,subject,priority,status,created_date\n"
+
+def stored(db):
+    return db.execute("SELECT ticket_id, status, created_at IS NOT NULL FROM IT_Tickets ORDER BY ticket_id").fetchall()
+
+def test_feed_is_read_incrementally(db, tmp_path, monkeypatch):
+    feed = tmp_path / "tickets.csv"
+    monkeypatch.setitem(Sync.FEEDS, "tickets", dict(Sync.FEEDS["tickets"], path=feed))
+    monkeypatch.setattr(Sync, "SYNC_BATCH_ROWS", 2)
+
+    # A feed without created_at, ending in a partly written line
+    feed.write_text(
+        "﻿" + HEADER
+        + "TKT-1,Printer Jammed,Low,Open,2024-01-01\n"
+        + "TKT-2,Printer Jammed,High,Open,2024-01-02\n"
+        + "TKT-3,Printer Jammed,Low,Open,2024-01-03\n"
+        + "TKT-4,Printer Ja"
+    )
+    assert Sync.sync_feed("tickets") == 3
+    assert Sync.sync_feed("tickets") == 0
+
+    with open(feed, "a") as handle:
+        handle.write("mmed,Medium,Open,2024-01-04\nTKT-1,Printer Jammed,Low,Resolved,2024-01-01\n")
+    assert Sync.sync_feed("tickets") == 2
+    assert stored(db) == [("TKT-1", "Resolved", 1), ("TKT-2", "Open", 1), ("TKT-3", "Open", 1), ("TKT-4", "Open", 1)]
+
+def test_rewritten_feed_is_read_again(db, tmp_path, monkeypatch):
+    feed = tmp_path / "tickets.csv"
+    monkeypatch.setitem(Sync.FEEDS, "tickets", dict(Sync.FEEDS["tickets"], path=feed))
+    feed.write_text(HEADER + "TKT-1,Printer Jammed,Low,Open,2024-01-01\n")
+    assert Sync.sync_feed("tickets") == 1
+
+    feed.write_text(HEADER + "TKT-1,Printer Jammed,Low,Closed,2024-01-01\n")
+    assert Sync.sync_feed("tickets") == 1
+    assert stored(db) == [("TKT-1", "Closed", 1)]
+
+def test_missing_feed_is_reported(db, tmp_path, monkeypatch, caplog):
+    monkeypatch.setitem(Sync.FEEDS, "tickets", dict(Sync.FEEDS["tickets"], path=tmp_path / "missing.csv"))
+    monkeypatch.setitem(Sync.FEEDS, "incidents", dict(Sync.FEEDS["incidents"], path=tmp_path / "incidents.csv"))
+    (tmp_path / "incidents.csv").write_text("id,date,incident_type,severity,status\n")
+
+    assert Sync.sync_all() == {"incidents": 0, "tickets": None}
+    assert "missing.csv not found" in caplog.text
@@ -0,0 +1,43 @@
+import app.data.tickets as Tickets
+
+def test_queue_order_and_claims(add_tickets):
+    add_tickets([
+        ("TKT-1", "Printer Jammed", "Low", "Open", "2024-01-01"),
+        ("TKT-2", "Printer Jammed", "Critical", "Open", "2024-01-05"),
+        ("TKT-3", "Printer Jammed", "Critical", "Open", "2024-01-03"),
+        ("TKT-4", "Printer Jammed", "High", "Resolved", "2023-12-01"),
+        ("TKT-5", "Printer Jammed", "High", "Open", "2024-01-02"),
+    ])
+    # Highest priority first, oldest first within a priority; closed tickets never queue
+    assert Tickets.next_ticket()["ticket_id"] == "TKT-3"
+
+    assert Tickets.claim("TKT-3", "ann")
+    assert not Tickets.claim("TKT-3", "bob")
+    assert not Tickets.claim("TKT-4", "bob")
+
+    claimed = [Tickets.claim_next("bob")["ticket_id"] for _ in range(3)]
+    assert claimed == ["TKT-2", "TKT-5", "TKT-1"]
+    assert Tickets.claim_next("bob") is None
+    assert Tickets.next_ticket() is None
+    assert Tickets.claimed_tickets("bob")["ticket_id"].tolist() == ["TKT-2", "TKT-5", "TKT-1"]
+
+def test_release_only_by_holder(add_tickets):
+    add_tickets([("TKT-1", "Printer Jammed", "Medium", "Open", "2024-01-01")])
+    ticket = Tickets.claim_next("ann")
+    assert ticket["status"] == "In Progress" and ticket["assigned_to"] == "ann"
+
+    assert not Tickets.release("TKT-1", "bob")
+    assert Tickets.release("TKT-1", "ann")
+    assert not Tickets.release("TKT-1", "ann")
+    assert Tickets.next_ticket()["assigned_to"] is None
+
+def test_queue_head_is_an_index_lookup(db):
+    plan = db.execute(
+        "EXPLAIN QUERY PLAN SELECT ticket_id FROM IT_Tickets WHERE status = ? ORDER BY {}, created_date LIMIT 1".format(
+            Tickets.PRIORITY_RANK_SQL
+        ),
+        (Tickets.QUEUE_STATUS,)
+    ).fetchall()
+    details = " ".join(row[-1] for row in plan)
+    assert "idx_it_tickets_queue" in details
+    assert "TEMP B-TREE" not in details
@@ -0,0 +1,37 @@
+from app.data.validation import validate_chunk
+
+def test_incident_rows_are_normalized():
+    valid, rejected = validate_chunk("incidents", [
+        {"id": "1", "date": "05/03/2024", "incident_type": " phishing ", "severity": "HIGH",
+         "status": "open", "created_at": "05/03/2024 10:30"},
+        {"id": "2", "date": "2024-03-06", "incident_type": "DDoS", "severity": "Low",
+         "status": "Closed", "created_at": ""},
+    ])
+    assert rejected.empty
+    assert valid == [
+        {"id": 1, "date": "2024-03-05", "incident_type": "Phishing", "severity": "High",
+         "status": "Open", "created_at": "2024-03-05 10:30:00"},
+        {"id": 2, "date": "2024-03-06", "incident_type": "DDoS", "severity": "Low",
+         "status": "Closed", "created_at": None},
+    ]
+
+def test_bad_rows_are_rejected_with_reasons():
+    valid, rejected = validate_chunk("incidents", [
+        {"id": "x", "date": "2024-03-05", "incident_type": "Phishing", "severity": "High", "status": "Open"},
+        {"id": "2", "date": "31/31/2024", "incident_type": "Alien", "severity": "High", "status": "Open"},
+        {"id": "3", "date": "2024-03-05", "incident_type": "Phishing", "severity": " ", "status": "Open"},
+    ])
+    assert valid == []
+    assert rejected["reason"].tolist() == [
+        "invalid id",
+        "invalid date; unknown incident_type",
+        "missing severity",
+    ]
+
+def test_last_row_for_a_key_wins():
+    row = {"ticket_id": "TKT-1", "subject": "Printer Jammed", "priority": "Low", "created_date": "2024-01-01"}
+    valid, rejected = validate_chunk("tickets", [dict(row, status="Open"), dict(row, status="Resolved")])
+    assert [ticket["status"] for ticket in valid] == ["Resolved"]
+    assert rejected["reason"].tolist() == ["superseded by a later row"]
+    # created_at is optional and absent from the normalized rows when the feed lacks it
+    assert "created_at" not in valid[0]